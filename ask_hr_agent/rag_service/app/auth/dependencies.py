@@ -24,3 +24,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail=f"Invalid authentication credentials: {str(e)}",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+async def require_admin(user: UserContext = Depends(get_current_user)) -> UserContext:
+    if settings.ADMIN_GROUP not in (user.roles or []):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+    return user
@@ -1,3 +1,6 @@
+from pathlib import Path
+from typing import Dict, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,15 +13,88 @@ class Settings(BaseSettings):
 
     GOOGLE_PROJECT_ID: str
     GOOGLE_LOCATION: str
-    RAG_CORPUS_NAME: str
+    RAG_CORPUS_NAME: str = ""
     ASKHR_RAG_MODEL: str = "gemini-2.5-pro"
+    ASKHR_RAG_TEMPERATURE: float = 0.2
+    ASKHR_RAG_THINKING_BUDGET: Optional[int] = None
+    ASKHR_RAG_MAX_OUTPUT_TOKENS: Optional[int] = None
 
     IBM_VERIFY_CLIENT_ID: str = ""
     IBM_VERIFY_ISSUER: str = ""
+    ADMIN_GROUP: str = "askhr-admins"
 
     WORKDAY_API_URL: str = "https://workday.example.com"
     WORKDAY_TOOLS_URL: str = "http://localhost:5000"
     WORKDAY_TOOLS_TIMEOUT_SECONDS: int = 300
 
+    # Gemini context caching of stable prompt prefixes ("genai" or the in-process "local" stand-in).
+    CONTEXT_CACHE_ENABLED: bool = True
+    CONTEXT_CACHE_BACKEND: str = "genai"
+    CONTEXT_CACHE_TTL_SECONDS: int = 3600
+    CONTEXT_CACHE_REFRESH_MARGIN_SECONDS: int = 300
+    CONTEXT_CACHE_MIN_TOKENS: int = 2048
+    CONTEXT_CACHE_MAX_ENTRIES: int = 256
+    CONTEXT_CACHE_RETRY_SECONDS: int = 300
+
+    # Corpus the retrieval index was built from; cached results for other versions are discarded.
+    RAG_CORPUS_VERSION: str = ""
+
+    # Retrieval backend: "vertex" searches RAG_CORPUS_NAME; "local" (vectors) and "bm25" search the indexes in
+    # LOCAL_INDEX_DIR; "hybrid" queries HYBRID_RETRIEVERS concurrently and fuses them by reciprocal rank.
+    RETRIEVER_BACKEND: str = "vertex"
+    LOCAL_INDEX_DIR: str = str(Path(__file__).resolve().parents[1] / "index")
+    LOCAL_INDEX_NPROBE: int = 8
+    BM25_K1: float = 1.2
+    BM25_B: float = 0.75
+    HYBRID_RETRIEVERS: str = "local,bm25"
+    HYBRID_RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 20
+    # How often a running service checks LOCAL_INDEX_DIR for a re-ingested index (0 disables reloading).
+    LOCAL_INDEX_RELOAD_CHECK_SECONDS: float = 30.0
+
+    # Retrieval results cached by normalised query, corpus and top_k; empty results expire sooner.
+    RETRIEVAL_TOP_K: int = 3
+    RETRIEVAL_CACHE_ENABLED: bool = True
+    RETRIEVAL_CACHE_TTL_SECONDS: float = 6 * 3600
+    RETRIEVAL_CACHE_NEGATIVE_TTL_SECONDS: float = 300.0
+    RETRIEVAL_CACHE_MAX_ENTRIES: int = 5000
+
+    # Warm caches snapshotted to disk and reloaded on startup.
+    CACHE_SNAPSHOT_ENABLED: bool = True
+    CACHE_SNAPSHOT_PATH: str = str(Path(__file__).resolve().parents[1] / "cache_snapshot.json.gz")
+    CACHE_SNAPSHOT_INTERVAL_SECONDS: float = 300.0
+
+    # Event-loop lag probe and blocked-loop stack reporter.
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.5
+    LOOP_MONITOR_STALL_THRESHOLD_MS: float = 250.0
+
+    # On-demand profiles (sampled requests and timed captures), written under PROFILE_DIR.
+    PROFILE_DIR: str = str(Path(__file__).resolve().parents[1] / "profiles")
+    PROFILE_MAX_FILES: int = 50
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_CAPTURE_SECONDS: float = 120.0
+
+    # Memory accounting: per-store byte budgets as JSON, e.g. {"adk_sessions.rag": 268435456}.
+    MEMORY_BUDGETS: Dict[str, int] = {}
+    MEMORY_CHECK_INTERVAL_SECONDS: float = 60.0
+    MEMORY_TRACEMALLOC_FRAMES: int = 10
+
+    # Token accounting: per-user ledger size, and whether chat responses carry a debug "usage" block.
+    USAGE_LEDGER_MAX_USERS: int = 10000
+    DEBUG_METADATA: bool = False
+
+    # W3C trace-context tracing; spans are kept in a ring buffer and optionally appended to a JSONL file.
+    TRACING_ENABLED: bool = True
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_BUFFER_SPANS: int = 5000
+    TRACE_EXPORT_PATH: str = ""
+
+    # Logging goes through a queue to a listener thread; LOG_FORMAT is "json" or "text".
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_RATE_LIMIT_PER_MINUTE: int = 60
+
 
 settings = Settings()
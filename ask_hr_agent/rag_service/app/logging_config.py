@@ -0,0 +1,172 @@
+import contextvars
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.metrics import metrics
+from app.tracing import tracer
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through ``extra=`` and is emitted as a field.
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with request/trace ids and any ``extra=`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Stamps request and trace ids on the record while still on the emitting thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        span = tracer.current()
+        record.trace_id = span.trace_id if span is not None else None
+        record.span_id = span.span_id if span is not None else None
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets through at most ``per_minute`` records per (logger, level, message template) each minute.
+
+    The first record after a suppressed stretch carries ``suppressed`` with
+    the number of records dropped, so nothing disappears silently. Loggers in
+    ``exempt`` (access logs share one template) are never limited.
+    """
+
+    def __init__(self, per_minute: int, exempt: Tuple[str, ...] = ("uvicorn.access",)):
+        super().__init__()
+        self.per_minute = per_minute
+        self.exempt = exempt
+        self._lock = threading.Lock()
+        self._windows: Dict[Tuple[str, int, str], list] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.per_minute <= 0 or record.name in self.exempt:
+            return True
+        key = (record.name, record.levelno, str(record.msg))
+        window = int(time.monotonic() // 60)
+        with self._lock:
+            state = self._windows.get(key)
+            if state is None or state[0] != window:
+                suppressed = state[2] if state is not None else 0
+                if len(self._windows) > 10000:
+                    self._windows.clear()
+                state = self._windows[key] = [window, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            state[1] += 1
+            if state[1] <= self.per_minute:
+                return True
+            state[2] += 1
+        metrics.incr("log_records_suppressed_total", logger=record.name)
+        return False
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking when the queue is full.
+
+    The stock ``prepare`` renders the message and traceback on the calling
+    thread so records can be pickled; the queue never leaves this process,
+    so the record is passed through and rendered by the listener instead.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.incr("log_records_dropped_total")
+
+
+class RequestContextMiddleware:
+    """ASGI middleware that assigns each request an id (``X-Request-ID`` if sent) and echoes it back."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:64] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+
+        async def _send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            request_id_var.reset(token)
+
+
+def configure_logging() -> None:
+    """Route the root and uvicorn loggers through a bounded queue drained by a listener thread.
+
+    Request handlers only pay for filtering and an enqueue; formatting and
+    the console write happen on the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT_PER_MINUTE))
+    queue_handler.addFilter(ContextFilter())
+
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records; called on shutdown."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measures event-loop lag and reports what is blocking the loop.
+
+    A probe task sleeps for ``interval`` and records how late it woke up as
+    ``event_loop_lag_ms``. A watchdog thread checks the probe's heartbeat;
+    when the loop has not come back for ``stall_threshold_ms`` it captures the
+    loop thread's current stack and logs it, so a stall can be traced to the
+    exact blocking call while it is still happening.
+    """
+
+    def __init__(self, enabled: bool = True, interval: float = 0.5, stall_threshold_ms: float = 250.0, keep: int = 50):
+        self.enabled = enabled
+        self.interval = interval
+        self.stall_threshold = stall_threshold_ms / 1000.0
+        self._stalls: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+        self._beat = time.monotonic()
+        self._reported_beat: Optional[float] = None
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=self.interval * 2)
+            self._watchdog = None
+
+    def recent_stalls(self) -> List[Dict[str, Any]]:
+        return list(self._stalls)
+
+    async def _probe(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            metrics.observe("event_loop_lag_ms", lag * 1000)
+            if lag >= self.stall_threshold:
+                metrics.incr("event_loop_stalls_total")
+            self._beat = time.monotonic()
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.stall_threshold) / 2
+        while not self._stopping.wait(poll):
+            beat = self._beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for < self.stall_threshold or self._reported_beat == beat:
+                continue
+            # One report per stall: the heartbeat only moves once the loop is free again.
+            self._reported_beat = beat
+            self._report(blocked_for)
+
+    def _report(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)  # pylint: disable=protected-access
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else "<unavailable>"
+        self._stalls.append({
+            "ts": time.time(),
+            "blocked_ms": round(blocked_for * 1000, 1),
+            "stack": stack,
+        })
+        logger.warning(
+            "Event loop blocked for >%.0fms; loop thread is at:\n%s", blocked_for * 1000, stack
+        )
+
+
+loop_monitor = LoopMonitor(
+    enabled=settings.LOOP_MONITOR_ENABLED,
+    interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+    stall_threshold_ms=settings.LOOP_MONITOR_STALL_THRESHOLD_MS,
+)
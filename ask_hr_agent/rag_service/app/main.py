@@ -1,21 +1,47 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.logging_config import RequestContextMiddleware, configure_logging, stop_logging
+from app.loop_monitor import loop_monitor
+from app.memory import memory
+from app.metrics import metrics
+from app.profiler import ProfilingMiddleware, profiler
 from app.tls import configure_tls
+from app.tracing import TracingMiddleware, tracer
 
 
 class _GenaiNonTextWarningFilter(logging.Filter):
     def filter(self, record: logging.LogRecord) -> bool:
         return "non-text parts in the response" not in record.getMessage()
 
+configure_logging()
 configure_tls()
 logging.getLogger("google.genai.types").addFilter(_GenaiNonTextWarningFilter())
 
-from app.routers import chat
+from app.routers import admin, chat
+from app.services.context_cache import context_cache
+from app.services.warm_cache import cache_snapshots
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await loop_monitor.start()
+    await memory.start()
+    await cache_snapshots.start()
+    try:
+        yield
+    finally:
+        await loop_monitor.stop()
+        await memory.stop()
+        await cache_snapshots.stop()
+        await context_cache.close()
+        stop_logging()
+
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -25,14 +51,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+# Added last so they wrap every other middleware: the request id outermost, then the request span.
+app.add_middleware(TracingMiddleware, tracer=tracer)
+app.add_middleware(RequestContextMiddleware)
 
 # Routers
 app.include_router(chat.router, prefix="/api/v1/rag", tags=["rag"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["admin"])
 
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "env": settings.ENV}
 
+@app.get("/metrics")
+def get_metrics():
+    return metrics.snapshot()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=settings.PORT, reload=True)
@@ -39,6 +39,8 @@ class ChatResponse(BaseModel):
 
 class RagRetrieveRequest(BaseModel):
     query: str
+    # Metadata filters, e.g. {"doc_type": "policy", "region": ["US", "CA"]}; honoured by the local index.
+    filters: Optional[Dict[str, Any]] = None
 
 class RagRetrieveResponse(BaseModel):
     contexts: List[str] = Field(default_factory=list)
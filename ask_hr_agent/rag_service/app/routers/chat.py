@@ -22,7 +22,7 @@ async def rag_query(message: RagQuery):
 @router.post("/retrieve", response_model=RagRetrieveResponse)
 async def retrieve_context(request: RagRetrieveRequest):
     try:
-        result = await rag_service.rag_retrieve(request.query)
+        result = await rag_service.retrieve(request.query, request.filters)
         contexts = result.get("contexts") or []
         if isinstance(contexts, dict):
             contexts = list(contexts.values())
@@ -0,0 +1,176 @@
+"""BM25 inverted index over the chunks of a local index directory.
+
+Exact policy terms ("FMLA", "COBRA", "jury duty") score well here even when
+embeddings rank them poorly. The index is array-backed and sits next to the
+vector index files:
+
+- ``bm25.json``: chunk count, average chunk length, vocabulary size.
+- ``bm25_vocab.txt``: one term per line; line number is the term id.
+- ``bm25_offsets.npy``: postings of term ``t`` are ``[offsets[t], offsets[t + 1])``.
+- ``bm25_docs.npy`` / ``bm25_tfs.npy``: posting rows (int32) and term frequencies (uint16).
+- ``bm25_lengths.npy``: tokens per chunk.
+
+Build it after the vector index (it reads that directory's chunks)::
+
+    python -m app.services.bm25 build --index index
+"""
+import argparse
+import json
+import logging
+import re
+import time
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.vector_index import ChunkTable, top_k_rows
+
+logger = logging.getLogger(__name__)
+
+BM25_FORMAT = 1
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "what", "when", "where", "which",
+    "who", "how", "i", "me", "my", "we", "our", "you", "your", "can", "to", "of", "for", "in", "on", "at",
+    "and", "or", "it", "its", "this", "that", "there", "with", "will", "would", "should", "by", "as", "from",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall((text or "").lower()) if token not in _STOPWORDS]
+
+
+class Bm25Index:
+    """Okapi BM25 scoring straight off the posting arrays (memory-mapped)."""
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75, table: Optional[ChunkTable] = None):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.table = table or ChunkTable(path)
+        self.corpus_version = self.table.corpus_version
+        manifest = json.loads((self.path / "bm25.json").read_text(encoding="utf-8"))
+        if manifest.get("format") != BM25_FORMAT:
+            raise ValueError(f"Unsupported BM25 format {manifest.get('format')!r} in {self.path}")
+        if manifest["count"] != len(self.table):
+            raise ValueError(f"{self.path}: BM25 built for {manifest['count']} chunks, index has {len(self.table)}")
+        with open(self.path / "bm25_vocab.txt", "r", encoding="utf-8") as handle:
+            self._vocab = {line.rstrip("\n"): term_id for term_id, line in enumerate(handle)}
+        self._offsets = np.load(self.path / "bm25_offsets.npy")
+        self._docs = np.load(self.path / "bm25_docs.npy", mmap_mode="r")
+        self._tfs = np.load(self.path / "bm25_tfs.npy", mmap_mode="r")
+        lengths = np.load(self.path / "bm25_lengths.npy").astype(np.float32)
+        # Per-chunk part of the BM25 denominator, fixed once k1 and b are.
+        self._norms = k1 * (1 - b + b * lengths / max(float(manifest["avg_len"]), 1.0))
+        self._count = len(self.table)
+        logger.info("Opened BM25 index %s: %d chunks, %d terms", self.path, self._count, len(self._vocab))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def search(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[Tuple[Dict[str, Any], float]]:
+        scores = np.zeros(self._count, dtype=np.float32)
+        matched = False
+        for term, query_tf in Counter(tokenize(query)).items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs = self._docs[start:end]
+            tfs = self._tfs[start:end].astype(np.float32)
+            df = end - start
+            idf = np.log1p((self._count - df + 0.5) / (df + 0.5))
+            # Postings hold each row once per term, so fancy-index += is safe.
+            scores[docs] += query_tf * idf * tfs * (self.k1 + 1) / (tfs + self._norms[docs])
+            matched = True
+        if not matched:
+            return []
+
+        rows = self.table.filter_rows(filters)
+        if rows is not None:
+            if rows.size == 0:
+                return []
+            scores = scores[rows]
+        hits = top_k_rows(scores, rows, top_k)
+        return [(self.table.chunk(row), score) for row, score in hits if score > 0]
+
+
+def build_bm25(index_dir: str) -> Dict[str, Any]:
+    """Tokenise every chunk of an index directory into the posting arrays."""
+    out = Path(index_dir)
+    started = time.perf_counter()
+    table = ChunkTable(index_dir)
+    vocab: Dict[str, int] = {}
+    term_docs: List[array] = []
+    term_tfs: List[array] = []
+    lengths = array("i")
+    for row in range(len(table)):
+        tokens = tokenize(table.text(row))
+        lengths.append(len(tokens))
+        for term, tf in Counter(tokens).items():
+            term_id = vocab.get(term)
+            if term_id is None:
+                term_id = vocab[term] = len(vocab)
+                term_docs.append(array("i"))
+                term_tfs.append(array("H"))
+            term_docs[term_id].append(row)
+            term_tfs[term_id].append(min(tf, 65535))
+
+    terms = sorted(vocab)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(term_docs[vocab[term]]) for term in terms])
+    docs = np.empty(int(offsets[-1]), dtype=np.int32)
+    tfs = np.empty(int(offsets[-1]), dtype=np.uint16)
+    for term_id, term in enumerate(terms):
+        docs[offsets[term_id]:offsets[term_id + 1]] = term_docs[vocab[term]]
+        tfs[offsets[term_id]:offsets[term_id + 1]] = term_tfs[vocab[term]]
+
+    np.save(out / "bm25_offsets.npy", offsets)
+    np.save(out / "bm25_docs.npy", docs)
+    np.save(out / "bm25_tfs.npy", tfs)
+    np.save(out / "bm25_lengths.npy", np.asarray(lengths, dtype=np.int32))
+    with open(out / "bm25_vocab.txt", "w", encoding="utf-8") as handle:
+        handle.writelines(f"{term}\n" for term in terms)
+    manifest = {
+        "format": BM25_FORMAT,
+        "count": len(lengths),
+        "avg_len": round(sum(lengths) / max(len(lengths), 1), 3),
+        "terms": len(terms),
+        "postings": int(offsets[-1]),
+        "build_seconds": round(time.perf_counter() - started, 3),
+    }
+    (out / "bm25.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query the BM25 index of a local AskHR index directory.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    build = subcommands.add_parser("build", help="Build the posting arrays from the directory's chunks.")
+    build.add_argument("--index", required=True)
+
+    query = subcommands.add_parser("query", help="Run one query against the BM25 index.")
+    query.add_argument("--index", required=True)
+    query.add_argument("--top-k", type=int, default=3)
+    query.add_argument("text")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(json.dumps(build_bm25(args.index), indent=2))
+        return
+
+    index = Bm25Index(args.index)
+    started = time.perf_counter()
+    hits = index.search(args.text, args.top_k)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for chunk, score in hits:
+        print(f"{score:.4f}  {chunk.get('title')}  {chunk['text'][:100]!r}")
+    print(f"{len(hits)} hits in {elapsed_ms:.2f} ms over {len(index)} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""Incremental ingestion of an HR document library into the local index (``RETRIEVER_BACKEND=local|bm25|hybrid``).
+
+Reads ``.md``, ``.txt``, ``.docx`` and ``.pdf`` files (PDF needs ``pypdf``),
+splits them into overlapping chunks and writes a complete index directory:
+the memory-mapped chunk store, embeddings, the BM25 arrays, and
+``ingest_manifest.json``, which records every document's content hash and
+rows plus the corpus version::
+
+    python -m app.services.ingest run --source policies/ --out index
+    python -m app.services.ingest status --out index
+
+Re-runs only read and chunk documents whose size, mtime or content hash
+changed; unchanged documents are copied from the previous build, and any
+chunk whose text hash was seen before keeps its embedding. Documents stream
+through one at a time and embeddings are computed in batches, so memory
+stays bounded whatever the library size. The new index is written beside
+the old one and swapped in at the end; a running service notices the new
+``index.json`` and reloads (see ``LOCAL_INDEX_RELOAD_CHECK_SECONDS``).
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import zipfile
+from array import array
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+from xml.etree import ElementTree
+
+import numpy as np
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+from app.services.bm25 import build_bm25
+from app.services.vector_index import INDEX_FORMAT, ChunkTable, load_embedder, write_ivf
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FORMAT = 1
+MANIFEST_NAME = "ingest_manifest.json"
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_SPACES = re.compile(r"[ \t\r\f\v]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+
+class IngestSettings(BaseSettings):
+    """CLI defaults, read from the environment and ``.env`` like ``app.config``.
+
+    Kept apart from the service ``Settings`` so ingestion runs offline
+    without GOOGLE_PROJECT_ID / GOOGLE_LOCATION.
+    """
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    LOCAL_INDEX_DIR: str = str(Path(__file__).resolve().parents[2] / "index")
+    # Chunk sizes are in characters.
+    INGEST_CHUNK_SIZE: int = 1200
+    INGEST_CHUNK_OVERLAP: int = 200
+    INGEST_EMBEDDER: str = "hashing"
+
+
+def _read_text(path: Path) -> str:
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+def _read_docx(path: Path) -> str:
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    for paragraph in root.iter(f"{_WORD_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_WORD_NS}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{_WORD_NS}tab":
+                parts.append("\t")
+        paragraphs.append("".join(parts))
+    return "\n\n".join(paragraphs)
+
+
+def _read_pdf(path: Path) -> str:
+    try:
+        from pypdf import PdfReader  # type: ignore
+    except ImportError as exc:
+        raise RuntimeError("Reading PDFs needs `pip install pypdf`") from exc
+    return "\n\n".join(page.extract_text() or "" for page in PdfReader(str(path)).pages)
+
+
+_READERS = {
+    ".md": _read_text,
+    ".markdown": _read_text,
+    ".txt": _read_text,
+    ".docx": _read_docx,
+    ".pdf": _read_pdf,
+}
+
+
+def clean_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines, keeping paragraph breaks."""
+    lines = (_SPACES.sub(" ", line).strip() for line in text.replace("\r\n", "\n").split("\n"))
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+
+def chunk_text(text: str, size: int, overlap: int) -> Iterator[str]:
+    """Windows of at most ``size`` characters, each starting ``overlap`` characters before the previous end.
+
+    A window is cut at the last paragraph, sentence or word break in its
+    second half, so chunks rarely split words.
+    """
+    length = len(text)
+    start = 0
+    while start < length:
+        end = min(length, start + size)
+        if end < length:
+            for separator in ("\n\n", ". ", " "):
+                cut = text.rfind(separator, start + size // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            yield chunk
+        if end >= length:
+            break
+        next_start = max(end - overlap, start + 1)
+        if overlap:
+            # Start the overlap on a word boundary.
+            space = text.find(" ", next_start, end)
+            if space != -1:
+                next_start = space + 1
+        start = next_start
+
+
+def _title(path: Path, text: str) -> str:
+    if path.suffix.lower() in (".md", ".markdown"):
+        for line in text.split("\n", 50)[:50]:
+            if line.startswith("#"):
+                return line.lstrip("#").strip() or path.stem
+    return path.stem.replace("_", " ").replace("-", " ").strip() or path.name
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_manifest(out: Path) -> Optional[Dict[str, Any]]:
+    try:
+        manifest = json.loads((out / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    return manifest if manifest.get("format") == MANIFEST_FORMAT else None
+
+
+def _corpus_version(documents: Dict[str, Dict[str, Any]], chunk_size: int, overlap: int, embedder: str) -> str:
+    digest = hashlib.sha256(f"{chunk_size}:{overlap}:{embedder}".encode("utf-8"))
+    for name in sorted(documents):
+        digest.update(f"\n{name}\0{documents[name]['sha256']}".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+class _ChunkStoreWriter:
+    """Appends chunk texts to ``chunk_text.bin`` and their records to ``chunks.jsonl``."""
+
+    def __init__(self, out: Path):
+        self._text = open(out / "chunk_text.bin", "wb")
+        self._records = open(out / "chunks.jsonl", "w", encoding="utf-8")
+        self.offsets = array("q", [0])
+        # Row in the previous index whose embedding this row can reuse, or -1.
+        self.reuse = array("q")
+
+    def __len__(self) -> int:
+        return len(self.reuse)
+
+    def add(self, text: bytes, record: Dict[str, Any], reuse_row: int) -> None:
+        self._text.write(text)
+        self.offsets.append(self.offsets[-1] + len(text))
+        self._records.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.reuse.append(reuse_row)
+
+    def close(self, out: Path) -> None:
+        self._text.close()
+        self._records.close()
+        np.save(out / "chunk_offsets.npy", np.asarray(self.offsets, dtype=np.int64))
+
+
+def _open_previous(out: Path, manifest: Optional[Dict[str, Any]]) -> Tuple[Optional[ChunkTable], Optional[np.ndarray]]:
+    if manifest is None or not (out / "index.json").exists():
+        return None, None
+    try:
+        return ChunkTable(str(out)), np.load(out / "embeddings.npy", mmap_mode="r")
+    except Exception as exc:
+        logger.warning("Ignoring unreadable previous index in %s: %s", out, exc)
+        return None, None
+
+
+def ingest(
+    source_dir: str,
+    out_dir: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    embedder_spec: str,
+    ivf_lists: int = 0,
+    batch_size: int = 256,
+    url_prefix: str = "",
+    bm25: bool = True,
+) -> Dict[str, Any]:
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk overlap must be smaller than chunk size")
+    started = time.perf_counter()
+    source = Path(source_dir)
+    out = Path(out_dir)
+    embedder = load_embedder(embedder_spec)
+
+    previous = _load_manifest(out)
+    old_table, old_vectors = _open_previous(out, previous)
+    same_chunking = (
+        previous is not None
+        and old_table is not None
+        and previous.get("chunk_size") == chunk_size
+        and previous.get("chunk_overlap") == chunk_overlap
+    )
+    same_embedder = old_table is not None and old_table.manifest.get("embedder") == embedder.spec
+    known_documents = set(previous["documents"]) if previous else set()
+    old_documents: Dict[str, Dict[str, Any]] = previous["documents"] if same_chunking else {}
+    old_rows_by_hash: Dict[str, int] = {}
+    if same_embedder:
+        for row, record in enumerate(old_table.records):
+            if record.get("hash"):
+                old_rows_by_hash.setdefault(record["hash"], row)
+
+    staging = out.with_name(out.name + ".building")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    store = _ChunkStoreWriter(staging)
+    documents: Dict[str, Dict[str, Any]] = {}
+    stats = {"documents": 0, "unchanged": 0, "changed": 0, "added": 0, "removed": 0, "failed": 0,
+             "skipped": 0, "chunks": 0, "embedded": 0, "reused_embeddings": 0}
+
+    paths = sorted(path for path in source.rglob("*") if path.is_file())
+    for path in paths:
+        reader = _READERS.get(path.suffix.lower())
+        if reader is None:
+            stats["skipped"] += 1
+            continue
+        name = path.relative_to(source).as_posix()
+        stat = path.stat()
+        old = old_documents.get(name)
+        if old is not None and old["size"] == stat.st_size and old["mtime_ns"] == stat.st_mtime_ns:
+            sha = old["sha256"]
+        else:
+            sha = _file_sha256(path)
+
+        first_row = len(store)
+        if old is not None and old["sha256"] == sha:
+            # Unchanged: copy chunks and embeddings' rows from the previous build without reading the file.
+            for old_row in range(*old["rows"]):
+                store.add(old_table.text_bytes(old_row), old_table.records[old_row], old_row if same_embedder else -1)
+            title = old["title"]
+            stats["unchanged"] += 1
+        else:
+            try:
+                text = clean_text(reader(path))
+            except Exception as exc:
+                logger.error("Could not read %s: %s", name, exc)
+                stats["failed"] += 1
+                continue
+            title = _title(path, text)
+            folder = name.split("/", 1)[0] if "/" in name else ""
+            for index, chunk in enumerate(chunk_text(text, chunk_size, chunk_overlap)):
+                encoded = chunk.encode("utf-8")
+                chunk_hash = hashlib.sha256(encoded).hexdigest()[:32]
+                record = {
+                    "id": f"{name}#{index}",
+                    "hash": chunk_hash,
+                    "title": title,
+                    "url": f"{url_prefix}{name}" if url_prefix else name,
+                    "metadata": {"source": name, "folder": folder, "format": path.suffix.lower().lstrip(".")},
+                }
+                store.add(encoded, record, old_rows_by_hash.get(chunk_hash, -1))
+            stats["changed" if name in known_documents else "added"] += 1
+        documents[name] = {
+            "sha256": sha,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "title": title,
+            "rows": [first_row, len(store)],
+        }
+        stats["documents"] += 1
+    store.close(staging)
+    stats["removed"] = len(known_documents - set(documents))
+
+    count = len(store)
+    if count == 0:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise ValueError(f"No chunks produced from {source}")
+    stats["chunks"] = count
+
+    # Embeddings: reuse rows of unchanged chunks, embed the rest in batches read back from the new store.
+    new_table_texts = np.memmap(staging / "chunk_text.bin", dtype=np.uint8, mode="r")
+    offsets = np.asarray(store.offsets, dtype=np.int64)
+    reuse = np.asarray(store.reuse, dtype=np.int64)
+    vectors = np.lib.format.open_memmap(staging / "embeddings.npy", mode="w+", dtype=np.float32, shape=(count, embedder.dim))
+    for start in range(0, count, batch_size):
+        end = min(count, start + batch_size)
+        batch_reuse = reuse[start:end]
+        reused = batch_reuse >= 0
+        if reused.any():
+            vectors[start:end][reused] = old_vectors[batch_reuse[reused]]
+        fresh = np.flatnonzero(~reused) + start
+        if fresh.size:
+            texts = [new_table_texts[offsets[row]:offsets[row + 1]].tobytes().decode("utf-8") for row in fresh]
+            vectors[fresh] = embedder.embed(texts)
+        stats["reused_embeddings"] += int(reused.sum())
+        stats["embedded"] += int(fresh.size)
+    vectors.flush()
+    if ivf_lists:
+        write_ivf(staging, vectors, min(ivf_lists, count))
+    del vectors, new_table_texts
+
+    corpus_version = _corpus_version(documents, chunk_size, chunk_overlap, embedder.spec)
+    built_at = datetime.now(timezone.utc).isoformat()
+    index_manifest = {
+        "format": INDEX_FORMAT,
+        "embedder": embedder.spec,
+        "dim": embedder.dim,
+        "count": count,
+        "ivf_lists": min(ivf_lists, count),
+        "corpus_version": corpus_version,
+        "built_at": built_at,
+    }
+    (staging / "index.json").write_text(json.dumps(index_manifest, indent=2), encoding="utf-8")
+    if bm25:
+        build_bm25(str(staging))
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "corpus_version": corpus_version,
+        "previous_corpus_version": (previous or {}).get("corpus_version"),
+        "built_at": built_at,
+        "source": str(source.resolve()),
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "embedder": embedder.spec,
+        "stats": stats,
+        "documents": documents,
+    }
+    (staging / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    # Swap the finished build in. Services holding the old files memory-mapped keep reading them until they reload.
+    del old_table, old_vectors
+    retired = out.with_name(out.name + ".old")
+    shutil.rmtree(retired, ignore_errors=True)
+    if out.exists():
+        os.replace(out, retired)
+    os.replace(staging, out)
+    shutil.rmtree(retired, ignore_errors=True)
+    return manifest
+
+
+def main() -> None:
+    settings = IngestSettings()
+    parser = argparse.ArgumentParser(description="Ingest HR documents into the local AskHR index.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    run = subcommands.add_parser("run", help="Ingest a document directory, reprocessing only what changed.")
+    run.add_argument("--source", required=True, help="Directory of .md, .txt, .docx and .pdf files.")
+    run.add_argument("--out", default=settings.LOCAL_INDEX_DIR)
+    run.add_argument("--chunk-size", type=int, default=settings.INGEST_CHUNK_SIZE, help="Characters per chunk.")
+    run.add_argument("--chunk-overlap", type=int, default=settings.INGEST_CHUNK_OVERLAP)
+    run.add_argument("--embedder", default=settings.INGEST_EMBEDDER, help="hashing[:dim] or sentence-transformers[:model].")
+    run.add_argument("--ivf-lists", type=int, default=0)
+    run.add_argument("--batch-size", type=int, default=256)
+    run.add_argument("--url-prefix", default="", help="Prepended to each document's relative path for citations.")
+    run.add_argument("--no-bm25", action="store_true")
+
+    status = subcommands.add_parser("status", help="Show the manifest of an ingested index.")
+    status.add_argument("--out", default=settings.LOCAL_INDEX_DIR)
+    args = parser.parse_args()
+
+    if args.command == "status":
+        manifest = _load_manifest(Path(args.out))
+        if manifest is None:
+            raise SystemExit(f"No ingest manifest in {args.out}")
+        manifest = {key: value for key, value in manifest.items() if key != "documents"}
+        print(json.dumps(manifest, indent=2))
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    manifest = ingest(
+        args.source,
+        args.out,
+        args.chunk_size,
+        args.chunk_overlap,
+        args.embedder,
+        ivf_lists=args.ivf_lists,
+        batch_size=args.batch_size,
+        url_prefix=args.url_prefix,
+        bm25=not args.no_bm25,
+    )
+    print(json.dumps({"corpus_version": manifest["corpus_version"], **manifest["stats"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
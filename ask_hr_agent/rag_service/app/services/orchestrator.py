@@ -1,20 +1,35 @@
-from typing import Dict, List, Optional
-import asyncio
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
 import logging
 import os
 
 from google.adk.agents import LlmAgent
-from google.adk.dependencies import vertexai as adk_vertexai
 from google.adk.models import Gemini
+from google.adk.planners import BuiltInPlanner
 from google.adk.runners import InMemoryRunner
 from google.genai import types
 
 from app.config import settings
+from app.memory import register_adk_runners
+from app.metrics import metrics
 from app.models.dto import ChatResponse, Citation
+from app.services.context_cache import context_cache
+from app.services.retrieval import build_reloading_retriever
+from app.services.token_usage import token_usage, usage_from_event
+from app.services.warm_cache import TTLCache, cache_snapshots
+from app.tracing import tracer
 
 
 logger = logging.getLogger(__name__)
 
+retrieval_cache = cache_snapshots.register(TTLCache(
+    "retrieval",
+    settings.RETRIEVAL_CACHE_MAX_ENTRIES,
+    settings.RETRIEVAL_CACHE_TTL_SECONDS,
+    corpus_version=settings.RAG_CORPUS_VERSION,
+))
+
 SYSTEM_INSTRUCTION = """You are the AskHR agent for Michaels.
 
 Always call rag_retrieve first.
@@ -25,67 +40,86 @@ If no context is returned, say you cannot find the information in the provided d
 
 class RagAgent:
     def __init__(self):
-        self._vertex_initialized = False
         self._ensure_vertex_env()
+        self._retriever = build_reloading_retriever(on_reload=self._on_corpus_reload)
         self._agent = self._build_agent()
         self._runner = InMemoryRunner(self._agent, app_name="ask_hr_rag")
+        register_adk_runners("adk_sessions.rag", lambda: [self._runner])
+
+    @staticmethod
+    def _on_corpus_reload(corpus_version: str) -> None:
+        # Keys embed the corpus, so old entries could never hit again; drop them now and rebind the snapshot.
+        dropped = retrieval_cache.clear(corpus_version)
+        logger.info("Corpus changed to %s; dropped %d cached retrievals", corpus_version, dropped)
 
     def _ensure_vertex_env(self) -> None:
         os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "true")
         os.environ.setdefault("GOOGLE_CLOUD_PROJECT", settings.GOOGLE_PROJECT_ID)
         os.environ.setdefault("GOOGLE_CLOUD_LOCATION", settings.GOOGLE_LOCATION)
 
-    def _ensure_vertex_init(self) -> None:
-        if self._vertex_initialized:
-            return
-        adk_vertexai.vertexai.init(
-            project=settings.GOOGLE_PROJECT_ID,
-            location=settings.GOOGLE_LOCATION,
-            api_transport="rest",
-        )
-        self._vertex_initialized = True
-
     def _build_agent(self) -> LlmAgent:
         model_name = settings.ASKHR_RAG_MODEL
+        config_kwargs = {"temperature": settings.ASKHR_RAG_TEMPERATURE}
+        if settings.ASKHR_RAG_MAX_OUTPUT_TOKENS:
+            config_kwargs["max_output_tokens"] = settings.ASKHR_RAG_MAX_OUTPUT_TOKENS
+        planner = None
+        if settings.ASKHR_RAG_THINKING_BUDGET is not None:
+            # ADK only accepts thinking config through a planner.
+            planner = BuiltInPlanner(
+                thinking_config=types.ThinkingConfig(thinking_budget=settings.ASKHR_RAG_THINKING_BUDGET)
+            )
         return LlmAgent(
             name="ask_hr_rag",
             model=Gemini(model=model_name),
             instruction=SYSTEM_INSTRUCTION,
             tools=[self.rag_retrieve],
-            generate_content_config=types.GenerateContentConfig(temperature=0.2),
+            planner=planner,
+            generate_content_config=types.GenerateContentConfig(**config_kwargs),
+            before_model_callback=context_cache.before_model_callback(),
         )
 
     async def rag_retrieve(self, query: str) -> Dict[str, List[Dict]]:
-        """Retrieve policy/benefits context from Vertex AI RAG."""
-        self._ensure_vertex_init()
-
-        def _query():
-            return adk_vertexai.rag.retrieval_query(
-                text=query,
-                rag_corpora=[settings.RAG_CORPUS_NAME],
-                similarity_top_k=3,
-            )
+        """Retrieve policy/benefits context from the HR document corpus."""
+        return await self.retrieve(query)
+
+    async def retrieve(self, query: str, filters: Optional[Dict[str, Any]] = None) -> Dict[str, List[Dict]]:
+        """``rag_retrieve`` with optional metadata filters (local index only)."""
+        top_k = settings.RETRIEVAL_TOP_K
+        cache_key = self._retrieval_cache_key(query, top_k, filters)
+        cached = retrieval_cache.get(cache_key) if settings.RETRIEVAL_CACHE_ENABLED else None
+        if cached is not None:
+            if not cached["contexts"]:
+                metrics.incr("retrieval_cache_negative_hits_total")
+            return {"contexts": list(cached["contexts"]), "citations": list(cached["citations"])}
 
         try:
-            response = await asyncio.to_thread(_query)
+            chunks = await self._retriever.retrieve(query, top_k, filters)
         except Exception as exc:
             logger.error("RAG retrieval failed: %s", exc)
             return {"contexts": [], "citations": []}
 
         contexts: List[str] = []
         citations: List[Dict] = []
-        if response and response.contexts and response.contexts.contexts:
-            for context in response.contexts.contexts:
-                snippet = getattr(context, "text", None)
-                contexts.append(snippet or "")
-                citations.append({
-                    "title": getattr(context, "source_display_name", None) or "Document",
-                    "url": getattr(context, "source_uri", None),
-                    "snippet": snippet,
-                    "confidence": getattr(context, "score", None),
-                })
-
-        return {"contexts": contexts, "citations": citations}
+        for chunk in chunks:
+            contexts.append(chunk.text)
+            citations.append({
+                "title": chunk.title,
+                "url": chunk.url,
+                "snippet": chunk.text,
+                "confidence": chunk.score,
+            })
+
+        if settings.RETRIEVAL_CACHE_ENABLED:
+            # Failed retrievals return above and are never cached; empty results expire sooner.
+            ttl = None if contexts else settings.RETRIEVAL_CACHE_NEGATIVE_TTL_SECONDS
+            retrieval_cache.set(cache_key, {"contexts": contexts, "citations": citations}, ttl_seconds=ttl)
+        return {"contexts": list(contexts), "citations": list(citations)}
+
+    def _retrieval_cache_key(self, query: str, top_k: int, filters: Optional[Dict[str, Any]]) -> str:
+        normalized = " ".join(query.lower().split())
+        filter_key = json.dumps(filters or {}, sort_keys=True, default=str)
+        payload = f"{self._retriever.corpus}\n{top_k}\n{filter_key}\n{normalized}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
     async def answer(self, query: str, user_id: str, session_id: str) -> ChatResponse:
         safe_user_id = user_id or "anonymous"
@@ -97,30 +131,37 @@ class RagAgent:
 
         reply_text = ""
         citations: List[Citation] = []
-        metadata: Dict[str, str] = {"agent": "rag"}
+        metadata: Dict[str, Any] = {"agent": "rag"}
 
-        async for event in self._runner.run_async(
-            user_id=safe_user_id,
-            session_id=session_id,
-            new_message=content,
-        ):
-            for function_response in event.get_function_responses():
-                tool_name = function_response.name or ""
-                payload = function_response.response or {}
-                if isinstance(payload, dict) and "output" in payload and isinstance(payload["output"], dict):
-                    payload = payload["output"]
-
-                if tool_name == "rag_retrieve":
-                    citations = self._parse_citations(payload)
-
-            if event.is_final_response():
-                reply_text = self._extract_text(event.content) or reply_text
-                if event.error_message:
-                    reply_text = event.error_message
+        token_usage.begin_turn()
+        # The agent span covers both model calls and the rag_retrieve tool call between them.
+        with tracer.span("agent.rag", model=settings.ASKHR_RAG_MODEL):
+            async for event in self._runner.run_async(
+                user_id=safe_user_id,
+                session_id=session_id,
+                new_message=content,
+            ):
+                # One event per model call (tool call, then answer), each recorded with its own usage.
+                token_usage.record("rag", settings.ASKHR_RAG_MODEL, safe_user_id, usage_from_event(event))
+                for function_response in event.get_function_responses():
+                    tool_name = function_response.name or ""
+                    payload = function_response.response or {}
+                    if isinstance(payload, dict) and "output" in payload and isinstance(payload["output"], dict):
+                        payload = payload["output"]
+
+                    if tool_name == "rag_retrieve":
+                        citations = self._parse_citations(payload)
+
+                if event.is_final_response():
+                    reply_text = self._extract_text(event.content) or reply_text
+                    if event.error_message:
+                        reply_text = event.error_message
 
         if not reply_text:
             reply_text = "I couldn't generate a response. Please try again."
 
+        if settings.DEBUG_METADATA:
+            metadata["usage"] = token_usage.turn_usage()
         return ChatResponse(reply_text=reply_text, citations=citations, metadata=metadata)
 
     async def _ensure_session(self, user_id: str, session_id: str) -> None:
@@ -0,0 +1,259 @@
+"""Retrieval backends behind ``RagAgent.rag_retrieve``.
+
+``RETRIEVER_BACKEND`` picks ``vertex`` (Vertex AI RAG over
+``RAG_CORPUS_NAME``), ``local`` (the memory-mapped vector index in
+``LOCAL_INDEX_DIR``, built offline with ``python -m app.services.vector_index build``),
+``bm25`` (the lexical index beside it, ``python -m app.services.bm25 build``) or
+``hybrid`` (``HYBRID_RETRIEVERS`` fused by reciprocal rank). Local indexes
+are usually written by ``python -m app.services.ingest run``; a running
+service picks up a re-ingested index within ``LOCAL_INDEX_RELOAD_CHECK_SECONDS``.
+"""
+import abc
+import asyncio
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.dependencies import vertexai as adk_vertexai
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.metrics import metrics
+from app.services.bm25 import Bm25Index
+from app.services.vector_index import ChunkTable, LocalVectorIndex
+from app.tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievedChunk(BaseModel):
+    text: str
+    title: str = "Document"
+    url: Optional[str] = None
+    score: Optional[float] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
+
+
+class Retriever(abc.ABC):
+    """Returns the ``top_k`` chunks for a query, best first.
+
+    ``corpus`` names what is searched and is part of the retrieval cache key.
+    ``filters`` maps a metadata key to a value or a list of accepted values.
+    """
+
+    name = "base"
+    corpus = ""
+
+    @abc.abstractmethod
+    async def retrieve(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[RetrievedChunk]:
+        ...
+
+
+class VertexRetriever(Retriever):
+    name = "vertex"
+
+    def __init__(self):
+        self.corpus = settings.RAG_CORPUS_NAME
+        self._vertex_initialized = False
+
+    def _ensure_vertex_init(self) -> None:
+        if self._vertex_initialized:
+            return
+        adk_vertexai.vertexai.init(
+            project=settings.GOOGLE_PROJECT_ID,
+            location=settings.GOOGLE_LOCATION,
+            api_transport="rest",
+        )
+        self._vertex_initialized = True
+
+    async def retrieve(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[RetrievedChunk]:
+        if filters:
+            logger.debug("Vertex retriever ignores metadata filters: %s", filters)
+        self._ensure_vertex_init()
+
+        def _query():
+            return adk_vertexai.rag.retrieval_query(
+                text=query,
+                rag_corpora=[self.corpus],
+                similarity_top_k=top_k,
+            )
+
+        with tracer.span("retrieval.vertex", top_k=top_k) as span:
+            response = await asyncio.to_thread(_query)
+            span.set(results=len(response.contexts.contexts) if response and response.contexts else 0)
+
+        chunks: List[RetrievedChunk] = []
+        if response and response.contexts and response.contexts.contexts:
+            for context in response.contexts.contexts:
+                chunks.append(RetrievedChunk(
+                    text=getattr(context, "text", None) or "",
+                    title=getattr(context, "source_display_name", None) or "Document",
+                    url=getattr(context, "source_uri", None),
+                    score=getattr(context, "score", None),
+                ))
+        return chunks
+
+
+class LocalRetriever(Retriever):
+    """Searches an index under ``LOCAL_INDEX_DIR``: ``local`` (vectors) or ``bm25``; arrays are memory-mapped."""
+
+    def __init__(self, name: str, index: Any):
+        self.name = name
+        self._index = index
+        self.corpus = f"{name}:{index.path}:{index.corpus_version}"
+
+    async def retrieve(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[RetrievedChunk]:
+        with tracer.span(f"retrieval.{self.name}", top_k=top_k) as span:
+            # Embedding the query can be slow (model embedders); the array maths releases the GIL.
+            hits = await asyncio.to_thread(self._index.search, query, top_k, filters)
+            span.set(results=len(hits))
+        return [
+            RetrievedChunk(
+                text=chunk.get("text") or "",
+                title=chunk.get("title") or "Document",
+                url=chunk.get("url"),
+                score=score,
+                metadata=chunk.get("metadata") or {},
+            )
+            for chunk, score in hits
+        ]
+
+
+class HybridRetriever(Retriever):
+    """Reciprocal-rank fusion of several retrievers, queried concurrently.
+
+    Each retriever returns ``candidates`` chunks; a chunk scores
+    ``sum(1 / (rrf_k + rank))`` over the lists it appears in. A retriever
+    that fails is left out; if all fail, the first error is raised.
+    """
+
+    name = "hybrid"
+
+    def __init__(self, retrievers: List[Retriever], rrf_k: int = 60, candidates: int = 20):
+        self.retrievers = retrievers
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.corpus = "hybrid:" + "+".join(retriever.corpus for retriever in retrievers)
+
+    async def retrieve(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[RetrievedChunk]:
+        depth = max(top_k, self.candidates)
+        with tracer.span("retrieval.hybrid", top_k=top_k, retrievers=",".join(r.name for r in self.retrievers)) as span:
+            results = await asyncio.gather(
+                *(retriever.retrieve(query, depth, filters) for retriever in self.retrievers),
+                return_exceptions=True,
+            )
+            fused: Dict[str, List[Any]] = {}
+            errors: List[BaseException] = []
+            for retriever, result in zip(self.retrievers, results):
+                if isinstance(result, BaseException):
+                    logger.warning("Hybrid retrieval: %s failed: %s", retriever.name, result)
+                    errors.append(result)
+                    continue
+                for rank, chunk in enumerate(result, start=1):
+                    entry = fused.setdefault(chunk.text, [chunk, 0.0])
+                    entry[1] += 1.0 / (self.rrf_k + rank)
+            if len(errors) == len(self.retrievers):
+                raise errors[0]
+            span.set(results=len(fused), failed=len(errors))
+
+        ranked = sorted(fused.values(), key=lambda entry: entry[1], reverse=True)[:top_k]
+        return [chunk.model_copy(update={"score": round(score, 6)}) for chunk, score in ranked]
+
+
+@lru_cache(maxsize=None)
+def _chunk_table(index_dir: str) -> ChunkTable:
+    return ChunkTable(index_dir)
+
+
+def _local_index(name: str) -> Any:
+    table = _chunk_table(settings.LOCAL_INDEX_DIR)
+    if name == "bm25":
+        return Bm25Index(settings.LOCAL_INDEX_DIR, k1=settings.BM25_K1, b=settings.BM25_B, table=table)
+    return LocalVectorIndex(settings.LOCAL_INDEX_DIR, nprobe=settings.LOCAL_INDEX_NPROBE, table=table)
+
+
+def _index_stamp() -> Optional[Tuple[int, int]]:
+    # Ingestion swaps in a new directory, so index.json gets a new inode even if mtimes collide.
+    try:
+        stat = os.stat(os.path.join(settings.LOCAL_INDEX_DIR, "index.json"))
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class ReloadingRetriever(Retriever):
+    """A local-index retriever that is rebuilt when ``LOCAL_INDEX_DIR`` is re-ingested.
+
+    ``index.json`` is checked at most every ``check_seconds``. On change the
+    retriever is rebuilt off the event loop and ``on_reload`` is called with
+    the new corpus version; if the rebuild fails the old index keeps serving.
+    """
+
+    def __init__(self, backend: str, check_seconds: float, on_reload: Optional[Callable[[str], None]] = None):
+        self.name = backend
+        self._backend = backend
+        self._check_seconds = check_seconds
+        self._on_reload = on_reload
+        self._stamp = _index_stamp()
+        self._retriever = build_retriever(backend)
+        self._checked_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def corpus(self) -> str:
+        return self._retriever.corpus
+
+    async def retrieve(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[RetrievedChunk]:
+        if time.monotonic() - self._checked_at >= self._check_seconds:
+            await self._reload_if_changed()
+        return await self._retriever.retrieve(query, top_k, filters)
+
+    def _rebuild(self) -> Tuple[Retriever, str]:
+        _chunk_table.cache_clear()
+        retriever = build_retriever(self._backend)
+        return retriever, _chunk_table(settings.LOCAL_INDEX_DIR).corpus_version
+
+    async def _reload_if_changed(self) -> None:
+        async with self._lock:
+            if time.monotonic() - self._checked_at < self._check_seconds:
+                return
+            self._checked_at = time.monotonic()
+            stamp = await asyncio.to_thread(_index_stamp)
+            if stamp == self._stamp or stamp is None:
+                return
+            try:
+                retriever, corpus_version = await asyncio.to_thread(self._rebuild)
+            except Exception as exc:
+                # Probably caught mid-swap; the next check retries.
+                logger.error("Reloading the local index in %s failed, keeping the old one: %s", settings.LOCAL_INDEX_DIR, exc)
+                metrics.incr("local_index_reloads_total", outcome="error")
+                return
+            self._retriever, self._stamp = retriever, stamp
+            metrics.incr("local_index_reloads_total", outcome="ok")
+            logger.info("Reloaded local index %s at corpus version %s", settings.LOCAL_INDEX_DIR, corpus_version)
+        if self._on_reload is not None:
+            self._on_reload(corpus_version)
+
+
+def build_retriever(backend: Optional[str] = None) -> Retriever:
+    backend = (backend or settings.RETRIEVER_BACKEND).strip()
+    if backend == "hybrid":
+        names = [name.strip() for name in settings.HYBRID_RETRIEVERS.split(",") if name.strip()]
+        return HybridRetriever(
+            [build_retriever(name) for name in names],
+            rrf_k=settings.HYBRID_RRF_K,
+            candidates=settings.HYBRID_CANDIDATES,
+        )
+    if backend in ("local", "bm25"):
+        return LocalRetriever(backend, _local_index(backend))
+    return VertexRetriever()
+
+
+def build_reloading_retriever(on_reload: Optional[Callable[[str], None]] = None) -> Retriever:
+    """``build_retriever()``, reloading local indexes when ``LOCAL_INDEX_RELOAD_CHECK_SECONDS`` > 0."""
+    backend = settings.RETRIEVER_BACKEND.strip()
+    if backend == "vertex" or settings.LOCAL_INDEX_RELOAD_CHECK_SECONDS <= 0:
+        return build_retriever(backend)
+    return ReloadingRetriever(backend, settings.LOCAL_INDEX_RELOAD_CHECK_SECONDS, on_reload)
@@ -0,0 +1,402 @@
+"""Local vector index for ``RETRIEVER_BACKEND=local``.
+
+An index directory holds:
+
+- ``index.json``: embedder spec, dimensions, row count, corpus version, IVF list count.
+- ``embeddings.npy``: one L2-normalised float32 row per chunk, memory-mapped at query time.
+- ``chunks.jsonl``: the chunk for each row (``text``, ``title``, ``url``, ``metadata``). Indexes
+  written by ``app.services.ingest`` keep the texts out of it, in the memory-mapped
+  ``chunk_text.bin`` (UTF-8, row ``i`` at ``[chunk_offsets[i], chunk_offsets[i + 1])``).
+- ``ivf_centroids.npy`` / ``ivf_order.npy`` / ``ivf_offsets.npy`` when built with ``--ivf-lists``.
+
+Build it offline from a JSONL file of chunks, then try a query::
+
+    python -m app.services.vector_index build --chunks chunks.jsonl --out index --embedder hashing:1024
+    python -m app.services.vector_index query --index index "how much pto do I get" --filter doc_type=policy
+"""
+import abc
+import argparse
+import json
+import logging
+import re
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 1
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class Embedder(abc.ABC):
+    """Maps texts to L2-normalised float32 vectors.
+
+    ``spec`` is stored in ``index.json`` so queries are embedded exactly as
+    the corpus was.
+    """
+
+    spec = ""
+    dim = 0
+
+    @abc.abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        ...
+
+
+class HashingEmbedder(Embedder):
+    """Dependency-free signed feature hashing of word unigrams and bigrams, log-scaled.
+
+    Lexical rather than semantic, but deterministic and fast enough to build
+    and query without a model.
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.spec = f"hashing:{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = _TOKEN.findall((text or "").lower())
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                hashed = zlib.crc32(feature.encode("utf-8"))
+                out[row, hashed % self.dim] += 1.0 if hashed & 0x80000000 else -1.0
+        np.copyto(out, np.sign(out) * np.log1p(np.abs(out)))
+        return _normalize(out)
+
+
+class SentenceTransformerEmbedder(Embedder):
+    """Local sentence-transformers model (optional dependency)."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+        try:
+            from sentence_transformers import SentenceTransformer  # type: ignore
+        except ImportError as exc:
+            raise RuntimeError("The sentence-transformers embedder needs `pip install sentence-transformers`") from exc
+        self._model = SentenceTransformer(model_name)
+        self.dim = int(self._model.get_sentence_embedding_dimension())
+        self.spec = f"sentence-transformers:{model_name}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self._model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+
+_EMBEDDERS: Dict[str, Callable[..., Embedder]] = {
+    "hashing": lambda arg=None: HashingEmbedder(int(arg)) if arg else HashingEmbedder(),
+    "sentence-transformers": lambda arg=None: SentenceTransformerEmbedder(arg) if arg else SentenceTransformerEmbedder(),
+}
+
+
+def register_embedder(name: str, factory: Callable[..., Embedder]) -> None:
+    """Make ``name`` / ``name:<arg>`` usable as an embedder spec; ``factory`` gets the optional arg."""
+    _EMBEDDERS[name] = factory
+
+
+def load_embedder(spec: str) -> Embedder:
+    name, _, arg = spec.partition(":")
+    factory = _EMBEDDERS.get(name)
+    if factory is None:
+        raise ValueError(f"Unknown embedder {name!r}; known: {sorted(_EMBEDDERS)}")
+    return factory(arg) if arg else factory()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    vectors /= norms
+    return vectors
+
+
+class ChunkTable:
+    """The chunks of an index directory, with per-(key, value) metadata postings for filtering.
+
+    List-valued metadata matches any of its items. Texts stay on disk when
+    the directory has a chunk store. Shared by every local retriever over
+    the same directory.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        manifest = json.loads((self.path / "index.json").read_text(encoding="utf-8"))
+        if manifest.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported index format {manifest.get('format')!r} in {self.path}")
+        self.manifest = manifest
+        self.corpus_version = manifest.get("corpus_version") or ""
+        with open(self.path / "chunks.jsonl", "r", encoding="utf-8") as handle:
+            self.records = [json.loads(line) for line in handle if line.strip()]
+
+        self._text: Optional[np.ndarray] = None
+        if (self.path / "chunk_offsets.npy").exists():
+            self._text_offsets = np.load(self.path / "chunk_offsets.npy")
+            if self._text_offsets[-1] > 0:
+                self._text = np.memmap(self.path / "chunk_text.bin", dtype=np.uint8, mode="r")
+
+        postings: Dict[Tuple[str, str], List[int]] = {}
+        for row, record in enumerate(self.records):
+            for key, value in (record.get("metadata") or {}).items():
+                for item in value if isinstance(value, list) else [value]:
+                    postings.setdefault((key, str(item)), []).append(row)
+        self._postings = {key: np.asarray(rows, dtype=np.int64) for key, rows in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def text(self, row: int) -> str:
+        record = self.records[row]
+        if "text" in record:
+            return record["text"]
+        return self.text_bytes(row).decode("utf-8")
+
+    def text_bytes(self, row: int) -> bytes:
+        if self._text is None:
+            return self.records[row].get("text", "").encode("utf-8")
+        return self._text[self._text_offsets[row]:self._text_offsets[row + 1]].tobytes()
+
+    def chunk(self, row: int) -> Dict[str, Any]:
+        record = self.records[row]
+        return record if "text" in record else {**record, "text": self.text(row)}
+
+    def filter_rows(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Sorted rows matching every filter key (any listed value), or None for no filter."""
+        if not filters:
+            return None
+        rows: Optional[np.ndarray] = None
+        for key, wanted in filters.items():
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            matched = [self._postings[(key, str(value))] for value in values if (key, str(value)) in self._postings]
+            if len(matched) == 1:
+                key_rows = matched[0]
+            else:
+                key_rows = np.unique(np.concatenate(matched)) if matched else np.empty(0, dtype=np.int64)
+            rows = key_rows if rows is None else np.intersect1d(rows, key_rows, assume_unique=True)
+            if rows.size == 0:
+                break
+        return rows
+
+
+def top_k_rows(scores: np.ndarray, rows: Optional[np.ndarray], top_k: int) -> List[Tuple[int, float]]:
+    """Best ``top_k`` (row, score) pairs; ``scores[i]`` belongs to ``rows[i]`` (or row ``i`` when rows is None)."""
+    k = min(top_k, scores.shape[0])
+    if k <= 0:
+        return []
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best])]
+    picked = best if rows is None else rows[best]
+    return [(int(row), float(scores[i])) for row, i in zip(picked, best)]
+
+
+class LocalVectorIndex:
+    """Exact (or IVF-probed) cosine top-k over a memory-mapped embedding matrix.
+
+    With IVF lists, only the ``nprobe`` lists nearest the query are scored,
+    unless a metadata filter leaves fewer than ``top_k`` rows there, in which
+    case every filtered row is.
+    """
+
+    def __init__(self, path: str, nprobe: int = 8, table: Optional[ChunkTable] = None):
+        self.path = Path(path)
+        self.nprobe = nprobe
+        self.table = table or ChunkTable(path)
+        self.corpus_version = self.table.corpus_version
+        manifest = self.table.manifest
+        self.embedder = load_embedder(manifest["embedder"])
+        self.vectors = np.load(self.path / "embeddings.npy", mmap_mode="r")
+        if len(self.table) != self.vectors.shape[0]:
+            raise ValueError(f"{self.path}: {len(self.table)} chunks but {self.vectors.shape[0]} embeddings")
+
+        self._centroids: Optional[np.ndarray] = None
+        if manifest.get("ivf_lists"):
+            self._centroids = np.load(self.path / "ivf_centroids.npy")
+            self._order = np.load(self.path / "ivf_order.npy", mmap_mode="r")
+            self._offsets = np.load(self.path / "ivf_offsets.npy")
+        logger.info("Opened vector index %s: %d chunks, %s", self.path, len(self.table), manifest["embedder"])
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def search(self, query: str, top_k: int, filters: Optional[Dict[str, Any]] = None) -> List[Tuple[Dict[str, Any], float]]:
+        query_vector = self.embedder.embed([query])[0]
+        filtered = self.table.filter_rows(filters)
+        candidates = filtered
+        if self._centroids is not None:
+            probed = self._probe(query_vector)
+            candidates = probed if filtered is None else np.intersect1d(probed, filtered, assume_unique=True)
+            if filtered is not None and candidates.size < top_k:
+                candidates = filtered
+
+        if candidates is None:
+            hits = top_k_rows(self.vectors @ query_vector, None, top_k)
+        elif candidates.size == 0:
+            return []
+        else:
+            rows = np.sort(candidates)
+            hits = top_k_rows(self.vectors[rows] @ query_vector, rows, top_k)
+        return [(self.table.chunk(row), score) for row, score in hits]
+
+    def _probe(self, query_vector: np.ndarray) -> np.ndarray:
+        nprobe = min(self.nprobe, self._centroids.shape[0])
+        lists = np.argpartition(-(self._centroids @ query_vector), nprobe - 1)[:nprobe]
+        return np.sort(np.concatenate([self._order[self._offsets[i]:self._offsets[i + 1]] for i in lists]))
+
+
+def _iter_chunks(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                chunk = json.loads(line)
+                if chunk.get("text"):
+                    yield chunk
+
+
+def _batches(chunks: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _train_ivf(vectors: np.ndarray, lists: int, iterations: int = 10, sample: int = 100_000, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of rows; returns unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    count = vectors.shape[0]
+    picked = np.sort(rng.choice(count, size=min(count, sample), replace=False))
+    train = np.asarray(vectors[picked], dtype=np.float32)
+    centroids = train[rng.choice(train.shape[0], size=lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(train @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, train)
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+    return centroids
+
+
+def write_ivf(out: Path, vectors: np.ndarray, ivf_lists: int) -> None:
+    """Train the coarse quantiser and write each list's rows, grouped, next to ``embeddings.npy``."""
+    count = vectors.shape[0]
+    centroids = _train_ivf(vectors, ivf_lists)
+    assign = np.empty(count, dtype=np.int32)
+    for start in range(0, count, 65536):
+        assign[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+    order = np.argsort(assign, kind="stable").astype(np.int64)
+    offsets = np.searchsorted(assign[order], np.arange(ivf_lists + 1)).astype(np.int64)
+    np.save(out / "ivf_centroids.npy", centroids)
+    np.save(out / "ivf_order.npy", order)
+    np.save(out / "ivf_offsets.npy", offsets)
+
+
+def build_index(
+    chunks_path: str,
+    out_dir: str,
+    embedder_spec: str = "hashing",
+    ivf_lists: int = 0,
+    batch_size: int = 256,
+    corpus_version: str = "",
+) -> Dict[str, Any]:
+    """Embed every chunk in ``chunks_path`` (JSONL) into an index directory.
+
+    Chunks are streamed in batches straight into a memory-mapped
+    ``embeddings.npy``, so memory stays bounded by ``batch_size``.
+    """
+    embedder = load_embedder(embedder_spec)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    source = Path(chunks_path)
+    count = sum(1 for _ in _iter_chunks(source))
+    if count == 0:
+        raise ValueError(f"No chunks with text in {source}")
+    if ivf_lists > count:
+        raise ValueError(f"--ivf-lists {ivf_lists} exceeds the {count} chunks")
+
+    started = time.perf_counter()
+    vectors = np.lib.format.open_memmap(out / "embeddings.npy", mode="w+", dtype=np.float32, shape=(count, embedder.dim))
+    row = 0
+    with open(out / "chunks.jsonl", "w", encoding="utf-8") as chunk_out:
+        for batch in _batches(_iter_chunks(source), batch_size):
+            vectors[row:row + len(batch)] = embedder.embed([chunk["text"] for chunk in batch])
+            for chunk in batch:
+                record = {
+                    "id": chunk.get("id") or f"chunk-{row}",
+                    "text": chunk["text"],
+                    "title": chunk.get("title") or "Document",
+                    "url": chunk.get("url"),
+                    "metadata": chunk.get("metadata") or {},
+                }
+                chunk_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                row += 1
+    vectors.flush()
+
+    if ivf_lists:
+        write_ivf(out, vectors, ivf_lists)
+    del vectors
+
+    manifest = {
+        "format": INDEX_FORMAT,
+        "embedder": embedder.spec,
+        "dim": embedder.dim,
+        "count": count,
+        "ivf_lists": ivf_lists,
+        "corpus_version": corpus_version,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+        "build_seconds": round(time.perf_counter() - started, 3),
+    }
+    # Written last: a directory without index.json is an incomplete build.
+    (out / "index.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def _parse_filters(values: List[str]) -> Dict[str, List[str]]:
+    filters: Dict[str, List[str]] = {}
+    for value in values:
+        key, _, item = value.partition("=")
+        filters.setdefault(key, []).append(item)
+    return filters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build or query the local AskHR vector index.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+
+    build = subcommands.add_parser("build", help="Embed a JSONL file of chunks into an index directory.")
+    build.add_argument("--chunks", required=True, help="JSONL with text and optional id, title, url, metadata.")
+    build.add_argument("--out", required=True)
+    build.add_argument("--embedder", default="hashing", help="hashing[:dim] or sentence-transformers[:model].")
+    build.add_argument("--ivf-lists", type=int, default=0, help="Coarse quantiser lists; 0 for exact search.")
+    build.add_argument("--batch-size", type=int, default=256)
+    build.add_argument("--corpus-version", default="")
+
+    query = subcommands.add_parser("query", help="Run one query against an index.")
+    query.add_argument("--index", required=True)
+    query.add_argument("--top-k", type=int, default=3)
+    query.add_argument("--nprobe", type=int, default=8)
+    query.add_argument("--filter", action="append", default=[], help="key=value; repeat for more.")
+    query.add_argument("text")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        manifest = build_index(args.chunks, args.out, args.embedder, args.ivf_lists, args.batch_size, args.corpus_version)
+        print(json.dumps(manifest, indent=2))
+        return
+
+    index = LocalVectorIndex(args.index, nprobe=args.nprobe)
+    started = time.perf_counter()
+    hits = index.search(args.text, args.top_k, _parse_filters(args.filter))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for chunk, score in hits:
+        print(f"{score:.4f}  {chunk.get('title')}  {chunk['text'][:100]!r}")
+    print(f"{len(hits)} hits in {elapsed_ms:.2f} ms over {len(index)} chunks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.memory import memory
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+
+class TTLCache:
+    """LRU cache whose entries carry a wall-clock expiry.
+
+    Values must be JSON-serialisable so the cache can be snapshotted. A cache
+    created with a ``corpus_version`` is bound to that corpus: snapshot
+    entries built against another version are discarded on load.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float, corpus_version: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.corpus_version = corpus_version
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._entries.get(key)
+        if item is None:
+            metrics.incr("cache_misses_total", cache=self.name)
+            return None
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self._entries[key]
+            metrics.incr("cache_misses_total", cache=self.name)
+            return None
+        self._entries.move_to_end(key)
+        metrics.incr("cache_hits_total", cache=self.name)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.set_gauge("cache_entries", len(self._entries), cache=self.name)
+
+    def evict(self, n: int) -> int:
+        """Drop the ``n`` least recently used entries."""
+        dropped = 0
+        while self._entries and dropped < n:
+            self._entries.popitem(last=False)
+            dropped += 1
+        metrics.set_gauge("cache_entries", len(self._entries), cache=self.name)
+        return dropped
+
+    def clear(self, corpus_version: Optional[str] = None) -> int:
+        """Drop every entry; rebind to ``corpus_version`` when given."""
+        dropped = len(self._entries)
+        self._entries.clear()
+        if corpus_version is not None and self.corpus_version is not None:
+            self.corpus_version = corpus_version
+        metrics.set_gauge("cache_entries", 0, cache=self.name)
+        return dropped
+
+    def dump(self) -> Dict[str, Any]:
+        now = time.time()
+        entries = [[key, value, expires_at] for key, (value, expires_at) in self._entries.items() if expires_at > now]
+        return {"corpus_version": self.corpus_version, "entries": entries}
+
+    def load(self, payload: Dict[str, Any]) -> int:
+        if self.corpus_version is not None and payload.get("corpus_version") != self.corpus_version:
+            logger.info("Discarding %s snapshot built for corpus %r", self.name, payload.get("corpus_version"))
+            return 0
+        now = time.time()
+        loaded = 0
+        # Entries were dumped least-recently-used first, so replaying keeps the LRU order.
+        for key, value, expires_at in payload.get("entries", []):
+            if expires_at <= now:
+                continue
+            self._entries[key] = (value, expires_at)
+            loaded += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        metrics.set_gauge("cache_entries", len(self._entries), cache=self.name)
+        return loaded
+
+
+class CacheSnapshots:
+    """Saves registered caches to a gzip'd JSON file and restores them at startup.
+
+    ``start`` loads the snapshot and then re-saves every
+    ``CACHE_SNAPSHOT_INTERVAL_SECONDS``; ``stop`` writes a final snapshot.
+    Writes go to a temporary file that replaces the old one atomically.
+    """
+
+    def __init__(self, path: Optional[str] = None, interval_seconds: Optional[float] = None):
+        self.enabled = settings.CACHE_SNAPSHOT_ENABLED
+        self.path = Path(path or settings.CACHE_SNAPSHOT_PATH)
+        self.interval_seconds = interval_seconds or settings.CACHE_SNAPSHOT_INTERVAL_SECONDS
+        self._caches: Dict[str, TTLCache] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, cache: TTLCache) -> TTLCache:
+        self._caches[cache.name] = cache
+        memory.register(f"cache.{cache.name}", count=cache.__len__, root=lambda: cache._entries, evict=cache.evict)
+        return cache
+
+    def caches(self) -> List[TTLCache]:
+        return list(self._caches.values())
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        await asyncio.to_thread(self.load)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self.save()
+
+    def load(self) -> Dict[str, int]:
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as handle:
+                snapshot = json.load(handle)
+        except FileNotFoundError:
+            return {}
+        except Exception as exc:
+            logger.warning("Ignoring unreadable cache snapshot %s: %s", self.path, exc)
+            return {}
+        if snapshot.get("format") != SNAPSHOT_FORMAT:
+            logger.warning("Ignoring cache snapshot with format %r", snapshot.get("format"))
+            return {}
+
+        loaded: Dict[str, int] = {}
+        for name, payload in (snapshot.get("caches") or {}).items():
+            cache = self._caches.get(name)
+            if cache is not None:
+                loaded[name] = cache.load(payload)
+                metrics.incr("cache_snapshot_loaded_total", loaded[name], cache=name)
+        logger.info("Restored caches from %s: %s", self.path, loaded)
+        return loaded
+
+    async def save(self) -> int:
+        # Dump on the loop so no request mutates a cache mid-copy; only the I/O goes to a thread.
+        caches = {name: cache.dump() for name, cache in self._caches.items()}
+        started = time.perf_counter()
+        try:
+            size = await asyncio.to_thread(self._write, caches)
+        except Exception as exc:
+            metrics.incr("cache_snapshot_errors_total")
+            logger.error("Cache snapshot to %s failed: %s", self.path, exc)
+            return 0
+        metrics.incr("cache_snapshot_writes_total")
+        metrics.observe("cache_snapshot_ms", (time.perf_counter() - started) * 1000)
+        metrics.set_gauge("cache_snapshot_bytes", size)
+        return size
+
+    def _write(self, caches: Dict[str, Any]) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+            json.dump({"format": SNAPSHOT_FORMAT, "saved_at": time.time(), "caches": caches}, handle, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        return self.path.stat().st_size
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            await self.save()
+
+
+cache_snapshots = CacheSnapshots()
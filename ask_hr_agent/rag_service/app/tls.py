@@ -1,13 +1,28 @@
 import logging
 import os
+from collections import OrderedDict
 from pathlib import Path
 import ssl
+import sys
+import threading
+import time
+from typing import Any, Optional, Tuple
+import weakref
+
+from app.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 
-def _env_truthy(name: str) -> bool:
-    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+def _env_truthy(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _relax_ssl_enabled() -> bool:
+    return _env_truthy("RAG_RELAX_SSL") or _env_truthy("ASKHR_RELAX_SSL")
 
 
 def _set_ca_bundle_env(bundle_path: Path) -> None:
@@ -35,7 +50,7 @@ def _configure_ca_bundle() -> None:
 
 
 def _relax_x509_strict() -> None:
-    if not (_env_truthy("RAG_RELAX_SSL") or _env_truthy("ASKHR_RELAX_SSL")):
+    if not _relax_ssl_enabled():
         return
 
     strict_flag = getattr(ssl, "VERIFY_X509_STRICT", None)
@@ -79,6 +94,218 @@ def _relax_x509_strict() -> None:
     urllib3_conn.create_urllib3_context = _relaxed_urllib3_context
 
 
+def _bundle_path() -> Optional[str]:
+    for name in ("REQUESTS_CA_BUNDLE", "SSL_CERT_FILE"):
+        value = os.getenv(name)
+        if value and Path(value).is_file():
+            return value
+    try:
+        import certifi  # type: ignore
+    except Exception:
+        return None
+    return certifi.where()
+
+
+class _SessionCache:
+    """Most recent TLS session per server hostname, for client-side resumption.
+
+    TLS 1.3 tickets arrive after the handshake, so an entry is refreshed
+    once its connection has read the ticket; while that connection is
+    alive its session is also re-read on lookup.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[Optional[ssl.SSLSession], Any]]" = OrderedDict()
+
+    def get(self, host: Optional[str]) -> Optional[ssl.SSLSession]:
+        if not host:
+            return None
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is None:
+                return None
+            self._entries.move_to_end(host)
+        session, conn_ref = entry
+        conn = conn_ref()
+        if conn is not None:
+            try:
+                session = conn.session or session
+            except Exception:
+                pass
+        return session
+
+    def put(self, conn: Any) -> None:
+        host = getattr(conn, "server_hostname", None)
+        if not host:
+            return
+        with self._lock:
+            self._entries[host] = (conn.session, weakref.ref(conn))
+            self._entries.move_to_end(host)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            metrics.set_gauge("tls_cached_sessions", len(self._entries))
+
+
+_sessions = _SessionCache()
+
+
+def _record_handshake(conn: Any) -> None:
+    resumed = bool(getattr(conn, "session_reused", False))
+    metrics.incr("tls_handshakes_total", resumed=str(resumed).lower())
+    conn._has_ticket = False
+    _sessions.put(conn)
+
+
+def _capture_ticket(conn: Any) -> None:
+    # TLS 1.3 tickets are processed with the first application data read.
+    if getattr(conn, "_has_ticket", True):
+        return
+    session = conn.session
+    if session is not None and session.has_ticket:
+        conn._has_ticket = True
+        _sessions.put(conn)
+
+
+class _TrackedSSLSocket(ssl.SSLSocket):
+    def do_handshake(self, block=False):
+        super().do_handshake(block)
+        if not self.server_side:
+            _record_handshake(self)
+
+    def read(self, len=1024, buffer=None):
+        data = super().read(len, buffer)
+        _capture_ticket(self)
+        return data
+
+
+class _TrackedSSLObject(ssl.SSLObject):
+    def do_handshake(self):
+        super().do_handshake()
+        if not self.server_side:
+            _record_handshake(self)
+
+    def read(self, len=1024, buffer=None):
+        data = super().read(len, buffer)
+        _capture_ticket(self)
+        return data
+
+
+class _SharedSSLContext(ssl.SSLContext):
+    """Client context that offers the last session for the host and counts handshakes."""
+
+    sslsocket_class = _TrackedSSLSocket
+    sslobject_class = _TrackedSSLObject
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True,
+                    suppress_ragged_eofs=True, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = _sessions.get(server_hostname)
+        return super().wrap_socket(sock, server_side, do_handshake_on_connect,
+                                   suppress_ragged_eofs, server_hostname, session)
+
+    def wrap_bio(self, incoming, outgoing, server_side=False, server_hostname=None, session=None):
+        if session is None and not server_side:
+            session = _sessions.get(server_hostname)
+        return super().wrap_bio(incoming, outgoing, server_side, server_hostname, session)
+
+
+_shared_context: Optional[ssl.SSLContext] = None
+_shared_context_lock = threading.Lock()
+
+
+def shared_ssl_context() -> ssl.SSLContext:
+    """The process-wide verified client context; the CA bundle is loaded once, on first use."""
+    global _shared_context
+    if _shared_context is not None:
+        return _shared_context
+    with _shared_context_lock:
+        if _shared_context is None:
+            started = time.perf_counter()
+            ctx = _SharedSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            # Same verification flags ssl.create_default_context() sets on this Python.
+            if sys.version_info >= (3, 13):
+                ctx.verify_flags |= ssl.VERIFY_X509_PARTIAL_CHAIN | ssl.VERIFY_X509_STRICT
+            if _relax_ssl_enabled() and hasattr(ssl, "VERIFY_X509_STRICT"):
+                ctx.verify_flags &= ~ssl.VERIFY_X509_STRICT
+            bundle = _bundle_path()
+            if bundle:
+                ctx.load_verify_locations(cafile=bundle)
+            else:
+                ctx.load_default_certs()
+            metrics.incr("tls_context_builds_total")
+            logger.info(
+                "Built shared TLS context from %s in %.1f ms",
+                bundle or "system store",
+                (time.perf_counter() - started) * 1000,
+            )
+            _shared_context = ctx
+    return _shared_context
+
+
+def _share_with_httpx() -> None:
+    """httpx transports (ours and google-genai's) verify with the shared context unless told otherwise."""
+    try:
+        import httpx  # type: ignore
+    except Exception:
+        return
+
+    for transport_cls in (httpx.HTTPTransport, httpx.AsyncHTTPTransport):
+        orig_init = transport_cls.__init__
+
+        def _shared_init(self, *args, _orig_init=orig_init, **kwargs):
+            if kwargs.get("verify", True) is True and kwargs.get("cert") is None and not args:
+                kwargs["verify"] = shared_ssl_context()
+            return _orig_init(self, *args, **kwargs)
+
+        transport_cls.__init__ = _shared_init  # type: ignore
+
+
+def _share_with_requests() -> None:
+    """requests (and google-auth's requests transport) reuse the shared context per pool.
+
+    Without this urllib3 builds a context and re-reads the CA bundle for
+    every new connection.
+    """
+    try:
+        from requests.adapters import HTTPAdapter  # type: ignore
+    except Exception:
+        return
+
+    def _uses_shared(verify: Any) -> bool:
+        return verify is True or (isinstance(verify, str) and verify == _bundle_path())
+
+    orig_pool_key = HTTPAdapter.build_connection_pool_key_attributes
+    orig_cert_verify = HTTPAdapter.cert_verify
+
+    def _pool_key(self, request, verify, cert=None):
+        host_params, pool_kwargs = orig_pool_key(self, request, verify, cert)
+        if _uses_shared(verify) and cert is None and host_params.get("scheme") == "https":
+            pool_kwargs.pop("ca_certs", None)
+            pool_kwargs.pop("ca_cert_dir", None)
+            pool_kwargs["ssl_context"] = shared_ssl_context()
+        return host_params, pool_kwargs
+
+    def _cert_verify(self, conn, url, verify, cert):
+        orig_cert_verify(self, conn, url, verify, cert)
+        if getattr(conn, "conn_kw", {}).get("ssl_context") is _shared_context and _uses_shared(verify):
+            # The bundle is already loaded into the shared context.
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+
+    HTTPAdapter.build_connection_pool_key_attributes = _pool_key  # type: ignore
+    HTTPAdapter.cert_verify = _cert_verify  # type: ignore
+
+
+def _share_tls_context() -> None:
+    if not _env_truthy("ASKHR_TLS_SHARED_CONTEXT", default=True):
+        return
+    _share_with_httpx()
+    _share_with_requests()
+
+
 def configure_tls() -> None:
     _configure_ca_bundle()
     _relax_x509_strict()
+    _share_tls_context()
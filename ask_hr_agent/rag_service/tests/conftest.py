@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Settings require these; nothing under test talks to Google.
+os.environ.setdefault("GOOGLE_PROJECT_ID", "test-project")
+os.environ.setdefault("GOOGLE_LOCATION", "us-central1")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,111 @@
+import json
+import os
+
+import pytest
+
+from app.services.ingest import MANIFEST_NAME, chunk_text, clean_text, ingest
+
+PTO = "# Paid Time Off\n\nFull-time associates accrue PTO every pay period. " + "Unused PTO carries over up to a cap. " * 30
+BENEFITS = "Medical, dental and vision enrollment opens each November. " * 25
+
+
+def test_clean_text_collapses_whitespace():
+    assert clean_text("a  \t b\r\n\n\n\nc  ") == "a b\n\nc"
+
+
+def test_chunks_respect_size_and_overlap():
+    text = " ".join(f"word{i}" for i in range(400))
+    chunks = list(chunk_text(text, size=200, overlap=50))
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    # Every chunk ends on a word boundary and the next one repeats its tail.
+    assert all(chunk.split()[-1].startswith("word") for chunk in chunks)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+    assert chunks[-1].endswith("word399")
+
+
+def test_chunks_prefer_paragraph_breaks():
+    text = "a" * 120 + "\n\n" + "b" * 120
+    assert list(chunk_text(text, size=200, overlap=0)) == ["a" * 120, "b" * 120]
+
+
+def test_short_text_is_one_chunk():
+    assert list(chunk_text("just one line", size=200, overlap=50)) == ["just one line"]
+    assert list(chunk_text("", size=200, overlap=50)) == []
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _run(source, out, **overrides):
+    options = dict(chunk_size=300, chunk_overlap=50, embedder_spec="hashing:64")
+    options.update(overrides)
+    return ingest(str(source), str(out), **options)
+
+
+def test_ingest_builds_a_complete_index(tmp_path):
+    source, out = tmp_path / "docs", tmp_path / "index"
+    _write(source / "policies" / "pto.md", PTO)
+    _write(source / "benefits.txt", BENEFITS)
+    _write(source / "notes.bin", "ignored")
+
+    manifest = _run(source, out)
+    stats = manifest["stats"]
+    assert stats["added"] == 2 and stats["skipped"] == 1
+    assert stats["embedded"] == stats["chunks"] > 2
+    assert manifest["documents"]["policies/pto.md"]["title"] == "Paid Time Off"
+    for name in ("index.json", "embeddings.npy", "chunks.jsonl", "chunk_text.bin", "bm25.json", MANIFEST_NAME):
+        assert (out / name).exists()
+    assert not (tmp_path / "index.building").exists()
+
+
+def test_reingest_reuses_unchanged_documents(tmp_path):
+    source, out = tmp_path / "docs", tmp_path / "index"
+    _write(source / "pto.md", PTO)
+    _write(source / "benefits.txt", BENEFITS)
+    first = _run(source, out)
+
+    second = _run(source, out)
+    assert second["stats"]["unchanged"] == 2
+    assert second["stats"]["embedded"] == 0
+    assert second["corpus_version"] == first["corpus_version"]
+
+    _write(source / "benefits.txt", BENEFITS + "Open enrollment ends December 1.")
+    (source / "pto.md").unlink()
+    _write(source / "holidays.md", "# Holidays\n\nThe office closes on New Year's Day.")
+    third = _run(source, out)
+    stats = third["stats"]
+    assert (stats["changed"], stats["added"], stats["removed"], stats["unchanged"]) == (1, 1, 1, 0)
+    # Chunks of the edited document whose text did not change keep their embeddings.
+    assert stats["reused_embeddings"] > 0
+    assert third["corpus_version"] != first["corpus_version"]
+    assert third["previous_corpus_version"] == first["corpus_version"]
+    assert set(json.loads((out / MANIFEST_NAME).read_text())["documents"]) == {"benefits.txt", "holidays.md"}
+
+
+def test_changed_chunking_re_reads_everything(tmp_path):
+    source, out = tmp_path / "docs", tmp_path / "index"
+    _write(source / "pto.md", PTO)
+    _run(source, out)
+    stats = _run(source, out, chunk_size=400)["stats"]
+    assert stats["unchanged"] == 0 and stats["changed"] == 1
+
+
+def test_touched_but_identical_document_is_unchanged(tmp_path):
+    source, out = tmp_path / "docs", tmp_path / "index"
+    _write(source / "pto.md", PTO)
+    _run(source, out)
+    stat = (source / "pto.md").stat()
+    os.utime(source / "pto.md", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert _run(source, out)["stats"]["unchanged"] == 1
+
+
+def test_ingest_rejects_bad_input(tmp_path):
+    with pytest.raises(ValueError):
+        _run(tmp_path, tmp_path / "index", chunk_overlap=300)
+    (tmp_path / "empty").mkdir()
+    with pytest.raises(ValueError):
+        _run(tmp_path / "empty", tmp_path / "index")
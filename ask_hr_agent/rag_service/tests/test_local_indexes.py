@@ -0,0 +1,112 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.services.bm25 import Bm25Index, build_bm25, tokenize
+from app.services.vector_index import ChunkTable, HashingEmbedder, LocalVectorIndex, build_index
+
+CHUNKS = [
+    {"id": "pto-1", "text": "Full-time associates accrue paid time off (PTO) every pay period.",
+     "title": "PTO", "metadata": {"doc_type": "policy", "region": ["US", "CA"]}},
+    {"id": "pto-2", "text": "Unused PTO carries over up to a cap of eighty hours.",
+     "title": "PTO", "metadata": {"doc_type": "policy", "region": "US"}},
+    {"id": "fmla-1", "text": "FMLA leave protects your job for up to twelve weeks.",
+     "title": "FMLA", "metadata": {"doc_type": "policy", "region": "US"}},
+    {"id": "jury-1", "text": "Jury duty is paid leave; bring your summons to your manager.",
+     "title": "Jury duty", "metadata": {"doc_type": "faq", "region": "CA"}},
+    {"id": "benefits-1", "text": "Medical, dental and vision enrollment opens each November.",
+     "title": "Benefits", "metadata": {"doc_type": "faq", "region": ["US", "CA"]}},
+    {"id": "cobra-1", "text": "COBRA lets you keep medical coverage after leaving the company.",
+     "title": "COBRA", "metadata": {"doc_type": "policy", "region": "US"}},
+]
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    def build(ivf_lists=0):
+        out = tmp_path / f"index-{ivf_lists}"
+        chunks = tmp_path / "chunks.jsonl"
+        chunks.write_text("".join(json.dumps(chunk) + "\n" for chunk in CHUNKS), encoding="utf-8")
+        build_index(str(chunks), str(out), embedder_spec="hashing:256", ivf_lists=ivf_lists, corpus_version="v1")
+        build_bm25(str(out))
+        return str(out)
+
+    return build
+
+
+def _ids(hits):
+    return [chunk["id"] for chunk, _ in hits]
+
+
+def test_hashing_embedder_is_normalised_and_deterministic():
+    embedder = HashingEmbedder(128)
+    vectors = embedder.embed(["paid time off", "paid time off", ""])
+    assert vectors.shape == (3, 128) and vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors[0]), 1.0)
+    assert np.array_equal(vectors[0], vectors[1])
+
+
+def test_chunk_table_filters_by_metadata(index_dir):
+    table = ChunkTable(index_dir())
+    assert table.corpus_version == "v1"
+    assert table.filter_rows(None) is None
+    assert list(table.filter_rows({"doc_type": "faq"})) == [3, 4]
+    assert list(table.filter_rows({"region": "CA"})) == [0, 3, 4]
+    assert list(table.filter_rows({"doc_type": "policy", "region": ["CA"]})) == [0]
+    assert list(table.filter_rows({"doc_type": "missing"})) == []
+
+
+def test_vector_search_ranks_the_matching_chunk_first(index_dir):
+    index = LocalVectorIndex(index_dir())
+    hits = index.search("unused PTO carries over", top_k=3)
+    assert len(hits) == 3
+    assert hits[0][0]["id"] == "pto-2"
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+
+
+def test_vector_search_applies_filters(index_dir):
+    index = LocalVectorIndex(index_dir())
+    assert set(_ids(index.search("leave", top_k=10, filters={"doc_type": "faq"}))) == {"jury-1", "benefits-1"}
+    assert index.search("leave", top_k=10, filters={"doc_type": "missing"}) == []
+
+
+def test_ivf_full_probe_matches_exact_search(index_dir):
+    exact = LocalVectorIndex(index_dir())
+    ivf = LocalVectorIndex(index_dir(ivf_lists=3), nprobe=3)
+    for query in ("PTO carry over", "medical coverage", "jury summons"):
+        assert _ids(ivf.search(query, top_k=4)) == _ids(exact.search(query, top_k=4))
+
+
+def test_ivf_partial_probe_falls_back_to_filtered_rows(index_dir):
+    ivf = LocalVectorIndex(index_dir(ivf_lists=3), nprobe=1)
+    assert len(ivf.search("PTO", top_k=2)) <= 2
+    # Too few filtered rows in the probed list: every filtered row is scored instead.
+    hits = ivf.search("PTO", top_k=5, filters={"doc_type": "faq"})
+    assert set(_ids(hits)) == {"jury-1", "benefits-1"}
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("What is the FMLA policy?") == ["fmla", "policy"]
+
+
+def test_bm25_scores_exact_terms(index_dir):
+    index = Bm25Index(index_dir())
+    assert _ids(index.search("FMLA", top_k=3)) == ["fmla-1"]
+    assert _ids(index.search("COBRA medical", top_k=2))[0] == "cobra-1"
+    assert index.search("what is the", top_k=3) == []
+
+
+def test_bm25_applies_filters(index_dir):
+    index = Bm25Index(index_dir())
+    assert _ids(index.search("medical", top_k=5, filters={"doc_type": "faq"})) == ["benefits-1"]
+    assert index.search("FMLA", top_k=5, filters={"doc_type": "faq"}) == []
+
+
+def test_bm25_rejects_an_index_it_was_not_built_for(index_dir):
+    path = index_dir()
+    manifest_path = Path(path) / "bm25.json"
+    manifest_path.write_text(json.dumps({**json.loads(manifest_path.read_text()), "count": 99}))
+    with pytest.raises(ValueError):
+        Bm25Index(path)
@@ -1,4 +1,6 @@
 from pathlib import Path
+from typing import Dict, Optional
+
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -20,15 +22,176 @@ class Settings(BaseSettings):
 
     IBM_VERIFY_CLIENT_ID: str = ""
     IBM_VERIFY_ISSUER: str = ""
+    ADMIN_GROUP: str = "askhr-admins"
 
     RAG_SERVICE_URL: str = "http://localhost:8001"
     WORKDAY_TOOLS_URL: str = "http://localhost:5001"
     WORKDAY_TOOLS_TIMEOUT_SECONDS: int = 300
+    # "session": prewarm on session creation and Workday-looking messages; "intent": messages only; "off".
+    WORKDAY_PREWARM_MODE: str = "session"
+    WORKDAY_PREWARM_MIN_INTERVAL_SECONDS: float = 60.0
+    # "http" calls the services above; "inprocess" imports and awaits them in this process (monolith mode).
+    RAG_TRANSPORT: str = "http"
+    WORKDAY_TRANSPORT: str = "http"
 
     ROUTER_MODEL: str = Field(
         default="gemini-2.5-pro",
         validation_alias="ASKHR_ROUTER_MODEL",
     )
+    ROUTER_TEMPERATURE: float = Field(
+        default=0.0,
+        validation_alias="ASKHR_ROUTER_TEMPERATURE",
+    )
+    ROUTER_THINKING_BUDGET: Optional[int] = Field(
+        default=None,
+        validation_alias="ASKHR_ROUTER_THINKING_BUDGET",
+    )
+    ROUTER_MAX_OUTPUT_TOKENS: Optional[int] = Field(
+        default=None,
+        validation_alias="ASKHR_ROUTER_MAX_OUTPUT_TOKENS",
+    )
+    ROUTER_STRUCTURED_OUTPUT: bool = Field(
+        default=True,
+        validation_alias="ASKHR_ROUTER_STRUCTURED_OUTPUT",
+    )
+
+    # Cascade: try the fast model first, escalate to ROUTER_MODEL on low confidence.
+    ROUTER_CASCADE_ENABLED: bool = Field(
+        default=False,
+        validation_alias="ASKHR_ROUTER_CASCADE_ENABLED",
+    )
+    ROUTER_FAST_MODEL: str = Field(
+        default="gemini-2.5-flash-lite",
+        validation_alias="ASKHR_ROUTER_FAST_MODEL",
+    )
+    ROUTER_CASCADE_MIN_CONFIDENCE: float = Field(
+        default=0.75,
+        validation_alias="ASKHR_ROUTER_CASCADE_MIN_CONFIDENCE",
+    )
+
+    # Empty model means "same as ROUTER_MODEL" (the historical behaviour).
+    RAG_ANSWER_MODEL: str = Field(
+        default="",
+        validation_alias="ASKHR_RAG_ANSWER_MODEL",
+    )
+    RAG_ANSWER_TEMPERATURE: float = Field(
+        default=0.2,
+        validation_alias="ASKHR_RAG_ANSWER_TEMPERATURE",
+    )
+    RAG_ANSWER_THINKING_BUDGET: Optional[int] = Field(
+        default=None,
+        validation_alias="ASKHR_RAG_ANSWER_THINKING_BUDGET",
+    )
+    RAG_ANSWER_MAX_OUTPUT_TOKENS: Optional[int] = Field(
+        default=None,
+        validation_alias="ASKHR_RAG_ANSWER_MAX_OUTPUT_TOKENS",
+    )
+    RAG_ANSWER_CASCADE_ENABLED: bool = Field(
+        default=False,
+        validation_alias="ASKHR_RAG_ANSWER_CASCADE_ENABLED",
+    )
+    RAG_ANSWER_FAST_MODEL: str = Field(
+        default="gemini-2.5-flash",
+        validation_alias="ASKHR_RAG_ANSWER_FAST_MODEL",
+    )
+
+    # Hedged LLM calls (routing and RAG answers); off unless explicitly enabled.
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY_MS: float = 300.0
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_BUDGET_RATIO: float = 0.1
+
+    # Degraded RAG answers: serve retrieved snippets when generation is overloaded. The answer deadline and
+    # LLM_MAX_CONCURRENCY slots only apply while degraded mode is enabled.
+    RAG_DEGRADED_MODE_ENABLED: bool = True
+    RAG_ANSWER_DEADLINE_SECONDS: float = 20.0
+    LLM_MAX_CONCURRENCY: int = 16
+    RAG_DEGRADED_TRIP_THRESHOLD: int = 3
+    RAG_DEGRADED_COOLDOWN_SECONDS: float = 30.0
+    RAG_DEGRADED_SNIPPETS: int = 3
+
+    # Write-behind transcript log of chat turns (JSONL, rotated by day and size).
+    TRANSCRIPT_ENABLED: bool = True
+    TRANSCRIPT_DIR: str = str(Path(__file__).resolve().parents[1] / "transcripts")
+    TRANSCRIPT_BUFFER_SIZE: int = 10000
+    TRANSCRIPT_BATCH_SIZE: int = 200
+    TRANSCRIPT_FLUSH_INTERVAL_SECONDS: float = 2.0
+    TRANSCRIPT_MAX_FILE_BYTES: int = 50 * 1024 * 1024
+
+    # Precomputed FAQ answers consulted before routing.
+    RAG_CORPUS_VERSION: str = ""
+    FAQ_ENABLED: bool = True
+    FAQ_STORE_PATH: str = str(Path(__file__).resolve().parents[1] / "faq_answers.json")
+    FAQ_MATCH_THRESHOLD: float = 0.75
+    FAQ_RELOAD_CHECK_SECONDS: float = 30.0
+
+    # Newest history entries kept in memory per session; older turns live in the transcript log.
+    SESSION_HISTORY_MAX_ENTRIES: int = 200
+
+    # Shadow traffic: replay a sample of routing/RAG-answer calls against candidate
+    # models or prompts after the response is sent. A stage is shadowed only when it
+    # has a candidate model or instruction file.
+    SHADOW_ENABLED: bool = False
+    SHADOW_SAMPLE_RATE: float = 0.05
+    SHADOW_MAX_CONCURRENCY: int = 2
+    SHADOW_RESULTS_BUFFER: int = 200
+    SHADOW_ROUTER_MODEL: str = ""
+    SHADOW_ROUTER_INSTRUCTION_FILE: str = ""
+    SHADOW_RAG_ANSWER_MODEL: str = ""
+    SHADOW_RAG_ANSWER_INSTRUCTION_FILE: str = ""
+
+    # Gemini context caching of stable prompt prefixes ("genai" or the in-process "local" stand-in).
+    CONTEXT_CACHE_ENABLED: bool = True
+    CONTEXT_CACHE_BACKEND: str = "genai"
+    CONTEXT_CACHE_TTL_SECONDS: int = 3600
+    CONTEXT_CACHE_REFRESH_MARGIN_SECONDS: int = 300
+    CONTEXT_CACHE_MIN_TOKENS: int = 2048
+    CONTEXT_CACHE_MAX_ENTRIES: int = 256
+    CONTEXT_CACHE_RETRY_SECONDS: int = 300
+
+    # Warm caches (routing decisions, RAG answers) snapshotted to disk and reloaded on startup.
+    CACHE_SNAPSHOT_ENABLED: bool = True
+    CACHE_SNAPSHOT_PATH: str = str(Path(__file__).resolve().parents[1] / "cache_snapshot.json.gz")
+    CACHE_SNAPSHOT_INTERVAL_SECONDS: float = 300.0
+    ROUTING_CACHE_ENABLED: bool = True
+    ROUTING_CACHE_TTL_SECONDS: float = 6 * 3600
+    ROUTING_CACHE_MAX_ENTRIES: int = 5000
+    RAG_ANSWER_CACHE_ENABLED: bool = True
+    RAG_ANSWER_CACHE_TTL_SECONDS: float = 6 * 3600
+    RAG_ANSWER_CACHE_MAX_ENTRIES: int = 2000
+
+    # Event-loop lag probe and blocked-loop stack reporter.
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.5
+    LOOP_MONITOR_STALL_THRESHOLD_MS: float = 250.0
+
+    # On-demand profiles (sampled requests and timed captures), written under PROFILE_DIR.
+    PROFILE_DIR: str = str(Path(__file__).resolve().parents[1] / "profiles")
+    PROFILE_MAX_FILES: int = 50
+    PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+    PROFILE_MAX_CAPTURE_SECONDS: float = 120.0
+
+    # Memory accounting: per-store byte budgets as JSON, e.g. {"sessions": 268435456}.
+    MEMORY_BUDGETS: Dict[str, int] = {}
+    MEMORY_CHECK_INTERVAL_SECONDS: float = 60.0
+    MEMORY_TRACEMALLOC_FRAMES: int = 10
+
+    # Token accounting: per-user ledger size, and whether chat responses carry a debug "usage" block.
+    USAGE_LEDGER_MAX_USERS: int = 10000
+    DEBUG_METADATA: bool = False
+
+    # W3C trace-context tracing; spans are kept in a ring buffer and optionally appended to a JSONL file.
+    TRACING_ENABLED: bool = True
+    TRACE_SAMPLE_RATE: float = 1.0
+    TRACE_BUFFER_SPANS: int = 5000
+    TRACE_EXPORT_PATH: str = ""
+
+    # Logging goes through a queue to a listener thread; LOG_FORMAT is "json" or "text".
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_RATE_LIMIT_PER_MINUTE: int = 60
 
 
 settings = Settings()
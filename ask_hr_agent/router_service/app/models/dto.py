@@ -43,3 +43,34 @@ class RouteDecision(BaseModel):
     route: str
     reason: Optional[str] = None
     confidence: Optional[float] = None
+    # Sub-questions when route == "both" (policy part and Workday part).
+    rag_query: Optional[str] = None
+    workday_query: Optional[str] = None
+
+
+class HistoryTurn(BaseModel):
+    seq: int
+    role: str
+    content: str
+    route: Optional[str] = None
+    ts: Optional[datetime] = None
+
+
+class HistoryPage(BaseModel):
+    session_id: str
+    turns: List[HistoryTurn] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    has_more: bool = False
+
+
+class SessionSummary(BaseModel):
+    session_id: str
+    created_at: datetime
+    updated_at: datetime
+    title: Optional[str] = None
+
+
+class SessionListResponse(BaseModel):
+    sessions: List[SessionSummary] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
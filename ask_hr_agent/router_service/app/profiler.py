@@ -0,0 +1,203 @@
+import asyncio
+import cProfile
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.config import settings
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class _StackSampler(threading.Thread):
+    """Samples every thread's stack on an interval into collapsed-stack counts."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stopping = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopping.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+class Profiler:
+    """On-demand CPU profiling stored as downloadable files.
+
+    Two modes: 1-in-N sampling of HTTP requests up to their last response
+    body chunk (cProfile, ``.pstats``; background tasks excluded) and a
+    timed capture of the whole process (cProfile of the event-loop thread
+    plus a stack sampler over every thread, ``.pstats`` + ``.collapsed`` for
+    flamegraph tools). Only one profile runs at a time because Python allows
+    a single profiler per thread; on the event loop a request profile also
+    sees whatever other coroutines run while that request awaits. When
+    sampling is off the per-request cost is one integer check.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_files: int = 50,
+        sample_interval_ms: float = 5.0,
+        max_capture_seconds: float = 120.0,
+    ):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self.sample_interval = sample_interval_ms / 1000.0
+        self.max_capture_seconds = max_capture_seconds
+        self.every_n = 0
+        self._remaining = 0
+        self._counter = 0
+        self._busy = False
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "sampling_every_n": self.every_n,
+            "sampled_profiles_remaining": self._remaining,
+            "busy": self._busy,
+            "files": self.list_files(),
+        }
+
+    def configure_sampling(self, every_n: int, max_profiles: int = 20) -> None:
+        """Profile one in ``every_n`` requests until ``max_profiles`` are stored (0 disables)."""
+        self.every_n = max(0, every_n)
+        self._remaining = max_profiles if self.every_n else 0
+        self._counter = 0
+
+    def should_sample(self) -> bool:
+        if not self.every_n or self._busy:
+            return False
+        self._counter += 1
+        return self._counter % self.every_n == 0
+
+    async def profile_request(self, label: str, call: Callable[[Callable[[], None]], Awaitable[Any]]) -> Any:
+        """Profile ``call(stop)``; ``stop()`` ends the profile early, e.g. once the response is sent."""
+        self._busy = True
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        elapsed: List[float] = []
+
+        def stop() -> None:
+            if not elapsed:
+                profile.disable()
+                self._busy = False
+                elapsed.append((time.perf_counter() - started) * 1000)
+
+        profile.enable()
+        try:
+            return await call(stop)
+        finally:
+            stop()
+            elapsed_ms = elapsed[0]
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self.every_n = 0
+            metrics.incr("profiles_sampled_total")
+            await asyncio.to_thread(self._write, f"request-{label}-{elapsed_ms:.0f}ms", profile, None)
+
+    async def capture(self, seconds: float) -> List[str]:
+        if self._busy:
+            raise RuntimeError("A profile is already running")
+        seconds = min(max(seconds, 0.1), self.max_capture_seconds)
+        self._busy = True
+        sampler = _StackSampler(self.sample_interval)
+        profile = cProfile.Profile()
+        sampler.start()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+            sampler.stop()
+            self._busy = False
+        metrics.incr("profiles_captured_total")
+        return await asyncio.to_thread(self._write, f"capture-{seconds:g}s", profile, sampler.collapsed())
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.iterdir(), key=lambda path: path.stat().st_mtime, reverse=True)
+        return [{"name": path.name, "bytes": path.stat().st_size} for path in files if path.is_file()]
+
+    def resolve(self, name: str) -> Optional[Path]:
+        if _UNSAFE_CHARS.search(name) or name.startswith("."):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def _write(self, label: str, profile: cProfile.Profile, collapsed: Optional[str]) -> List[str]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%dT%H%M%S')}-{_UNSAFE_CHARS.sub('_', label).strip('_')}"
+        written = [f"{stem}.pstats"]
+        profile.dump_stats(str(self.directory / written[0]))
+        if collapsed is not None:
+            written.append(f"{stem}.collapsed")
+            (self.directory / written[1]).write_text(collapsed, encoding="utf-8")
+        self._prune()
+        return written
+
+    def _prune(self) -> None:
+        files = sorted(self.directory.iterdir(), key=lambda path: path.stat().st_mtime)
+        for path in files[: max(0, len(files) - self.max_files)]:
+            path.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that hands sampled HTTP requests to the profiler."""
+
+    def __init__(self, app: Any, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not self.profiler.should_sample():
+            await self.app(scope, receive, send)
+            return
+        label = f"{scope.get('method', '')}{scope.get('path', '')}"
+
+        async def _call(stop: Callable[[], None]) -> None:
+            async def _send(message: Dict[str, Any]) -> None:
+                await send(message)
+                # BackgroundTasks run after the last body chunk and are not part of the request.
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    stop()
+
+            await self.app(scope, receive, _send)
+
+        await self.profiler.profile_request(label, _call)
+
+
+profiler = Profiler(
+    settings.PROFILE_DIR,
+    max_files=settings.PROFILE_MAX_FILES,
+    sample_interval_ms=settings.PROFILE_SAMPLE_INTERVAL_MS,
+    max_capture_seconds=settings.PROFILE_MAX_CAPTURE_SECONDS,
+)
@@ -0,0 +1,142 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+
+from app.auth.dependencies import require_admin
+from app.loop_monitor import loop_monitor
+from app.memory import memory
+from app.profiler import profiler
+from app.tracing import tracer
+from app.services.faq import faq_store
+from app.services.shadow import shadow_traffic
+from app.services.token_usage import token_usage
+from app.services.warm_cache import cache_snapshots
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+class FaqInvalidateRequest(BaseModel):
+    corpus_version: Optional[str] = None
+
+
+class CacheInvalidateRequest(BaseModel):
+    cache: Optional[str] = None
+    corpus_version: Optional[str] = None
+
+
+class ProfileSamplingRequest(BaseModel):
+    every_n: int = Field(0, ge=0)
+    max_profiles: int = Field(20, ge=1, le=1000)
+
+
+class ProfileCaptureRequest(BaseModel):
+    seconds: float = Field(10.0, gt=0)
+
+
+@router.post("/faq/invalidate")
+async def invalidate_faq(request: FaqInvalidateRequest):
+    dropped = faq_store.invalidate(request.corpus_version)
+    return {"dropped": dropped, "remaining": len(faq_store), "corpus_version": faq_store.corpus_version}
+
+
+@router.post("/faq/reload")
+async def reload_faq():
+    return {"entries": faq_store.reload()}
+
+
+@router.get("/shadow/results")
+async def shadow_results(stage: Optional[str] = None, limit: int = Query(50, ge=1, le=500)):
+    return {"enabled": shadow_traffic.enabled, "results": shadow_traffic.results(stage, limit)}
+
+
+@router.get("/usage")
+async def usage_by_user(limit: int = Query(20, ge=1, le=500)):
+    """Heaviest users by prompt + thinking + output tokens since startup."""
+    return {"users": token_usage.top_users(limit)}
+
+
+@router.get("/usage/{user_id}")
+async def usage_for_user(user_id: str):
+    stages = token_usage.user(user_id)
+    if stages is None:
+        raise HTTPException(status_code=404, detail="No usage recorded for user")
+    return {"user_id": user_id, "stages": stages}
+
+
+@router.get("/caches")
+async def list_caches():
+    return {cache.name: {"entries": len(cache), "corpus_version": cache.corpus_version} for cache in cache_snapshots.caches()}
+
+
+@router.post("/caches/invalidate")
+async def invalidate_caches(request: CacheInvalidateRequest):
+    caches = [cache for cache in cache_snapshots.caches() if request.cache in (None, cache.name)]
+    if not caches:
+        raise HTTPException(status_code=404, detail="Unknown cache")
+    return {cache.name: cache.clear(request.corpus_version) for cache in caches}
+
+
+@router.post("/caches/snapshot")
+async def snapshot_caches():
+    return {"bytes": await cache_snapshots.save(), "path": str(cache_snapshots.path)}
+
+
+@router.get("/debug/loop")
+async def loop_stalls():
+    return {"enabled": loop_monitor.enabled, "stalls": loop_monitor.recent_stalls()}
+
+
+@router.get("/debug/traces")
+async def list_traces(limit: int = Query(50, ge=1, le=500)):
+    return {"enabled": tracer.enabled, "traces": tracer.traces(limit)}
+
+
+@router.get("/debug/traces/{trace_id}")
+async def get_trace(trace_id: str, format: Literal["json", "text"] = "json"):
+    """Spans this service recorded for a trace; other services hold their own spans under the same id."""
+    spans = tracer.trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    if format == "text":
+        return PlainTextResponse(tracer.render(trace_id))
+    return {"trace_id": trace_id, "spans": spans}
+
+
+@router.get("/debug/profile")
+async def profile_status():
+    return profiler.status()
+
+
+@router.post("/debug/profile/sampling")
+async def configure_profile_sampling(request: ProfileSamplingRequest):
+    profiler.configure_sampling(request.every_n, request.max_profiles)
+    return profiler.status()
+
+
+@router.post("/debug/profile/capture")
+async def capture_profile(request: ProfileCaptureRequest):
+    try:
+        files = await profiler.capture(request.seconds)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"files": files}
+
+
+@router.get("/debug/profile/files/{name}")
+async def download_profile(name: str):
+    path = profiler.resolve(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+
+@router.get("/debug/memory")
+async def memory_report(
+    trace: Optional[Literal["start", "diff", "stop"]] = None,
+    top: int = Query(20, ge=1, le=200),
+):
+    """Approximate size of each in-process store; ``trace`` drives a tracemalloc diff between calls."""
+    # Runs on the loop on purpose: stores are only mutated there, so sizing and eviction can't race.
+    return memory.report(trace, top)
@@ -1,67 +1,203 @@
 import logging
-import uuid
-from datetime import datetime
+import time
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 
 from app.auth.dependencies import get_current_user
-from app.models.dto import ChatMessage, ChatResponse, CreateSessionRequest, SessionResponse, UserContext
+from app.config import settings
+from app.memory import memory
+from app.models.dto import (
+    ChatMessage,
+    ChatResponse,
+    CreateSessionRequest,
+    HistoryPage,
+    HistoryTurn,
+    SessionListResponse,
+    SessionResponse,
+    SessionSummary,
+    UserContext,
+)
 from app.services.router_service import RouterAgent, GREETING_MESSAGE
+from app.services.session_locks import SessionLocks
+from app.services.session_store import SessionStore
+from app.services.shadow import shadow_traffic
+from app.services.token_usage import token_usage
+from app.services.transcript import transcript_sink
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 _orchestrator = None
 
 # In-memory session store for MVP
-sessions = {}
+session_store = SessionStore()
+session_locks = SessionLocks()
+memory.register(
+    "sessions",
+    count=session_store.__len__,
+    root=lambda: session_store._sessions,
+    evict=session_store.evict_oldest,
+)
 
 
 @router.post("/session", response_model=SessionResponse)
 async def create_session(_request: CreateSessionRequest, user: UserContext = Depends(get_current_user)):
-    session_id = str(uuid.uuid4())
-    sessions[session_id] = {
-        "user_id": user.user_id,
-        "history": [{"role": "assistant", "content": GREETING_MESSAGE}],
-        "last_route": None,
-        "awaiting_workday": False,
-        "created_at": datetime.now(),
-    }
-    return SessionResponse(session_id=session_id, created_at=sessions[session_id]["created_at"])
+    session_id, session = session_store.create(user.user_id, greeting=GREETING_MESSAGE)
+    if settings.WORKDAY_PREWARM_MODE == "session":
+        _get_orchestrator().workday_tools.prewarm()
+    return SessionResponse(session_id=session_id, created_at=session["created_at"])
 
 
-@router.post("/message", response_model=ChatResponse)
-async def send_message(message: ChatMessage, user: UserContext = Depends(get_current_user)):
-    if message.session_id not in sessions:
+@router.get("/sessions", response_model=SessionListResponse)
+async def list_sessions(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    user: UserContext = Depends(get_current_user),
+):
+    page, has_more = session_store.list_sessions(user.user_id, _parse_session_cursor(cursor), limit)
+    summaries = [
+        SessionSummary(
+            session_id=session_id,
+            created_at=session["created_at"],
+            updated_at=session["updated_at"],
+            title=session.get("title"),
+        )
+        for session_id, session in page
+    ]
+    next_cursor = None
+    if has_more and page:
+        last_id, last_session = page[-1]
+        next_cursor = f"{last_session['updated_at'].isoformat()}|{last_id}"
+    return SessionListResponse(sessions=summaries, next_cursor=next_cursor)
+
+
+@router.get("/session/{session_id}/history", response_model=HistoryPage)
+async def get_history(
+    session_id: str,
+    cursor: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    user: UserContext = Depends(get_current_user),
+):
+    """Page through a session's turns.
+
+    Pass the last-seen ``next_cursor`` as ``cursor`` to fetch only newer turns,
+    or ``prev_cursor`` as ``before`` to load older ones.
+    """
+    session = session_store.get(session_id)
+    if session is None or session.get("user_id") != user.user_id:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    session = sessions[message.session_id]
+    entries, has_more = session_store.history_page(
+        session,
+        after=_parse_seq_cursor(cursor),
+        before=_parse_seq_cursor(before),
+        limit=limit,
+    )
+    turns = [HistoryTurn(**entry) for entry in entries]
+    return HistoryPage(
+        session_id=session_id,
+        turns=turns,
+        next_cursor=str(turns[-1].seq) if turns else cursor,
+        prev_cursor=str(turns[0].seq) if turns else before,
+        has_more=has_more,
+    )
 
+
+@router.post("/message", response_model=ChatResponse)
+async def send_message(
+    message: ChatMessage,
+    background_tasks: BackgroundTasks,
+    user: UserContext = Depends(get_current_user),
+):
+    session = session_store.get(message.session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Shadow calls sampled during this turn run only after the response is sent.
+    shadow_traffic.begin_turn()
+    token_usage.begin_turn()
     try:
+        response, coalesced = await session_locks.run_once(
+            message.session_id,
+            message.content,
+            lambda: _process_turn(message, user, session),
+        )
+        if coalesced:
+            return response.model_copy(update={"metadata": {**response.metadata, "coalesced": True}})
+        return response
+    except Exception as e:
+        logger.exception("Chat message processing failed")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        background_tasks.add_task(shadow_traffic.run, shadow_traffic.drain())
+
+
+async def _process_turn(message: ChatMessage, user: UserContext, session: dict) -> ChatResponse:
+    # Turns within a session run one at a time so history and routing state never interleave.
+    async with session_locks.hold(message.session_id):
+        started = time.perf_counter()
         response = await _get_orchestrator().route_and_process(
             message.content,
             user,
             session,
             message.session_id,
         )
+        if settings.DEBUG_METADATA:
+            response.metadata = {**(response.metadata or {}), "usage": token_usage.turn_usage()}
 
         route = response.metadata.get("route") if response.metadata else None
         if route:
             session["last_route"] = route
             if route == "workday" and "?" in response.reply_text:
                 session["awaiting_workday"] = True
+            elif route == "both":
+                session["awaiting_workday"] = bool(response.metadata.get("workday_prompted"))
             else:
                 session["awaiting_workday"] = False
 
-        session["history"].append({"role": "user", "content": message.content})
-        assistant_entry = {"role": "assistant", "content": response.reply_text}
+        session_store.append(session, "user", message.content)
         if route:
-            assistant_entry["route"] = route
-        session["history"].append(assistant_entry)
+            session_store.append(session, "assistant", response.reply_text, route=route)
+        else:
+            session_store.append(session, "assistant", response.reply_text)
 
+        _record_transcript(message, user, response, (time.perf_counter() - started) * 1000)
         return response
-    except Exception as e:
-        logger.exception("Chat message processing failed")
-        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _record_transcript(message: ChatMessage, user: UserContext, response: ChatResponse, turn_ms: float) -> None:
+    metadata = response.metadata or {}
+    transcript_sink.submit({
+        "session_id": message.session_id,
+        "user_id": user.user_id,
+        "query": message.content,
+        "reply": response.reply_text,
+        "route": metadata.get("route"),
+        "route_confidence": metadata.get("route_confidence"),
+        "agent": metadata.get("agent"),
+        "degraded": metadata.get("degraded", False),
+        "timings": {"turn_ms": round(turn_ms, 1), **(metadata.get("stage_latency_ms") or {})},
+        "citations": [{"title": c.title, "url": c.url} for c in response.citations],
+    })
+
+
+def _parse_seq_cursor(value: Optional[str]) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _parse_session_cursor(value: Optional[str]) -> Optional[Tuple[str, str]]:
+    if not value:
+        return None
+    updated_at, sep, session_id = value.partition("|")
+    if not sep or not session_id:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return updated_at, session_id
 
 
 def _get_orchestrator() -> RouterAgent:
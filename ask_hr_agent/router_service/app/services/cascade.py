@@ -0,0 +1,55 @@
+import logging
+import time
+from typing import Awaitable, Callable, Tuple, TypeVar
+
+from app.metrics import LatencyWindow, metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Cascade:
+    """Tries a cheap model first and escalates to the full model only when needed.
+
+    ``accept`` inspects the fast result (router confidence, answer self-check)
+    and decides whether it is good enough. Latency saved is estimated against
+    the rolling mean of full-model calls observed on escalations.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self._full_latencies = LatencyWindow()
+
+    async def run(
+        self,
+        fast: Callable[[], Awaitable[T]],
+        full: Callable[[], Awaitable[T]],
+        accept: Callable[[T], bool],
+    ) -> Tuple[T, bool]:
+        """Return ``(result, escalated)``."""
+        metrics.incr("llm_cascade_requests_total", stage=self.stage)
+        started = time.perf_counter()
+        accepted = False
+        try:
+            result = await fast()
+            accepted = accept(result)
+        except Exception as exc:
+            logger.warning("Fast %s model failed, escalating: %s", self.stage, exc)
+        fast_ms = (time.perf_counter() - started) * 1000
+        metrics.observe("llm_cascade_fast_latency_ms", fast_ms, stage=self.stage)
+
+        if accepted:
+            if len(self._full_latencies):
+                saved_ms = self._full_latencies.mean() - fast_ms
+                metrics.observe("llm_cascade_latency_saved_ms", saved_ms, stage=self.stage)
+            return result, False
+
+        metrics.incr("llm_cascade_escalations_total", stage=self.stage)
+        metrics.observe("llm_cascade_escalation_overhead_ms", fast_ms, stage=self.stage)
+        started = time.perf_counter()
+        result = await full()
+        full_ms = (time.perf_counter() - started) * 1000
+        self._full_latencies.add(full_ms)
+        metrics.observe("llm_cascade_full_latency_ms", full_ms, stage=self.stage)
+        return result, True
@@ -0,0 +1,315 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.memory import memory
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class GenAICacheBackend:
+    """Explicit Gemini context caches via ``client.aio.caches``."""
+
+    def __init__(self, client: Any = None):
+        self._client = client
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            from google import genai  # pylint: disable=import-error
+
+            self._client = genai.Client()
+        return self._client
+
+    async def create(
+        self, model: str, system_instruction: Optional[str], contents: Sequence[str], tools: Any, ttl_seconds: int
+    ) -> Tuple[str, float]:
+        from google.genai import types  # pylint: disable=import-error
+
+        config = types.CreateCachedContentConfig(
+            system_instruction=system_instruction or None,
+            contents=[_user_content(text) for text in contents] or None,
+            tools=tools or None,
+            ttl=f"{ttl_seconds}s",
+            display_name="askhr-prefix",
+        )
+        cached = await self._get_client().aio.caches.create(model=model, config=config)
+        return cached.name, _expire_at(cached, ttl_seconds)
+
+    async def refresh(self, name: str, ttl_seconds: int) -> float:
+        from google.genai import types  # pylint: disable=import-error
+
+        cached = await self._get_client().aio.caches.update(
+            name=name, config=types.UpdateCachedContentConfig(ttl=f"{ttl_seconds}s")
+        )
+        return _expire_at(cached, ttl_seconds)
+
+    async def delete(self, name: str) -> None:
+        await self._get_client().aio.caches.delete(name=name)
+
+
+class LocalCacheBackend:
+    """In-process stand-in for the caching API, for tests and offline runs.
+
+    Records every create/refresh/delete and can be told to fail, so the
+    manager's refresh and fallback paths can be exercised without Gemini.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[Tuple[str, str]] = []
+        self._counter = 0
+
+    async def create(
+        self, model: str, system_instruction: Optional[str], contents: Sequence[str], tools: Any, ttl_seconds: int
+    ) -> Tuple[str, float]:
+        self._check()
+        self._counter += 1
+        name = f"local/cachedContents/{self._counter}"
+        expire_at = time.time() + ttl_seconds
+        self.caches[name] = {
+            "model": model,
+            "system_instruction": system_instruction,
+            "contents": list(contents),
+            "expire_at": expire_at,
+        }
+        self.calls.append(("create", name))
+        return name, expire_at
+
+    async def refresh(self, name: str, ttl_seconds: int) -> float:
+        self._check()
+        if name not in self.caches:
+            raise KeyError(name)
+        expire_at = time.time() + ttl_seconds
+        self.caches[name]["expire_at"] = expire_at
+        self.calls.append(("refresh", name))
+        return expire_at
+
+    async def delete(self, name: str) -> None:
+        self.caches.pop(name, None)
+        self.calls.append(("delete", name))
+
+    def _check(self) -> None:
+        if self.fail:
+            raise RuntimeError("context caching unavailable")
+
+
+class _Entry:
+    def __init__(self, name: Optional[str], expire_at: float):
+        self.name = name
+        self.expire_at = expire_at
+
+
+class ContextCacheManager:
+    """Registers stable prompt prefixes as cached content and reuses them.
+
+    A prefix is the system instruction, tool declarations and any fixed
+    leading contents (e.g. a user's profile block). The first request with a
+    prefix creates a cache; later requests reference it by name, and one
+    arriving within ``refresh_margin_seconds`` of expiry extends the TTL.
+    Prefixes under ``min_tokens`` are not cached, and any backend failure
+    returns None so the request goes out uncached; a prefix whose cache
+    could not be created is retried after ``retry_seconds``.
+    """
+
+    def __init__(
+        self,
+        backend: Any = None,
+        enabled: bool = True,
+        ttl_seconds: int = 3600,
+        refresh_margin_seconds: int = 300,
+        min_tokens: int = 2048,
+        max_entries: int = 256,
+        retry_seconds: int = 300,
+    ):
+        self.backend = backend or GenAICacheBackend()
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self.min_tokens = min_tokens
+        self.max_entries = max_entries
+        self.retry_seconds = retry_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    async def get(
+        self,
+        model: str,
+        system_instruction: Optional[str],
+        contents: Sequence[str] = (),
+        tools: Any = None,
+    ) -> Optional[str]:
+        """Return the cache name for this prefix, creating or refreshing it as needed."""
+        if not self.enabled or not model:
+            return None
+        tools_repr = _tools_repr(tools)
+        size = len(system_instruction or "") + sum(len(text) for text in contents) + len(tools_repr)
+        if size // 4 < self.min_tokens:
+            metrics.incr("context_cache_skipped_total", reason="too_small")
+            return None
+
+        key = _prefix_key(model, system_instruction, contents, tools_repr)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if entry.name is None:
+                    if now < entry.expire_at:
+                        metrics.incr("context_cache_skipped_total", reason="backoff")
+                        return None
+                elif now < entry.expire_at - self.refresh_margin_seconds:
+                    metrics.incr("context_cache_hits_total")
+                    return entry.name
+                elif now < entry.expire_at:
+                    return await self._refresh(entry)
+
+            return await self._create(key, model, system_instruction, contents, tools)
+
+    async def close(self) -> None:
+        """Delete every live cache (they would otherwise linger until their TTL)."""
+        entries, self._entries = list(self._entries.values()), OrderedDict()
+        for entry in entries:
+            if entry.name is not None and entry.expire_at > time.time():
+                await self._delete(entry.name)
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        live = [entry for entry in self._entries.values() if entry.name is not None and entry.expire_at > now]
+        return {"enabled": self.enabled, "entries": len(self._entries), "live": len(live)}
+
+    def before_model_callback(self, prefix: Optional[Callable[[], Optional[str]]] = None):
+        """ADK ``before_model_callback`` that applies this manager to each LLM request.
+
+        ``prefix`` returns optional leading text (such as a user profile
+        block) that belongs in the cached prefix; when no cache is used it is
+        inlined at the start of the request contents instead.
+        """
+
+        async def _callback(callback_context: Any, llm_request: Any) -> None:
+            text = prefix() if prefix is not None else None
+            await self.apply(llm_request, [text] if text else [])
+            return None
+
+        return _callback
+
+    async def apply(self, llm_request: Any, prefix_contents: Sequence[str] = ()) -> bool:
+        config = llm_request.config
+        name = await self.get(
+            llm_request.model,
+            _instruction_text(config.system_instruction),
+            prefix_contents,
+            config.tools,
+        )
+        if name is None:
+            if prefix_contents:
+                llm_request.contents[:0] = [_user_content(text) for text in prefix_contents]
+            return False
+        # Cached content carries the instruction and tools; the API rejects them twice.
+        config.cached_content = name
+        config.system_instruction = None
+        config.tools = None
+        config.tool_config = None
+        return True
+
+    async def _create(
+        self, key: str, model: str, system_instruction: Optional[str], contents: Sequence[str], tools: Any
+    ) -> Optional[str]:
+        started = time.perf_counter()
+        try:
+            name, expire_at = await self.backend.create(model, system_instruction, contents, tools, self.ttl_seconds)
+        except Exception as exc:
+            metrics.incr("context_cache_errors_total", op="create")
+            logger.warning("Context cache create failed for %s; sending uncached: %s", model, exc)
+            self._store(key, _Entry(None, time.time() + self.retry_seconds))
+            return None
+        metrics.incr("context_cache_creates_total")
+        metrics.observe("context_cache_create_ms", (time.perf_counter() - started) * 1000)
+        self._store(key, _Entry(name, expire_at))
+        return name
+
+    async def _refresh(self, entry: _Entry) -> Optional[str]:
+        try:
+            entry.expire_at = await self.backend.refresh(entry.name, self.ttl_seconds)
+        except Exception as exc:
+            metrics.incr("context_cache_errors_total", op="refresh")
+            logger.warning("Context cache refresh failed for %s: %s", entry.name, exc)
+        else:
+            metrics.incr("context_cache_refreshes_total")
+        # Still valid either way; the next request past expiry recreates it.
+        return entry.name
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            old_key, old_entry = self._entries.popitem(last=False)
+            self._locks.pop(old_key, None)
+            if old_entry.name is not None:
+                asyncio.get_running_loop().create_task(self._delete(old_entry.name))
+        metrics.set_gauge("context_cache_entries", len(self._entries))
+
+    async def _delete(self, name: str) -> None:
+        try:
+            await self.backend.delete(name)
+        except Exception as exc:
+            logger.debug("Context cache delete failed for %s: %s", name, exc)
+
+
+def _build_manager() -> ContextCacheManager:
+    backend = LocalCacheBackend() if settings.CONTEXT_CACHE_BACKEND == "local" else GenAICacheBackend()
+    return ContextCacheManager(
+        backend=backend,
+        enabled=settings.CONTEXT_CACHE_ENABLED,
+        ttl_seconds=settings.CONTEXT_CACHE_TTL_SECONDS,
+        refresh_margin_seconds=settings.CONTEXT_CACHE_REFRESH_MARGIN_SECONDS,
+        min_tokens=settings.CONTEXT_CACHE_MIN_TOKENS,
+        max_entries=settings.CONTEXT_CACHE_MAX_ENTRIES,
+        retry_seconds=settings.CONTEXT_CACHE_RETRY_SECONDS,
+    )
+
+
+context_cache = _build_manager()
+memory.register("context_cache", count=lambda: len(context_cache._entries), root=lambda: context_cache._entries)
+
+
+def _prefix_key(model: str, system_instruction: Optional[str], contents: Sequence[str], tools_repr: str) -> str:
+    payload = json.dumps([model, system_instruction or "", list(contents), tools_repr])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _tools_repr(tools: Any) -> str:
+    if not tools:
+        return ""
+    parts = []
+    for tool in tools:
+        dump = getattr(tool, "model_dump_json", None)
+        parts.append(dump(exclude_none=True) if dump else repr(tool))
+    return "|".join(parts)
+
+
+def _instruction_text(instruction: Any) -> Optional[str]:
+    if instruction is None or isinstance(instruction, str):
+        return instruction
+    parts = getattr(instruction, "parts", None) or []
+    return "".join(getattr(part, "text", None) or "" for part in parts)
+
+
+def _user_content(text: str) -> Any:
+    from google.genai import types  # pylint: disable=import-error
+
+    return types.Content(role="user", parts=[types.Part.from_text(text=text)])
+
+
+def _expire_at(cached: Any, ttl_seconds: int) -> float:
+    expire_time = getattr(cached, "expire_time", None)
+    if expire_time is not None:
+        return expire_time.timestamp()
+    return time.time() + ttl_seconds
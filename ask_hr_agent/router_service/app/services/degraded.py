@@ -0,0 +1,94 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.metrics import metrics
+
+DEGRADED_PREFIX = (
+    "Our answer service is busy right now, so here are the most relevant passages "
+    "from the HR documents:"
+)
+
+_OVERLOAD_MARKERS = ("429", "resource exhausted", "resource_exhausted", "quota", "503", "overloaded", "unavailable")
+
+
+class AnswerLoadGuard:
+    """Decides when RAG answers should skip generation and serve retrieved text.
+
+    Generation is skipped while every concurrency slot is taken, and for a
+    cooldown period after repeated deadline misses or overload errors.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        trip_threshold: Optional[int] = None,
+        window_seconds: float = 60.0,
+        cooldown_seconds: Optional[float] = None,
+    ):
+        self.enabled = settings.RAG_DEGRADED_MODE_ENABLED
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.trip_threshold = trip_threshold or settings.RAG_DEGRADED_TRIP_THRESHOLD
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = (
+            settings.RAG_DEGRADED_COOLDOWN_SECONDS if cooldown_seconds is None else cooldown_seconds
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._inflight = 0
+        self._failures: Deque[float] = deque()
+        self._degraded_until = 0.0
+
+    def degrade_reason(self) -> Optional[str]:
+        if not self.enabled:
+            return None
+        if time.monotonic() < self._degraded_until:
+            return "cooldown"
+        if self._semaphore.locked():
+            return "concurrency"
+        return None
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        async with self._semaphore:
+            self._inflight += 1
+            metrics.set_gauge("llm_answer_inflight", self._inflight)
+            try:
+                yield
+            finally:
+                self._inflight -= 1
+                metrics.set_gauge("llm_answer_inflight", self._inflight)
+
+    def record_failure(self, reason: str) -> None:
+        now = time.monotonic()
+        metrics.incr("rag_answer_failures_total", reason=reason)
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window_seconds:
+            self._failures.popleft()
+        if len(self._failures) >= self.trip_threshold:
+            self._degraded_until = now + self.cooldown_seconds
+            self._failures.clear()
+            metrics.incr("rag_degraded_trips_total")
+
+    def record_success(self) -> None:
+        self._failures.clear()
+
+    @staticmethod
+    def is_overload_error(exc: BaseException) -> bool:
+        text = str(exc).lower()
+        return any(marker in text for marker in _OVERLOAD_MARKERS)
+
+
+def build_extract(contexts: List[str], citations: List[Dict], limit: int, snippet_chars: int = 500) -> str:
+    """Format the top retrieved snippets as a cited, answer-shaped extract."""
+    lines = [DEGRADED_PREFIX, ""]
+    for index, context in enumerate(contexts[:limit]):
+        snippet = " ".join(str(context).split())
+        if len(snippet) > snippet_chars:
+            snippet = snippet[:snippet_chars].rsplit(" ", 1)[0] + "..."
+        citation = citations[index] if index < len(citations) else {}
+        title = citation.get("title") or "Document"
+        lines.append(f'{index + 1}. "{snippet}" ({title})')
+    return "\n".join(lines)
@@ -0,0 +1,233 @@
+"""Precomputed answers for frequent HR questions, served without any LLM call.
+
+Build the table offline by running the canonical questions through the real
+routing + RAG pipeline::
+
+    python -m app.services.faq build --questions faq_questions.txt
+
+Only answers that were routed to RAG and actually answered are stored, so no
+personal Workday data ever lands in the table.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.memory import memory
+from app.metrics import metrics
+from app.models.dto import ChatResponse, Citation
+
+logger = logging.getLogger(__name__)
+
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "do", "does", "did", "what", "whats", "when",
+    "where", "which", "who", "how", "i", "me", "my", "we", "our", "you", "your", "can", "could", "to",
+    "of", "for", "in", "on", "at", "and", "or", "it", "its", "this", "that", "there", "please", "tell",
+    "about", "with", "will", "would", "should",
+}
+_NON_WORD = re.compile(r"[^a-z0-9\s]")
+
+
+def normalize_question(text: str) -> str:
+    cleaned = _NON_WORD.sub(" ", (text or "").lower().replace("'", ""))
+    return " ".join(cleaned.split())
+
+
+def question_terms(text: str) -> Set[str]:
+    return {token for token in normalize_question(text).split() if token not in _STOPWORDS}
+
+
+class FaqEntry(BaseModel):
+    question: str
+    answer: str
+    citations: List[Citation] = Field(default_factory=list)
+    corpus_version: str = ""
+    built_at: Optional[str] = None
+
+
+class FaqStore:
+    """FAQ table with an exact normalised lookup and a lexical fallback.
+
+    The fallback scores candidates sharing at least one term by Jaccard
+    similarity of their term sets. Entries built against a different corpus
+    version than ``RAG_CORPUS_VERSION`` are ignored, and the file is reloaded
+    when its mtime changes.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: Optional[float] = None):
+        self.path = Path(path or settings.FAQ_STORE_PATH)
+        self.threshold = settings.FAQ_MATCH_THRESHOLD if threshold is None else threshold
+        self.corpus_version = settings.RAG_CORPUS_VERSION
+        self._entries: List[FaqEntry] = []
+        self._exact: Dict[str, int] = {}
+        self._terms: List[Set[str]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._loaded_mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def match(self, query: str) -> Optional[Tuple[FaqEntry, float, str]]:
+        """Return ``(entry, score, kind)`` for the best match, or None."""
+        self._maybe_reload()
+        if not self._entries:
+            return None
+
+        index = self._exact.get(normalize_question(query))
+        if index is not None:
+            return self._entries[index], 1.0, "exact"
+
+        terms = question_terms(query)
+        if not terms:
+            return None
+        candidates: Set[int] = set()
+        for term in terms:
+            candidates |= self._postings.get(term, set())
+
+        best: Optional[Tuple[int, float]] = None
+        for candidate in candidates:
+            entry_terms = self._terms[candidate]
+            score = len(terms & entry_terms) / len(terms | entry_terms)
+            if best is None or score > best[1]:
+                best = (candidate, score)
+        if best is None or best[1] < self.threshold:
+            return None
+        return self._entries[best[0]], best[1], "lexical"
+
+    def answer(self, query: str) -> Optional[ChatResponse]:
+        started = time.perf_counter()
+        found = self.match(query)
+        if found is None:
+            metrics.incr("faq_misses_total")
+            return None
+        entry, score, kind = found
+        metrics.incr("faq_hits_total", kind=kind)
+        metrics.observe("faq_match_ms", (time.perf_counter() - started) * 1000)
+        return ChatResponse(
+            reply_text=entry.answer,
+            citations=[citation.model_copy() for citation in entry.citations],
+            metadata={"agent": "faq", "faq_match": kind, "faq_score": round(score, 3)},
+        )
+
+    def invalidate(self, corpus_version: Optional[str] = None) -> int:
+        """Drop entries that don't belong to ``corpus_version`` (all entries if None)."""
+        if corpus_version is None:
+            dropped = len(self._entries)
+            self._index([])
+        else:
+            self.corpus_version = corpus_version
+            kept = [entry for entry in self._entries if entry.corpus_version == corpus_version]
+            dropped = len(self._entries) - len(kept)
+            self._index(kept)
+        metrics.incr("faq_invalidated_total", dropped)
+        logger.info("FAQ invalidated: dropped %d entries", dropped)
+        return dropped
+
+    def reload(self) -> int:
+        self._loaded_mtime = None
+        self._checked_at = 0.0
+        self._maybe_reload()
+        return len(self._entries)
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < settings.FAQ_RELOAD_CHECK_SECONDS and self._loaded_mtime is not None:
+            return
+        self._checked_at = now
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return
+        if mtime == self._loaded_mtime:
+            return
+        self._loaded_mtime = mtime
+        try:
+            with open(self.path, "r", encoding="utf-8") as handle:
+                raw = json.load(handle)
+            entries = [FaqEntry(**item) for item in raw.get("entries", [])]
+        except Exception as exc:
+            logger.error("Failed to load FAQ store %s: %s", self.path, exc)
+            return
+        if self.corpus_version:
+            entries = [entry for entry in entries if entry.corpus_version == self.corpus_version]
+        self._index(entries)
+        logger.info("Loaded %d FAQ entries from %s", len(entries), self.path)
+
+    def _index(self, entries: List[FaqEntry]) -> None:
+        self._entries = entries
+        self._exact = {normalize_question(entry.question): i for i, entry in enumerate(entries)}
+        self._terms = [question_terms(entry.question) for entry in entries]
+        self._postings = {}
+        for i, terms in enumerate(self._terms):
+            for term in terms:
+                self._postings.setdefault(term, set()).add(i)
+        metrics.set_gauge("faq_entries", len(entries))
+
+
+faq_store = FaqStore()
+memory.register("faq", count=faq_store.__len__, root=lambda: faq_store._entries)
+
+
+async def build_store(questions: List[str], output: Path) -> int:
+    """Answer each question through the live pipeline and write the FAQ table."""
+    from app.models.dto import UserContext
+    from app.services.rag_answer import RagAnswerAgent
+    from app.services.router_service import RouterAgent
+
+    router = RouterAgent()
+    user = UserContext(user_id="faq-builder", worker_id="FAQ", email="", name="FAQ builder")
+    built_at = datetime.now(timezone.utc).isoformat()
+    entries: List[Dict] = []
+    for question in questions:
+        session_id = f"faq-{len(entries)}-{int(time.time())}"
+        session_state = {"history": [], "last_route": None, "awaiting_workday": False}
+        response = await router.route_and_process(question, user, session_state, session_id, use_faq=False)
+        metadata = response.metadata or {}
+        if metadata.get("route") != "rag" or metadata.get("degraded") or metadata.get("error"):
+            logger.warning("Skipping FAQ question (route=%s): %s", metadata.get("route"), question)
+            continue
+        if not RagAnswerAgent.is_answered(response.reply_text):
+            logger.warning("Skipping unanswered FAQ question: %s", question)
+            continue
+        entries.append(FaqEntry(
+            question=question,
+            answer=response.reply_text,
+            citations=response.citations,
+            corpus_version=settings.RAG_CORPUS_VERSION,
+            built_at=built_at,
+        ).model_dump())
+
+    tmp_path = output.with_suffix(output.suffix + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump({"corpus_version": settings.RAG_CORPUS_VERSION, "built_at": built_at, "entries": entries}, handle, indent=2)
+    os.replace(tmp_path, output)
+    return len(entries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build the AskHR FAQ answer table.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    build = subcommands.add_parser("build", help="Answer canonical questions through the live pipeline.")
+    build.add_argument("--questions", required=True, help="Text file with one question per line.")
+    build.add_argument("--output", default=settings.FAQ_STORE_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.questions, "r", encoding="utf-8") as handle:
+        questions = [line.strip() for line in handle if line.strip() and not line.startswith("#")]
+    count = asyncio.run(build_store(questions, Path(args.output)))
+    print(f"Wrote {count} of {len(questions)} FAQ answers to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import logging
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationProfile(BaseModel):
+    """Model and decoding settings for one agent."""
+
+    name: str
+    model: str
+    temperature: Optional[float] = None
+    thinking_budget: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+    structured_output: bool = False
+    instruction: Optional[str] = None
+
+
+def get_profile(name: str) -> GenerationProfile:
+    if name == "router":
+        return GenerationProfile(
+            name=name,
+            model=settings.ROUTER_MODEL,
+            temperature=settings.ROUTER_TEMPERATURE,
+            thinking_budget=settings.ROUTER_THINKING_BUDGET,
+            max_output_tokens=settings.ROUTER_MAX_OUTPUT_TOKENS,
+            structured_output=settings.ROUTER_STRUCTURED_OUTPUT,
+        )
+    if name == "rag_answer":
+        return GenerationProfile(
+            name=name,
+            model=settings.RAG_ANSWER_MODEL or settings.ROUTER_MODEL,
+            temperature=settings.RAG_ANSWER_TEMPERATURE,
+            thinking_budget=settings.RAG_ANSWER_THINKING_BUDGET,
+            max_output_tokens=settings.RAG_ANSWER_MAX_OUTPUT_TOKENS,
+        )
+    if name == "router_fast":
+        return get_profile("router").model_copy(update={"name": name, "model": settings.ROUTER_FAST_MODEL})
+    if name == "rag_answer_fast":
+        return get_profile("rag_answer").model_copy(update={"name": name, "model": settings.RAG_ANSWER_FAST_MODEL})
+    if name == "router_shadow":
+        return get_profile("router").model_copy(update={
+            "name": name,
+            "model": settings.SHADOW_ROUTER_MODEL or settings.ROUTER_MODEL,
+            "instruction": _read_instruction(settings.SHADOW_ROUTER_INSTRUCTION_FILE),
+        })
+    if name == "rag_answer_shadow":
+        base = get_profile("rag_answer")
+        return base.model_copy(update={
+            "name": name,
+            "model": settings.SHADOW_RAG_ANSWER_MODEL or base.model,
+            "instruction": _read_instruction(settings.SHADOW_RAG_ANSWER_INSTRUCTION_FILE),
+        })
+    raise ValueError(f"Unknown generation profile: {name}")
+
+
+def _read_instruction(path: str) -> Optional[str]:
+    if not path:
+        return None
+    with open(path, "r", encoding="utf-8") as handle:
+        return handle.read()
+
+
+def build_agent_kwargs(
+    profile: GenerationProfile, output_schema: Optional[Type[BaseModel]] = None
+) -> Dict[str, Any]:
+    """Translate a profile into LlmAgent keyword arguments.
+
+    ADK rejects thinking config and response schemas inside
+    ``generate_content_config``, so they go through ``planner`` and
+    ``output_schema`` instead.
+    """
+    from google.adk.models import Gemini  # pylint: disable=import-error
+    from google.adk.planners import BuiltInPlanner  # pylint: disable=import-error
+    from google.genai import types  # pylint: disable=import-error
+
+    config_kwargs: Dict[str, Any] = {}
+    if profile.temperature is not None:
+        config_kwargs["temperature"] = profile.temperature
+    if profile.max_output_tokens:
+        config_kwargs["max_output_tokens"] = profile.max_output_tokens
+
+    kwargs: Dict[str, Any] = {
+        "model": Gemini(model=profile.model),
+        "generate_content_config": types.GenerateContentConfig(**config_kwargs),
+    }
+    if profile.thinking_budget is not None:
+        kwargs["planner"] = BuiltInPlanner(
+            thinking_config=types.ThinkingConfig(thinking_budget=profile.thinking_budget)
+        )
+    if profile.structured_output and output_schema is not None:
+        kwargs["output_schema"] = output_schema
+
+    logger.info("Generation profile %s: %s", profile.name, profile.model_dump(exclude={"instruction"}))
+    return kwargs
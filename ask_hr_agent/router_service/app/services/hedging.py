@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable, Optional, Tuple, TypeVar
+
+from app.config import settings
+from app.metrics import LatencyWindow, metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Hedger:
+    """Issues a duplicate LLM call when the first one is slower than usual.
+
+    The hedge fires once the primary call has been outstanding longer than the
+    configured percentile of recent latencies. Whichever attempt finishes first
+    wins and the other one is cancelled. Hedges are paid for from a token
+    bucket that earns ``budget_ratio`` tokens per call, so at most that
+    fraction of calls is ever duplicated. Only use this for idempotent calls.
+    """
+
+    def __init__(
+        self,
+        stage: str,
+        enabled: Optional[bool] = None,
+        percentile: Optional[float] = None,
+        min_delay_ms: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        budget_ratio: Optional[float] = None,
+        budget_burst: float = 5.0,
+    ):
+        self.stage = stage
+        self.enabled = settings.LLM_HEDGING_ENABLED if enabled is None else enabled
+        self.percentile = settings.LLM_HEDGE_PERCENTILE if percentile is None else percentile
+        self.min_delay_ms = settings.LLM_HEDGE_MIN_DELAY_MS if min_delay_ms is None else min_delay_ms
+        self.min_samples = settings.LLM_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+        self.budget_ratio = settings.LLM_HEDGE_BUDGET_RATIO if budget_ratio is None else budget_ratio
+        self.budget_burst = budget_burst
+        self._budget = 0.0
+        self._latencies = LatencyWindow()
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None when hedging is off or not calibrated yet."""
+        if not self.enabled or len(self._latencies) < self.min_samples:
+            return None
+        delay_ms = max(self.min_delay_ms, self._latencies.percentile(self.percentile))
+        return delay_ms / 1000.0
+
+    async def call(self, attempt: Callable[[int], Awaitable[T]]) -> T:
+        """Run ``attempt(0)`` and, if it is slow, race it against ``attempt(1)``."""
+        metrics.incr("llm_hedge_calls_total", stage=self.stage)
+        self._budget = min(self.budget_burst, self._budget + self.budget_ratio)
+        started = time.perf_counter()
+        delay = self.hedge_delay()
+
+        if delay is None:
+            result = await attempt(0)
+            self._record(started)
+            return result
+
+        primary = asyncio.ensure_future(attempt(0))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                result = primary.result()
+                self._record(started)
+                return result
+
+            if self._budget < 1.0:
+                metrics.incr("llm_hedge_budget_denied_total", stage=self.stage)
+                result = await primary
+                self._record(started)
+                return result
+
+            self._budget -= 1.0
+            metrics.incr("llm_hedges_issued_total", stage=self.stage)
+            logger.info("Hedging %s call after %.0f ms", self.stage, delay * 1000)
+            hedge = asyncio.ensure_future(attempt(1))
+            tasks.append(hedge)
+
+            result, winner = await self._first_success(tasks)
+            if winner is hedge:
+                metrics.incr("llm_hedge_wins_total", stage=self.stage)
+            else:
+                metrics.incr("llm_hedge_primary_wins_total", stage=self.stage)
+            self._record(started)
+            return result
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    @staticmethod
+    async def _first_success(tasks: Iterable["asyncio.Future[T]"]) -> Tuple[T, "asyncio.Future[T]"]:
+        pending = set(tasks)
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.cancelled():
+                    continue
+                error = task.exception()
+                if error is None:
+                    return task.result(), task
+                last_error = error
+        if last_error is not None:
+            raise last_error
+        raise asyncio.CancelledError()
+
+    def _record(self, started: float) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._latencies.add(elapsed_ms)
+        metrics.observe("llm_call_latency_ms", elapsed_ms, stage=self.stage)
@@ -1,9 +1,21 @@
 import asyncio
+import hashlib
 import logging
 import os
-from typing import Any, List, Optional
+import re
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.config import settings
+from app.memory import register_adk_runners
+from app.services.cascade import Cascade
+from app.services.context_cache import context_cache
+from app.services.generation import build_agent_kwargs, get_profile
+from app.services.hedging import Hedger
+from app.services.shadow import answer_similarity, shadow_traffic
+from app.services.token_usage import add_usage, stage_for_profile, token_usage, usage_from_event
+from app.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +25,14 @@ Use only the provided context to answer the question.
 If the context does not contain the answer, say: "I cannot find the information in the provided documents."
 """
 
+APP_NAME = "ask_hr_rag_answer"
+
+# Only the refusal SYSTEM_INSTRUCTION prescribes; negative answers ("the plan does not include ...") are answers.
+_UNANSWERED_PATTERN = re.compile(
+    r"\b(cannot|can't|could not|couldn't|unable to) find (the |any |this |that )?information in the provided documents",
+    re.IGNORECASE,
+)
+
 
 class RagAnswerAgent:
     def __init__(self):
@@ -20,25 +40,34 @@ class RagAnswerAgent:
         self._genai_loaded = False
         self._LlmAgent = None
         self._Gemini = None
-        self._InMemoryRunner = None
+        self._Runner = None
+        self._Event = None
+        self._session_service = None
         self._adk_vertexai = None
         self._types = None
         self._ensure_vertex_env()
-        self._agent = None
-        self._runner = None
+        self._runners: Dict[str, Any] = {}
+        self._hedgers = {name: Hedger(name) for name in ("rag_answer", "rag_answer_fast")}
+        self._cascade = Cascade("rag_answer")
+        register_adk_runners("adk_sessions.rag_answer", self._runners.values)
 
     def _load_genai(self) -> None:
         if self._genai_loaded:
             return
         from google.adk.agents import LlmAgent  # pylint: disable=import-error
         from google.adk.dependencies import vertexai as adk_vertexai  # pylint: disable=import-error
+        from google.adk.events import Event  # pylint: disable=import-error
         from google.adk.models import Gemini  # pylint: disable=import-error
-        from google.adk.runners import InMemoryRunner  # pylint: disable=import-error
+        from google.adk.runners import Runner  # pylint: disable=import-error
+        from google.adk.sessions import InMemorySessionService  # pylint: disable=import-error
         from google.genai import types  # pylint: disable=import-error
 
         self._LlmAgent = LlmAgent
         self._Gemini = Gemini
-        self._InMemoryRunner = InMemoryRunner
+        self._Runner = Runner
+        self._Event = Event
+        # One session store for every profile, so cascade tiers and the shadow see the same conversation.
+        self._session_service = InMemorySessionService()
         self._adk_vertexai = adk_vertexai
         self._types = types
         self._genai_loaded = True
@@ -57,47 +86,213 @@ class RagAnswerAgent:
         )
         self._vertex_initialized = True
 
-    def _build_agent(self):
+    def _build_agent(self, profile_name: str):
+        profile = get_profile(profile_name)
         return self._LlmAgent(
-            name="ask_hr_rag_answer",
-            model=self._Gemini(model=settings.ROUTER_MODEL),
-            instruction=SYSTEM_INSTRUCTION,
-            generate_content_config=self._types.GenerateContentConfig(temperature=0.2),
+            name=APP_NAME,
+            instruction=profile.instruction or SYSTEM_INSTRUCTION,
+            before_model_callback=context_cache.before_model_callback(),
+            **build_agent_kwargs(profile),
         )
 
-    def _ensure_agent(self) -> None:
-        if self._agent is None:
-            self._agent = self._build_agent()
-            self._runner = self._InMemoryRunner(self._agent, app_name="ask_hr_rag_answer")
+    def _get_runner(self, profile_name: str):
+        runner = self._runners.get(profile_name)
+        if runner is None:
+            runner = self._Runner(
+                app_name=APP_NAME,
+                agent=self._build_agent(profile_name),
+                session_service=self._session_service,
+            )
+            self._runners[profile_name] = runner
+        return runner
 
-    async def answer(self, query: str, contexts: List[str], user_id: str, session_id: str) -> str:
+    async def answer(self, query: str, contexts: List[str], user_id: str, session_id: str) -> Tuple[str, str]:
+        """Return the reply and the model that produced it (the cascade may serve the fast one)."""
         self._ensure_vertex_init()
-        self._ensure_agent()
         safe_user_id = user_id or "anonymous"
-        await self._ensure_session(safe_user_id, session_id)
+        prompt = self._build_prompt(query, contexts)
+
+        started = time.perf_counter()
+        served_by = "rag_answer"
+        if settings.RAG_ANSWER_CASCADE_ENABLED:
+            (reply_text, events), escalated = await self._cascade.run(
+                lambda: self._call("rag_answer_fast", prompt, safe_user_id, session_id),
+                lambda: self._call("rag_answer", prompt, safe_user_id, session_id),
+                lambda result: self.is_answered(result[0]),
+            )
+            served_by = "rag_answer" if escalated else "rag_answer_fast"
+            logger.info("RAG answer served by %s model", "full" if escalated else "fast")
+        else:
+            reply_text, events = await self._call("rag_answer", prompt, safe_user_id, session_id)
+        # Only the served tier's turn joins the conversation; a rejected fast answer is dropped.
+        await self._commit_turn(self._session_service, safe_user_id, session_id, events)
+
+        self._mirror_to_shadow(prompt, safe_user_id, session_id, reply_text, time.perf_counter() - started)
+        return reply_text, get_profile(served_by).model
+
+    async def history_key(self, user_id: str, session_id: str) -> str:
+        """Digest of the conversation so far; answers depend on it, so it is part of the answer cache key."""
+        self._ensure_vertex_init()
+        live = await self._session_service.get_session(
+            app_name=APP_NAME, user_id=user_id or "anonymous", session_id=session_id
+        )
+        digest = hashlib.sha256()
+        for event in live.events if live else []:
+            digest.update(f"{event.author}\x1f{self._extract_text(event.content)}\x1e".encode("utf-8"))
+        return digest.hexdigest()
+
+    async def record_cached_turn(
+        self, query: str, contexts: List[str], user_id: str, session_id: str, reply_text: str
+    ) -> None:
+        """Append a turn answered from the cache to the conversation, so follow-ups keep their context."""
+        self._ensure_vertex_init()
+        invocation_id = f"e-{uuid.uuid4()}"
+        events = [
+            self._Event(
+                invocation_id=invocation_id,
+                author="user",
+                content=self._types.Content(
+                    role="user", parts=[self._types.Part.from_text(text=self._build_prompt(query, contexts))]
+                ),
+            ),
+            self._Event(
+                invocation_id=invocation_id,
+                author=APP_NAME,
+                content=self._types.Content(role="model", parts=[self._types.Part.from_text(text=reply_text)]),
+            ),
+        ]
+        await self._commit_turn(self._session_service, user_id or "anonymous", session_id, events)
+
+    @staticmethod
+    def _build_prompt(query: str, contexts: List[str]) -> str:
         context_block = "\n\n".join(contexts)
-        prompt = f"Question:\n{query}\n\nContext:\n{context_block}"
+        return f"Question:\n{query}\n\nContext:\n{context_block}"
+
+    def _mirror_to_shadow(self, prompt: str, user_id: str, session_id: str, reply_text: str, elapsed: float) -> None:
+        async def _shadow() -> Dict[str, Any]:
+            usage: Dict[str, int] = {}
+            shadow_session_id = f"{session_id}-shadow-{uuid.uuid4()}"
+            runner = self._get_runner("rag_answer_shadow")
+            try:
+                candidate = await self._run_prompt(
+                    "rag_answer_shadow", prompt, user_id, shadow_session_id, usage=usage
+                )
+            finally:
+                # Shadow sessions are single-use; without this they pile up in the in-memory session service.
+                await runner.session_service.delete_session(
+                    app_name=runner.app_name, user_id=user_id, session_id=shadow_session_id
+                )
+            return {
+                "agree": self.is_answered(candidate) == self.is_answered(reply_text),
+                "similarity": round(answer_similarity(reply_text, candidate), 3),
+                "production_chars": len(reply_text or ""),
+                "candidate_chars": len(candidate or ""),
+                "production_latency_ms": round(elapsed * 1000, 1),
+                "usage": usage,
+            }
+
+        shadow_traffic.mirror("rag_answer", _shadow)
+
+    async def _call(self, profile_name: str, prompt: str, user_id: str, session_id: str) -> Tuple[str, List[Any]]:
+        """Return the winning attempt's reply and new events; the caller commits them."""
+        async def _attempt(_attempt: int) -> Tuple[str, List[Any]]:
+            return await self._run_attempt(profile_name, prompt, user_id, session_id)
+
+        return await self._hedgers[profile_name].call(_attempt)
+
+    async def _run_attempt(
+        self, profile_name: str, prompt: str, user_id: str, session_id: str
+    ) -> Tuple[str, List[Any]]:
+        """Run the prompt on a copy of the conversation; return the reply and the turn's new events.
+
+        Primary and hedge see the same history, and a cancelled or failed
+        attempt never leaves a half-written turn in the live session.
+        """
+        runner = self._get_runner(profile_name)
+        fork_id, copied = await self._fork_session(runner, user_id, session_id)
+        try:
+            reply_text = await self._run_prompt(profile_name, prompt, user_id, fork_id)
+            fork = await runner.session_service.get_session(
+                app_name=runner.app_name, user_id=user_id, session_id=fork_id
+            )
+            return reply_text, list(fork.events[copied:]) if fork else []
+        finally:
+            await runner.session_service.delete_session(app_name=runner.app_name, user_id=user_id, session_id=fork_id)
+
+    async def _run_prompt(
+        self,
+        profile_name: str,
+        prompt: str,
+        user_id: str,
+        session_id: str,
+        usage: Optional[Dict[str, int]] = None,
+    ) -> str:
+        runner = self._get_runner(profile_name)
+        await self._ensure_session(runner, user_id, session_id)
         content = self._types.Content(
             role="user",
             parts=[self._types.Part.from_text(text=prompt)],
         )
 
         reply_text = ""
-        async for event in self._runner.run_async(
-            user_id=safe_user_id,
-            session_id=session_id,
-            new_message=content,
-        ):
-            if event.is_final_response():
-                reply_text = self._extract_text(event.content) or reply_text
-                if event.error_message:
-                    reply_text = event.error_message
+        call_usage: Dict[str, int] = {}
+        model = get_profile(profile_name).model
+        with tracer.span("llm.rag_answer", profile=profile_name, model=model):
+            try:
+                async for event in runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=content,
+                ):
+                    add_usage(call_usage, usage_from_event(event))
+                    if event.is_final_response():
+                        reply_text = self._extract_text(event.content) or reply_text
+                        if event.error_message:
+                            # Raised, never returned as the reply: the cascade escalates on it and the
+                            # load guard recognises quota and overload errors.
+                            raise RuntimeError(event.error_message)
+            finally:
+                # Cancelled hedge losers still count: their tokens were billed up to the cancel.
+                token_usage.record(stage_for_profile(profile_name), model, user_id, call_usage)
+                if usage is not None:
+                    add_usage(usage, call_usage)
 
         return reply_text
 
-    async def _ensure_session(self, user_id: str, session_id: str) -> None:
-        session_service = self._runner.session_service
-        app_name = self._runner.app_name
+    @staticmethod
+    def is_answered(reply_text: str) -> bool:
+        """Self-check used by the cascade: empty or "cannot find" replies escalate."""
+        text = (reply_text or "").strip()
+        return bool(text) and _UNANSWERED_PATTERN.search(text) is None
+
+    @staticmethod
+    async def _fork_session(runner: Any, user_id: str, session_id: str) -> Tuple[str, int]:
+        """Create a throwaway copy of the session; return its id and the number of events copied."""
+        session_service = runner.session_service
+        live = await session_service.get_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+        fork = await session_service.create_session(
+            app_name=runner.app_name,
+            user_id=user_id,
+            session_id=f"{session_id}-attempt-{uuid.uuid4()}",
+        )
+        events = list(live.events) if live else []
+        for event in events:
+            await session_service.append_event(fork, event)
+        return fork.id, len(events)
+
+    @staticmethod
+    async def _commit_turn(session_service: Any, user_id: str, session_id: str, events: List[Any]) -> None:
+        """Append the served attempt's events to the conversation's session."""
+        live = await session_service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        if live is None:
+            live = await session_service.create_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        for event in events:
+            await session_service.append_event(live, event)
+
+    @staticmethod
+    async def _ensure_session(runner: Any, user_id: str, session_id: str) -> None:
+        session_service = runner.session_service
+        app_name = runner.app_name
         session = await session_service.get_session(
             app_name=app_name,
             user_id=user_id,
@@ -1,32 +1,47 @@
+import asyncio
+import hashlib
 import logging
 from typing import Any, List
 
-import httpx
-
+from app.config import settings
+from app.metrics import metrics
 from app.models.dto import ChatResponse
+from app.services.degraded import AnswerLoadGuard, build_extract
+from app.services.generation import get_profile
 from app.services.rag_answer import RagAnswerAgent
+from app.services.transports import TransportError, rag_transport
+from app.services.warm_cache import TTLCache, cache_snapshots
+from app.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
+answer_cache = cache_snapshots.register(TTLCache(
+    "rag_answers",
+    settings.RAG_ANSWER_CACHE_MAX_ENTRIES,
+    settings.RAG_ANSWER_CACHE_TTL_SECONDS,
+    corpus_version=settings.RAG_CORPUS_VERSION,
+))
+
 
 class RagService:
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip("/")
+        self._transport = rag_transport(self.base_url)
         self._answer_agent = RagAnswerAgent()
+        self._load_guard = AnswerLoadGuard()
 
     async def query(self, message: str, session_id: str, user_id: str) -> ChatResponse:
-        url = f"{self.base_url}/api/v1/rag/retrieve"
-        payload = {"query": message}
         try:
-            async with httpx.AsyncClient(timeout=30) as client:
-                resp = await client.post(url, json=payload)
-            if resp.status_code >= 400:
-                logger.error("RAG service error %s: %s", resp.status_code, resp.text)
-                return ChatResponse(
-                    reply_text="RAG service is unavailable right now. Please try again.",
-                    metadata={"agent": "rag", "error": "service_error"},
-                )
-            data = resp.json()
+            with tracer.span("rag.retrieve", kind="client", transport=self._transport.name) as span:
+                try:
+                    data = await self._transport.retrieve(message)
+                except TransportError as exc:
+                    span.set(status_code=exc.status_code)
+                    logger.error("RAG service error %s: %s", exc.status_code, exc.detail)
+                    return ChatResponse(
+                        reply_text="RAG service is unavailable right now. Please try again.",
+                        metadata={"agent": "rag", "error": "service_error"},
+                    )
             contexts = self._normalize_contexts(data.get("contexts"))
             citations = self._normalize_citations(data.get("citations"))
 
@@ -37,9 +52,54 @@ class RagService:
                     metadata={"agent": "rag"},
                 )
 
-            reply_text = await self._answer_agent.answer(message, contexts, user_id, session_id)
+            cached = None
+            history_key = ""
+            if settings.RAG_ANSWER_CACHE_ENABLED:
+                history_key = await self._answer_agent.history_key(user_id, session_id)
+                cached = answer_cache.get_first(
+                    self._answer_cache_key(model, message, contexts, history_key) for model in self._serving_models()
+                )
+            if cached is not None:
+                await self._answer_agent.record_cached_turn(
+                    message, contexts, user_id, session_id, cached["reply_text"]
+                )
+                return ChatResponse(
+                    reply_text=cached["reply_text"],
+                    citations=citations,
+                    metadata={"agent": "rag", "answer_cache": "hit"},
+                )
+
+            degrade_reason = self._load_guard.degrade_reason()
+            if degrade_reason:
+                return self._degraded_response(contexts, citations, degrade_reason)
+
+            if not self._load_guard.enabled:
+                # No concurrency slot or deadline: generation runs exactly as it did before degraded mode.
+                reply_text, model = await self._answer_agent.answer(message, contexts, user_id, session_id)
+            else:
+                try:
+                    async with self._load_guard.slot():
+                        reply_text, model = await asyncio.wait_for(
+                            self._answer_agent.answer(message, contexts, user_id, session_id),
+                            timeout=settings.RAG_ANSWER_DEADLINE_SECONDS,
+                        )
+                    self._load_guard.record_success()
+                except asyncio.TimeoutError:
+                    logger.warning("RAG answer exceeded %.1fs deadline", settings.RAG_ANSWER_DEADLINE_SECONDS)
+                    self._load_guard.record_failure("deadline")
+                    return self._degraded_response(contexts, citations, "deadline")
+                except Exception as exc:
+                    if not self._load_guard.is_overload_error(exc):
+                        raise
+                    logger.warning("RAG answer generation overloaded: %s", exc)
+                    self._load_guard.record_failure("overload")
+                    return self._degraded_response(contexts, citations, "overload")
+
             if not reply_text:
                 reply_text = "I cannot find the information in the provided documents."
+            elif settings.RAG_ANSWER_CACHE_ENABLED and RagAnswerAgent.is_answered(reply_text):
+                cache_key = self._answer_cache_key(model, message, contexts, history_key)
+                answer_cache.set(cache_key, {"reply_text": reply_text})
 
             return ChatResponse(
                 reply_text=reply_text,
@@ -53,6 +113,32 @@ class RagService:
                 metadata={"agent": "rag", "error": "exception"},
             )
 
+    @staticmethod
+    def _serving_models() -> List[str]:
+        """Models whose cached answers the current configuration may serve, best first."""
+        models = [get_profile("rag_answer").model]
+        if settings.RAG_ANSWER_CASCADE_ENABLED:
+            models.append(get_profile("rag_answer_fast").model)
+        return models
+
+    @staticmethod
+    def _answer_cache_key(model: str, message: str, contexts: List[str], history_key: str) -> str:
+        # The answer is a function of the model that wrote it, the conversation so far, the question
+        # and the contexts it was grounded on.
+        normalized = " ".join(message.lower().split())
+        payload = "\n\x1e".join([model, history_key, normalized, *contexts])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _degraded_response(contexts: List[str], citations: List[dict], reason: str) -> ChatResponse:
+        metrics.incr("rag_degraded_responses_total", reason=reason)
+        limit = settings.RAG_DEGRADED_SNIPPETS
+        return ChatResponse(
+            reply_text=build_extract(contexts, citations, limit),
+            citations=citations[:limit],
+            metadata={"agent": "rag", "degraded": True, "degraded_reason": reason},
+        )
+
     @staticmethod
     def _normalize_contexts(contexts: Any) -> List[str]:
         if not contexts:
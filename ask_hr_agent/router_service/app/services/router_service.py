@@ -1,9 +1,12 @@
+import asyncio
 import logging
 import re
-from typing import Dict
+import time
+from typing import Awaitable, Dict, Tuple
 
 from app.config import settings
 from app.models.dto import ChatResponse, RouteDecision, UserContext
+from app.services.faq import faq_store
 from app.services.rag_service import RagService
 from app.services.routing import RoutingAgent
 from app.services.workday_tools import WorkdayToolsService
@@ -25,6 +28,7 @@ class RouterAgent:
         user_context: UserContext,
         session_state: Dict,
         session_id: str,
+        use_faq: bool = True,
     ) -> ChatResponse:
         history = session_state.get("history", []) if isinstance(session_state, dict) else []
         q = query.strip().lower()
@@ -36,7 +40,22 @@ class RouterAgent:
             )
 
         user_id = user_context.user_id or "anonymous"
-        if self._should_force_workday(query, session_state):
+        force_workday = self._should_force_workday(query, session_state)
+        if use_faq and settings.FAQ_ENABLED and not force_workday:
+            faq_response = faq_store.answer(query)
+            if faq_response is not None:
+                faq_response.metadata.update({
+                    "route": "rag",
+                    "route_reason": "FAQ match",
+                    "route_confidence": faq_response.metadata.get("faq_score"),
+                })
+                return faq_response
+
+        if settings.WORKDAY_PREWARM_MODE != "off" and RoutingAgent.looks_workday_bound(query):
+            # Overlap Workday warm-up with the routing LLM call.
+            self.workday_tools.prewarm()
+
+        if force_workday:
             decision = RouteDecision(
                 route="workday",
                 reason="Follow-up to Workday prompt",
@@ -45,10 +64,14 @@ class RouterAgent:
         else:
             decision = await self.routing_agent.decide_route(query, user_id, session_id, history)
 
-        if decision.route == "workday":
-            response = await self.workday_tools.chat(query)
+        if decision.route == "both":
+            response = await self._fan_out(decision, session_id, user_id)
+        elif decision.route == "workday":
+            response, workday_ms = await self._timed(self.workday_tools.chat(query, user_id))
+            response.metadata["stage_latency_ms"] = {"workday": workday_ms}
         else:
-            response = await self.rag_service.query(query, session_id, user_id)
+            response, rag_ms = await self._timed(self.rag_service.query(query, session_id, user_id))
+            response.metadata["stage_latency_ms"] = {"rag": rag_ms}
 
         response.metadata = {
             **(response.metadata or {}),
@@ -58,6 +81,35 @@ class RouterAgent:
         }
         return response
 
+    async def _fan_out(self, decision: RouteDecision, session_id: str, user_id: str) -> ChatResponse:
+        """Answer the policy and Workday halves of a multi-intent message concurrently."""
+        (rag_response, rag_ms), (workday_response, workday_ms) = await asyncio.gather(
+            self._timed(self.rag_service.query(decision.rag_query, session_id, user_id)),
+            self._timed(self.workday_tools.chat(decision.workday_query, user_id)),
+        )
+        reply_text = (
+            f"**Policy:**\n{rag_response.reply_text}\n\n"
+            f"**Your Workday information:**\n{workday_response.reply_text}"
+        )
+        return ChatResponse(
+            reply_text=reply_text,
+            citations=rag_response.citations,
+            metadata={
+                "agent": "multi",
+                "degraded": bool(rag_response.metadata.get("degraded")),
+                "workday_prompted": "?" in workday_response.reply_text,
+                "sub_queries": {"rag": decision.rag_query, "workday": decision.workday_query},
+                "sub_metadata": {"rag": rag_response.metadata, "workday": workday_response.metadata},
+                "stage_latency_ms": {"rag": rag_ms, "workday": workday_ms},
+            },
+        )
+
+    @staticmethod
+    async def _timed(call: Awaitable[ChatResponse]) -> Tuple[ChatResponse, float]:
+        started = time.perf_counter()
+        response = await call
+        return response, round((time.perf_counter() - started) * 1000, 1)
+
     @staticmethod
     def _is_greeting(text: str) -> bool:
         if not text:
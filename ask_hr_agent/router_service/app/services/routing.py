@@ -1,13 +1,26 @@
 import asyncio
+import hashlib
 import json
 import logging
 import os
 import re
+import time
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel
 
 from app.config import settings
+from app.memory import register_adk_runners
 from app.models.dto import RouteDecision
+from app.services.generation import build_agent_kwargs, get_profile
+from app.services.cascade import Cascade
+from app.services.context_cache import context_cache
+from app.services.hedging import Hedger
+from app.services.shadow import shadow_traffic
+from app.services.token_usage import add_usage, stage_for_profile, token_usage, usage_from_event
+from app.services.warm_cache import TTLCache, cache_snapshots
+from app.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
@@ -16,11 +29,30 @@ ROUTING_INSTRUCTION = """You are the AskHR router for Michaels.
 Decide which backend should handle the request:
 - route "workday" for time off, leave balances, employment verification letters, or any Workday data/actions.
 - route "rag" for policy, benefits, and general HR questions that don't require Workday actions.
+- route "both" when one message asks a policy question AND needs the user's Workday data or an action.
+  Then split it: "rag_query" is the standalone policy question, "workday_query" the Workday part.
 
 Return ONLY JSON:
-{"route": "rag" | "workday", "confidence": 0.0-1.0, "reason": "short reason"}
+{"route": "rag" | "workday" | "both", "confidence": 0.0-1.0, "reason": "short reason, at most 8 words",
+ "rag_query": "only for both", "workday_query": "only for both"}
 """
 
+FALLBACK_REASON = "Fallback routing"
+
+_decision_cache = cache_snapshots.register(
+    TTLCache("routing_decisions", settings.ROUTING_CACHE_MAX_ENTRIES, settings.ROUTING_CACHE_TTL_SECONDS)
+)
+
+
+class RoutingOutput(BaseModel):
+    """Response schema used when the router profile enables structured output."""
+
+    route: Literal["rag", "workday", "both"]
+    confidence: float
+    reason: str
+    rag_query: Optional[str] = None
+    workday_query: Optional[str] = None
+
 
 class RoutingAgent:
     def __init__(self):
@@ -32,8 +64,10 @@ class RoutingAgent:
         self._adk_vertexai = None
         self._types = None
         self._ensure_vertex_env()
-        self._agent = None
-        self._runner = None
+        self._runners: Dict[str, Any] = {}
+        self._hedgers = {name: Hedger(name) for name in ("router", "router_fast")}
+        self._cascade = Cascade("router")
+        register_adk_runners("adk_sessions.router", self._runners.values)
 
     def _load_genai(self) -> None:
         if self._genai_loaded:
@@ -67,46 +101,147 @@ class RoutingAgent:
         )
         self._vertex_initialized = True
 
-    def _build_agent(self):
+    def _build_agent(self, profile_name: str):
+        profile = get_profile(profile_name)
         return self._LlmAgent(
             name="ask_hr_router",
-            model=self._Gemini(model=settings.ROUTER_MODEL),
-            instruction=ROUTING_INSTRUCTION,
-            generate_content_config=self._types.GenerateContentConfig(temperature=0.0),
+            instruction=profile.instruction or ROUTING_INSTRUCTION,
+            before_model_callback=context_cache.before_model_callback(),
+            **build_agent_kwargs(profile, output_schema=RoutingOutput),
         )
 
-    def _ensure_agent(self) -> None:
-        if self._agent is None:
-            self._agent = self._build_agent()
-            self._runner = self._InMemoryRunner(self._agent, app_name="ask_hr_router")
+    def _get_runner(self, profile_name: str):
+        runner = self._runners.get(profile_name)
+        if runner is None:
+            runner = self._InMemoryRunner(self._build_agent(profile_name), app_name="ask_hr_router")
+            self._runners[profile_name] = runner
+        return runner
 
     async def decide_route(
         self, query: str, user_id: str, session_id: str, history: Optional[List[Dict]] = None
     ) -> RouteDecision:
         self._ensure_vertex_init()
-        self._ensure_agent()
 
+        with tracer.span("route.decide") as span:
+            prompt_text = self._build_prompt(query, history or [])
+            if settings.ROUTING_CACHE_ENABLED:
+                cached = _decision_cache.get_first(
+                    self._cache_key(model, prompt_text) for model in self._serving_models()
+                )
+                span.set(cache="hit" if cached is not None else "miss")
+                if cached is not None:
+                    decision = RouteDecision(**cached)
+                    logger.info("Routing decision (cached): %s", decision.model_dump())
+                    span.set(route=decision.route, confidence=decision.confidence)
+                    return decision
+
+            async def _decide(profile_name: str) -> RouteDecision:
+                reply_text = await self._call(profile_name, prompt_text, user_id, session_id)
+                return self._parse_decision(reply_text, query)
+
+            started = time.perf_counter()
+            served_by = "router"
+            if settings.ROUTER_CASCADE_ENABLED:
+                decision, escalated = await self._cascade.run(
+                    lambda: _decide("router_fast"),
+                    lambda: _decide("router"),
+                    self._is_confident,
+                )
+                served_by = "router" if escalated else "router_fast"
+                logger.info("Routing decision (%s model): %s", "full" if escalated else "fast", decision.model_dump())
+            else:
+                decision = await _decide("router")
+                logger.info("Routing decision: %s", decision.model_dump())
+
+            if settings.ROUTING_CACHE_ENABLED and decision.reason != FALLBACK_REASON:
+                _decision_cache.set(self._cache_key(get_profile(served_by).model, prompt_text), decision.model_dump())
+            self._mirror_to_shadow(prompt_text, query, user_id, session_id, decision, time.perf_counter() - started)
+            span.set(route=decision.route, confidence=decision.confidence)
+            return decision
+
+    def _mirror_to_shadow(
+        self, prompt_text: str, query: str, user_id: str, session_id: str, decision: RouteDecision, elapsed: float
+    ) -> None:
+        async def _shadow() -> Dict[str, Any]:
+            usage: Dict[str, int] = {}
+            reply_text = await self._run_prompt("router_shadow", prompt_text, user_id, session_id, usage)
+            candidate = self._parse_decision(reply_text, query)
+            return {
+                "agree": candidate.route == decision.route,
+                "production": decision.model_dump(),
+                "candidate": candidate.model_dump(),
+                "production_latency_ms": round(elapsed * 1000, 1),
+                "usage": usage,
+            }
+
+        shadow_traffic.mirror("router", _shadow)
+
+    async def _call(self, profile_name: str, prompt_text: str, user_id: str, session_id: str) -> str:
+        # Every attempt gets its own throwaway session, so hedged duplicates never share state.
+        return await self._hedgers[profile_name].call(
+            lambda _attempt: self._run_prompt(profile_name, prompt_text, user_id, session_id)
+        )
+
+    async def _run_prompt(
+        self,
+        profile_name: str,
+        prompt_text: str,
+        user_id: str,
+        session_id: str,
+        usage: Optional[Dict[str, int]] = None,
+    ) -> str:
+        runner = self._get_runner(profile_name)
         routing_session_id = f"route-{session_id}-{uuid.uuid4()}"
-        await self._ensure_session(user_id, routing_session_id)
-        prompt_text = self._build_prompt(query, history or [])
+        await self._ensure_session(runner, user_id, routing_session_id)
         content = self._types.Content(role="user", parts=[self._types.Part.from_text(text=prompt_text)])
 
         reply_text = ""
-        async for event in self._runner.run_async(
-            user_id=user_id,
-            session_id=routing_session_id,
-            new_message=content,
-        ):
-            if event.is_final_response():
-                reply_text = self._extract_text(event.content) or reply_text
-
-        decision = self._parse_decision(reply_text, query)
-        logger.info("Routing decision: %s", decision.model_dump())
-        return decision
-
-    async def _ensure_session(self, user_id: str, session_id: str) -> None:
-        session_service = self._runner.session_service
-        app_name = self._runner.app_name
+        call_usage: Dict[str, int] = {}
+        model = get_profile(profile_name).model
+        with tracer.span("llm.router", profile=profile_name, model=model):
+            try:
+                async for event in runner.run_async(
+                    user_id=user_id,
+                    session_id=routing_session_id,
+                    new_message=content,
+                ):
+                    add_usage(call_usage, usage_from_event(event))
+                    if event.is_final_response():
+                        reply_text = self._extract_text(event.content) or reply_text
+            finally:
+                token_usage.record(stage_for_profile(profile_name), model, user_id, call_usage)
+                if usage is not None:
+                    add_usage(usage, call_usage)
+                # Routing sessions are single-use; without this they pile up in the in-memory session service.
+                await runner.session_service.delete_session(
+                    app_name=runner.app_name, user_id=user_id, session_id=routing_session_id
+                )
+        return reply_text
+
+    @staticmethod
+    def _serving_models() -> List[str]:
+        """Models whose cached decisions the current configuration may serve, best first."""
+        models = [get_profile("router").model]
+        if settings.ROUTER_CASCADE_ENABLED:
+            models.append(get_profile("router_fast").model)
+        return models
+
+    @staticmethod
+    def _cache_key(model: str, prompt_text: str) -> str:
+        # Keyed on the model that produced the decision, so fast-tier results are never served as full-model ones.
+        normalized = " ".join(prompt_text.lower().split())
+        return hashlib.sha256(f"{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _is_confident(decision: RouteDecision) -> bool:
+        if decision.reason == FALLBACK_REASON:
+            return False
+        return (decision.confidence or 0.0) >= settings.ROUTER_CASCADE_MIN_CONFIDENCE
+
+    @staticmethod
+    async def _ensure_session(runner: Any, user_id: str, session_id: str) -> None:
+        session_service = runner.session_service
+        app_name = runner.app_name
         session = await session_service.get_session(
             app_name=app_name,
             user_id=user_id,
@@ -143,20 +278,28 @@ class RoutingAgent:
 
         if isinstance(payload, dict):
             route = str(payload.get("route", "")).strip().lower()
-            if route in ("rag", "workday"):
+            if route in ("rag", "workday", "both"):
                 confidence = payload.get("confidence")
-                return RouteDecision(
+                decision = RouteDecision(
                     route=route,
                     reason=payload.get("reason"),
                     confidence=confidence if isinstance(confidence, (int, float)) else None,
                 )
+                if route == "both":
+                    decision.rag_query = payload.get("rag_query") or fallback_query
+                    decision.workday_query = payload.get("workday_query") or fallback_query
+                return decision
 
         return RouteDecision(
             route=RoutingAgent._fallback_route(fallback_query),
-            reason="Fallback routing",
+            reason=FALLBACK_REASON,
             confidence=0.2,
         )
 
+    @staticmethod
+    def looks_workday_bound(query: str) -> bool:
+        return RoutingAgent._fallback_route(query) == "workday"
+
     @staticmethod
     def _fallback_route(query: str) -> str:
         text = query.lower()
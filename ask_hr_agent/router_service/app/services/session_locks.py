@@ -0,0 +1,74 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Tuple
+
+from app.metrics import metrics
+
+
+class SessionLocks:
+    """Serialises chat turns per session while leaving sessions independent.
+
+    Each session gets its own ``asyncio.Lock``, created on demand and dropped
+    once nobody holds or waits for it. A message identical to one already in
+    flight for the same session is coalesced onto the running turn instead of
+    starting a second LLM pipeline.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+        self._inflight: Dict[Tuple[str, str], "asyncio.Future[Any]"] = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        self._users[session_id] = self._users.get(session_id, 0) + 1
+        started = time.perf_counter()
+        try:
+            async with lock:
+                metrics.observe("session_lock_wait_ms", (time.perf_counter() - started) * 1000)
+                yield
+        finally:
+            self._users[session_id] -= 1
+            if self._users[session_id] <= 0:
+                self._users.pop(session_id, None)
+                self._locks.pop(session_id, None)
+
+    async def run_once(
+        self, session_id: str, content: str, turn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """Run ``turn`` unless the same message is already in flight.
+
+        Returns ``(result, coalesced)``; ``coalesced`` is True when the result
+        was borrowed from an identical in-flight turn.
+        """
+        key = (session_id, self._normalize(content))
+        existing = self._inflight.get(key)
+        if existing is not None:
+            metrics.incr("session_duplicates_coalesced_total")
+            return await asyncio.shield(existing), True
+
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        # Mark the outcome as retrieved so an unshared failure doesn't log a warning.
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await turn()
+            future.set_result(result)
+            return result, False
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def active_sessions(self) -> int:
+        return len(self._locks)
+
+    @staticmethod
+    def _normalize(content: str) -> str:
+        return " ".join((content or "").lower().split())
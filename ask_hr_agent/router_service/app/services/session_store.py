@@ -0,0 +1,106 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+
+class SessionStore:
+    """In-memory chat sessions with sequence-numbered, bounded history.
+
+    Every history entry gets a monotonically increasing ``seq`` that clients
+    use as a cursor. Only the newest ``SESSION_HISTORY_MAX_ENTRIES`` entries
+    are kept in memory; older turns remain in the transcript log.
+    """
+
+    def __init__(self, max_history: Optional[int] = None):
+        self.max_history = max_history or settings.SESSION_HISTORY_MAX_ENTRIES
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(session_id)
+
+    def create(self, user_id: str, greeting: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        session_id = str(uuid.uuid4())
+        now = datetime.now()
+        session = {
+            "user_id": user_id,
+            "history": [],
+            "last_route": None,
+            "awaiting_workday": False,
+            "created_at": now,
+            "updated_at": now,
+            "next_seq": 1,
+            "title": None,
+        }
+        self._sessions[session_id] = session
+        if greeting:
+            self.append(session, "assistant", greeting)
+        return session_id, session
+
+    def append(self, session: Dict[str, Any], role: str, content: str, **extra: Any) -> Dict[str, Any]:
+        now = datetime.now()
+        entry = {"seq": session["next_seq"], "role": role, "content": content, "ts": now, **extra}
+        session["next_seq"] += 1
+        session["updated_at"] = now
+        if role == "user" and not session.get("title"):
+            session["title"] = content[:80]
+        history = session["history"]
+        history.append(entry)
+        if len(history) > self.max_history:
+            del history[: len(history) - self.max_history]
+        return entry
+
+    def evict_oldest(self, n: int) -> int:
+        """Drop the ``n`` least recently updated sessions."""
+        oldest = sorted(self._sessions, key=lambda session_id: self._sessions[session_id]["updated_at"])[:n]
+        for session_id in oldest:
+            del self._sessions[session_id]
+        return len(oldest)
+
+    def history_page(
+        self,
+        session: Dict[str, Any],
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+        limit: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return ``(entries, has_more)`` in ascending ``seq`` order.
+
+        ``after`` returns the oldest entries newer than the cursor (delta sync);
+        ``before`` pages backwards; with neither, the newest ``limit`` entries.
+        ``has_more`` says whether more entries exist in the paging direction.
+        """
+        history = session["history"]
+        if after is not None:
+            newer = [entry for entry in history if entry["seq"] > after]
+            return newer[:limit], len(newer) > limit
+        if before is not None:
+            older = [entry for entry in history if entry["seq"] < before]
+        else:
+            older = history
+        return list(older[-limit:]), len(older) > limit
+
+    def list_sessions(
+        self, user_id: str, cursor: Optional[Tuple[str, str]] = None, limit: int = 20
+    ) -> Tuple[List[Tuple[str, Dict[str, Any]]], bool]:
+        """Return the user's sessions, most recently updated first.
+
+        ``cursor`` is the ``(updated_at isoformat, session_id)`` of the last
+        session on the previous page.
+        """
+        owned = [
+            (session_id, session)
+            for session_id, session in self._sessions.items()
+            if session.get("user_id") == user_id
+        ]
+        owned.sort(key=lambda item: (item[1]["updated_at"].isoformat(), item[0]), reverse=True)
+        if cursor is not None:
+            owned = [item for item in owned if (item[1]["updated_at"].isoformat(), item[0]) < cursor]
+        return owned[:limit], len(owned) > limit
@@ -0,0 +1,123 @@
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from app.config import settings
+from app.memory import memory
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# A shadow job runs the candidate call and returns the fields to record
+# (e.g. ``agree``, ``similarity``, ``usage``).
+ShadowJob = Callable[[], Awaitable[Dict[str, Any]]]
+
+_pending: contextvars.ContextVar[Optional[List["_QueuedJob"]]] = contextvars.ContextVar(
+    "shadow_pending", default=None
+)
+
+
+class _QueuedJob:
+    def __init__(self, stage: str, job: ShadowJob):
+        self.stage = stage
+        self.job = job
+
+
+def stage_enabled(stage: str) -> bool:
+    if stage == "router":
+        return bool(settings.SHADOW_ROUTER_MODEL or settings.SHADOW_ROUTER_INSTRUCTION_FILE)
+    if stage == "rag_answer":
+        return bool(settings.SHADOW_RAG_ANSWER_MODEL or settings.SHADOW_RAG_ANSWER_INSTRUCTION_FILE)
+    return False
+
+
+def answer_similarity(first: str, second: str) -> float:
+    """Jaccard similarity of the two answers' lower-cased word sets."""
+    a = set((first or "").lower().split())
+    b = set((second or "").lower().split())
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class ShadowTraffic:
+    """Mirrors sampled production LLM calls to a candidate profile.
+
+    Agents call ``mirror`` with the production result already in hand; the
+    job is only queued for the current chat turn (``begin_turn``) and runs
+    after the response has been sent (``run``). Jobs that would exceed
+    ``SHADOW_MAX_CONCURRENCY`` are dropped rather than queued, so shadow work
+    can never build a backlog that competes with production.
+    """
+
+    def __init__(self):
+        self._semaphore = asyncio.Semaphore(max(1, settings.SHADOW_MAX_CONCURRENCY))
+        self._results: Deque[Dict[str, Any]] = deque(maxlen=settings.SHADOW_RESULTS_BUFFER)
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SHADOW_ENABLED and settings.SHADOW_SAMPLE_RATE > 0
+
+    def begin_turn(self) -> None:
+        _pending.set([] if self.enabled else None)
+
+    def mirror(self, stage: str, job: ShadowJob) -> bool:
+        pending = _pending.get()
+        if pending is None or not stage_enabled(stage):
+            return False
+        if random.random() >= settings.SHADOW_SAMPLE_RATE:
+            return False
+        pending.append(_QueuedJob(stage, job))
+        metrics.incr("shadow_sampled_total", stage=stage)
+        return True
+
+    def drain(self) -> List[_QueuedJob]:
+        pending = _pending.get() or []
+        _pending.set(None)
+        return pending
+
+    async def run(self, jobs: List[_QueuedJob]) -> None:
+        for queued in jobs:
+            if self._semaphore.locked():
+                metrics.incr("shadow_skipped_total", stage=queued.stage, reason="concurrency")
+                continue
+            async with self._semaphore:
+                await self._run_one(queued)
+
+    def results(self, stage: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        selected = [result for result in self._results if stage is None or result["stage"] == stage]
+        return selected[-limit:]
+
+    async def _run_one(self, queued: _QueuedJob) -> None:
+        stage = queued.stage
+        started = time.perf_counter()
+        try:
+            outcome = await queued.job()
+        except Exception as exc:
+            metrics.incr("shadow_errors_total", stage=stage)
+            logger.warning("Shadow %s call failed: %s", stage, exc)
+            return
+        latency_ms = (time.perf_counter() - started) * 1000
+        outcome.setdefault("latency_ms", round(latency_ms, 1))
+
+        metrics.incr("shadow_runs_total", stage=stage)
+        metrics.observe("shadow_latency_ms", latency_ms, stage=stage)
+        if "production_latency_ms" in outcome:
+            metrics.observe("shadow_latency_delta_ms", latency_ms - outcome["production_latency_ms"], stage=stage)
+        if "agree" in outcome:
+            metrics.incr("shadow_agreement_total", stage=stage, agree=bool(outcome["agree"]))
+        if "similarity" in outcome:
+            metrics.observe("shadow_answer_similarity", outcome["similarity"], stage=stage)
+        for kind, count in (outcome.get("usage") or {}).items():
+            metrics.incr("shadow_tokens_total", count, stage=stage, kind=kind)
+
+        self._results.append({"stage": stage, "ts": datetime.now(timezone.utc).isoformat(), **outcome})
+
+
+shadow_traffic = ShadowTraffic()
+memory.register("shadow_results", count=lambda: len(shadow_traffic._results), root=lambda: shadow_traffic._results)
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.memory import memory
+from app.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptSink:
+    """Append-only, write-behind log of chat turns.
+
+    ``submit`` never blocks: records go into a bounded in-memory queue and are
+    counted as dropped when it is full. A background task writes them to
+    rotating JSONL files in batches, and ``stop`` drains whatever is left.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        buffer_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_file_bytes: Optional[int] = None,
+    ):
+        self.enabled = settings.TRANSCRIPT_ENABLED
+        self.directory = Path(directory or settings.TRANSCRIPT_DIR)
+        self.buffer_size = buffer_size or settings.TRANSCRIPT_BUFFER_SIZE
+        self.batch_size = batch_size or settings.TRANSCRIPT_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.TRANSCRIPT_FLUSH_INTERVAL_SECONDS
+        self.max_file_bytes = max_file_bytes or settings.TRANSCRIPT_MAX_FILE_BYTES
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._write_lock = threading.Lock()
+        self._file_day = ""
+        self._file_index = 0
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue = asyncio.Queue(maxsize=self.buffer_size)
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopping.set()
+        await self._task
+        self._task = None
+
+    def submit(self, record: Dict[str, Any]) -> bool:
+        if self._queue is None:
+            return False
+        record.setdefault("ts", datetime.now(timezone.utc).isoformat())
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            metrics.incr("transcript_dropped_total")
+            return False
+        metrics.set_gauge("transcript_buffered", self._queue.qsize())
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            if batch:
+                await self._flush(batch)
+            if self._stopping.is_set() and self._queue.empty():
+                return
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        try:
+            batch.append(await asyncio.wait_for(self._queue.get(), timeout=self.flush_interval))
+        except asyncio.TimeoutError:
+            return batch
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._write_batch, batch)
+        except Exception as exc:
+            metrics.incr("transcript_write_errors_total")
+            metrics.incr("transcript_dropped_total", len(batch))
+            logger.error("Transcript flush of %d records failed: %s", len(batch), exc)
+            return
+        metrics.incr("transcript_written_total", len(batch))
+        metrics.observe("transcript_flush_ms", (time.perf_counter() - started) * 1000)
+        metrics.set_gauge("transcript_buffered", self._queue.qsize())
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        payload = "".join(json.dumps(record, default=str, ensure_ascii=False) + "\n" for record in batch)
+        with self._write_lock:
+            path = self._target_path()
+            with open(path, "a", encoding="utf-8") as handle:
+                handle.write(payload)
+
+    def _target_path(self) -> Path:
+        day = datetime.now(timezone.utc).strftime("%Y%m%d")
+        if day != self._file_day:
+            self._file_day = day
+            self._file_index = 0
+        while True:
+            suffix = f"-{self._file_index}" if self._file_index else ""
+            path = self.directory / f"transcript-{day}{suffix}.jsonl"
+            if not path.exists() or path.stat().st_size < self.max_file_bytes:
+                return path
+            self._file_index += 1
+
+
+transcript_sink = TranscriptSink()
+memory.register(
+    "transcript_buffer",
+    count=lambda: transcript_sink._queue.qsize() if transcript_sink._queue else 0,
+    root=lambda: transcript_sink._queue,
+)
@@ -0,0 +1,283 @@
+"""How the router reaches rag_service and workday_tools.
+
+``RAG_TRANSPORT`` / ``WORKDAY_TRANSPORT`` pick ``http`` (split deployment,
+the default) or ``inprocess`` (single-process "monolith": the downstream
+code is imported and awaited directly, with no JSON/HTTP round trip).
+Both transports return the same payload shapes, so RagService and
+WorkdayToolsService don't care which one they hold.
+
+Measure the per-hop overhead the in-process transport removes::
+
+    python -m app.services.transports bench --requests 500
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+import requests
+
+from app.config import settings
+from app.tracing import parse_traceparent, tracer
+
+logger = logging.getLogger(__name__)
+
+_SERVICES_ROOT = Path(__file__).resolve().parents[3]
+
+
+class TransportError(Exception):
+    """The downstream service answered with an error status."""
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+
+class HttpRagTransport:
+    name = "http"
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    async def retrieve(self, query: str) -> Dict[str, Any]:
+        async with httpx.AsyncClient(timeout=30) as client:
+            resp = await client.post(f"{self.base_url}/api/v1/rag/retrieve", json={"query": query}, headers=tracer.inject())
+        if resp.status_code >= 400:
+            raise TransportError(resp.status_code, resp.text)
+        return resp.json()
+
+
+class InProcessRagTransport:
+    """Calls rag_service's ``RagAgent.rag_retrieve`` in this process.
+
+    The orchestrator is imported and the agent built here, at startup, so
+    the first request does not pay for it (or swap ``app.*`` modules mid-request).
+    """
+
+    name = "inprocess"
+
+    def __init__(self):
+        self._agent = _import_rag_orchestrator().RagAgent()
+
+    async def retrieve(self, query: str) -> Dict[str, Any]:
+        return await self._agent.rag_retrieve(query)
+
+
+class HttpWorkdayTransport:
+    name = "http"
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    async def chat(self, message: str, timeout: float) -> Dict[str, Any]:
+        headers = tracer.inject()
+        resp = await asyncio.to_thread(
+            requests.post, f"{self.base_url}/chat", json={"message": message}, headers=headers, timeout=timeout
+        )
+        if not resp.ok:
+            try:
+                error_data = resp.json()
+                detail = error_data.get("detail") or error_data
+            except Exception:
+                detail = resp.text
+            raise TransportError(resp.status_code, detail)
+        return resp.json()
+
+    async def prewarm(self) -> None:
+        async with httpx.AsyncClient(timeout=5) as client:
+            await client.post(f"{self.base_url}/prewarm", headers=tracer.inject())
+
+
+class InProcessWorkdayTransport:
+    """Calls workday_tools' ``chat_with_workday`` in this process.
+
+    Workday turns block their event loop (OAuth, Workday REST, a possible
+    browser login, and ADK running the sync tools), so they run on a
+    dedicated thread with its own loop, as the standalone service runs them
+    on its own; the router's loop keeps serving other users meanwhile.
+    workday_tools keeps its own tracer and token accounting; the call is
+    opened as a span continuing the router's trace, and the turn's usage is
+    returned exactly as the HTTP ``/chat`` endpoint would.
+    """
+
+    name = "inprocess"
+
+    def __init__(self):
+        if str(_SERVICES_ROOT) not in sys.path:
+            sys.path.append(str(_SERVICES_ROOT))
+        self._agent = importlib.import_module("workday_tools.agent")
+        self._tracer = importlib.import_module("workday_tools.tracing").tracer
+        self._usage = importlib.import_module("workday_tools.token_usage").token_usage
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="workday-inprocess", daemon=True).start()
+
+    async def chat(self, message: str, timeout: float) -> Dict[str, Any]:
+        parent = parse_traceparent(tracer.inject().get("traceparent"))
+        turn = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._turn(message, parent), self._loop))
+        # Shielded like an HTTP timeout: the caller gives up, the Workday turn still completes.
+        return await asyncio.wait_for(asyncio.shield(turn), timeout)
+
+    async def _turn(self, message: str, parent: Any) -> Dict[str, Any]:
+        # Runs on the Workday loop, so the span and the turn's usage belong to this task.
+        with self._tracer.span("chat.inprocess", parent=parent, kind="server"):
+            self._usage.begin_turn()
+            response = await self._agent.chat_with_workday(message)
+            return {"response": response, "usage": self._usage.turn_usage()}
+
+    async def prewarm(self) -> None:
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._agent.prewarm(), self._loop))
+
+
+def rag_transport(base_url: str):
+    if settings.RAG_TRANSPORT == "inprocess":
+        return InProcessRagTransport()
+    return HttpRagTransport(base_url)
+
+
+def workday_transport(base_url: str):
+    if settings.WORKDAY_TRANSPORT == "inprocess":
+        return InProcessWorkdayTransport()
+    return HttpWorkdayTransport(base_url)
+
+
+def _import_rag_orchestrator() -> Any:
+    """Import rag_service's orchestrator, which lives in a package also named ``app``.
+
+    The router's ``app.*`` modules are set aside for the duration of the
+    import and restored afterwards; rag_service's modules keep references to
+    their own ``app.*`` modules. rag_service/.env fills in settings not
+    already in the environment (its Settings reads ``.env`` relative to the
+    working directory, which is the router's here).
+    """
+    rag_root = _SERVICES_ROOT / "rag_service"
+    _load_env_defaults(rag_root / ".env")
+    ours = {name: sys.modules.pop(name) for name in list(sys.modules) if name == "app" or name.startswith("app.")}
+    sys.path.insert(0, str(rag_root))
+    try:
+        return importlib.import_module("app.services.orchestrator")
+    finally:
+        sys.path.remove(str(rag_root))
+        for name in [name for name in sys.modules if name == "app" or name.startswith("app.")]:
+            del sys.modules[name]
+        sys.modules.update(ours)
+
+
+def _load_env_defaults(path: Path) -> None:
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                key, value = line.split("=", 1)
+                os.environ.setdefault(key.strip(), value.strip().strip("'\""))
+
+
+def _sample_payload(contexts: int = 3, context_chars: int = 1500) -> Dict[str, Any]:
+    text = ("Eligible team members accrue paid time off each pay period based on tenure. " * 40)[:context_chars]
+    return {
+        "contexts": [text] * contexts,
+        "citations": [
+            {"title": f"Policy {i}", "url": f"gs://askhr/policies/{i}.pdf", "snippet": text, "confidence": 0.8}
+            for i in range(contexts)
+        ],
+    }
+
+
+async def _time_calls(call: Callable[[], Awaitable[Any]], count: int) -> List[float]:
+    for _ in range(min(20, count)):
+        await call()
+    samples = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p90_ms": round(ordered[int(len(ordered) * 0.9) - 1], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+async def benchmark(count: int) -> Dict[str, Dict[str, float]]:
+    """Per-hop cost of the retrieval call: in-process vs. loopback HTTP to a FastAPI app.
+
+    The downstream work is a no-op returning a typical retrieval payload
+    (3 contexts with citations), so the numbers are transport overhead
+    only: JSON encode/decode, pydantic validation, HTTP and the socket.
+    """
+    import uvicorn  # pylint: disable=import-error
+    from fastapi import FastAPI
+    from pydantic import BaseModel
+
+    payload = _sample_payload()
+
+    class _Request(BaseModel):
+        query: str
+
+    async def rag_retrieve(_query: str) -> Dict[str, Any]:
+        return payload
+
+    bench_app = FastAPI()
+
+    @bench_app.post("/api/v1/rag/retrieve")
+    async def retrieve(request: _Request) -> Dict[str, Any]:
+        return await rag_retrieve(request.query)
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(bench_app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    http = HttpRagTransport(f"http://127.0.0.1:{port}")
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as pooled:
+
+            async def _pooled() -> Dict[str, Any]:
+                resp = await pooled.post("/api/v1/rag/retrieve", json={"query": "pto accrual"})
+                return resp.json()
+
+            results = {
+                "inprocess": _summary(await _time_calls(lambda: rag_retrieve("pto accrual"), count)),
+                "http_client_per_call": _summary(await _time_calls(lambda: http.retrieve("pto accrual"), count)),
+                "http_pooled_client": _summary(await _time_calls(_pooled, count)),
+            }
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+    results["payload_bytes"] = {"json": len(json.dumps(payload))}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AskHR inter-service transport tools.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    bench = subcommands.add_parser("bench", help="Measure per-hop overhead of HTTP vs. in-process calls.")
+    bench.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(benchmark(args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
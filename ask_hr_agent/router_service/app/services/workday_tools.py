@@ -3,78 +3,92 @@ import logging
 import time
 from pathlib import Path
 
-import requests
 from requests import exceptions as request_exceptions
 
 from app.config import settings
 from app.models.dto import ChatResponse
+from app.services.token_usage import token_usage
+from app.services.transports import TransportError, workday_transport
+from app.tracing import tracer
 
 logger = logging.getLogger(__name__)
 
 
 class WorkdayToolsService:
-    """Proxy to the Workday Tools agent (external service)."""
+    """Proxy to the Workday Tools agent (external service, or in-process in monolith mode)."""
 
     def __init__(self, base_url: str):
         self.base_url = base_url.rstrip("/")
+        self._transport = workday_transport(self.base_url)
         self._token_cache_path = Path(__file__).resolve().parents[3] / "workday_tools" / ".token_cache.json"
-
-    def _wait_for_token_cache(self, deadline: float, interval_seconds: float = 2.0) -> bool:
+        self._prewarm_task = None
+        self._last_prewarm = 0.0
+
+    def prewarm(self) -> None:
+        """Fire-and-forget request asking workday_tools to warm token, profile and session."""
+        if settings.WORKDAY_PREWARM_MODE == "off":
+            return
+        if self._prewarm_task is not None and not self._prewarm_task.done():
+            return
+        now = time.monotonic()
+        if now - self._last_prewarm < settings.WORKDAY_PREWARM_MIN_INTERVAL_SECONDS:
+            return
+        self._last_prewarm = now
+        self._prewarm_task = asyncio.create_task(self._send_prewarm())
+
+    async def _send_prewarm(self) -> None:
+        try:
+            await self._transport.prewarm()
+        except Exception as exc:
+            logger.warning("Workday prewarm request failed: %s", exc)
+
+    async def _wait_for_token_cache(self, deadline: float, interval_seconds: float = 2.0) -> bool:
         while time.time() < deadline:
             if self._token_cache_path.exists():
                 return True
-            time.sleep(interval_seconds)
+            await asyncio.sleep(interval_seconds)
         return False
 
-    async def chat(self, message: str) -> ChatResponse:
-        url = f"{self.base_url}/chat"
-
-        def _post():
-            deadline = time.time() + settings.WORKDAY_TOOLS_TIMEOUT_SECONDS
-            attempts = 0
-
-            while True:
-                remaining = max(1, int(deadline - time.time()))
-                try:
-                    resp = requests.post(
-                        url,
-                        json={"message": message},
-                        timeout=remaining,
-                    )
-                    if resp.ok:
-                        data = resp.json()
-                        reply = data.get("response") or data.get("message") or str(data)
-                        return ChatResponse(reply_text=reply, metadata={"agent": "workday_tools"})
-
-                    error_detail = None
-                    try:
-                        error_data = resp.json()
-                        error_detail = error_data.get("detail") or error_data
-                    except Exception:
-                        error_detail = resp.text
-
-                    raise request_exceptions.HTTPError(
-                        f"Workday tools error {resp.status_code}: {error_detail}"
-                    )
-                except request_exceptions.Timeout as e:
-                    logger.warning("Workday tools timeout: %s", e)
-                except Exception as e:
-                    logger.error("Workday tools call failed: %s", e)
-
-                if attempts >= 1 or time.time() >= deadline:
+    async def chat(self, message: str, user_id: str = "anonymous") -> ChatResponse:
+        with tracer.span("workday.chat", kind="client", transport=self._transport.name) as span:
+            response = await self._chat_with_retry(message)
+            if response.metadata.get("error"):
+                span.set(error=response.metadata["error"])
+        token_usage.merge_remote(user_id, response.metadata.pop("usage", None))
+        return response
+
+    async def _chat_with_retry(self, message: str) -> ChatResponse:
+        deadline = time.time() + settings.WORKDAY_TOOLS_TIMEOUT_SECONDS
+        attempts = 0
+
+        while True:
+            remaining = max(1, int(deadline - time.time()))
+            try:
+                data = await self._transport.chat(message, timeout=remaining)
+                reply = data.get("response") or data.get("message") or str(data)
+                metadata = {"agent": "workday_tools"}
+                if isinstance(data.get("usage"), dict):
+                    metadata["usage"] = data["usage"]
+                return ChatResponse(reply_text=reply, metadata=metadata)
+            except (request_exceptions.Timeout, asyncio.TimeoutError) as e:
+                logger.warning("Workday tools timeout: %s", e)
+            except TransportError as e:
+                logger.error("Workday tools call failed: Workday tools error %s", e)
+            except Exception as e:
+                logger.error("Workday tools call failed: %s", e)
+
+            if attempts >= 1 or time.time() >= deadline:
+                break
+
+            if not self._token_cache_path.exists():
+                if not await self._wait_for_token_cache(deadline):
                     break
+            else:
+                await asyncio.sleep(2)
 
-                if not self._token_cache_path.exists():
-                    if not self._wait_for_token_cache(deadline):
-                        break
-                else:
-                    time.sleep(2)
-
-                attempts += 1
-
-            return ChatResponse(
-                reply_text="Workday login may still be in progress. Please finish the browser login and try again.",
-                metadata={"agent": "workday_tools", "error": "retry_exhausted"},
-            )
+            attempts += 1
 
-        return await asyncio.to_thread(_post)
+        return ChatResponse(
+            reply_text="Workday login may still be in progress. Please finish the browser login and try again.",
+            metadata={"agent": "workday_tools", "error": "retry_exhausted"},
+        )
@@ -0,0 +1,118 @@
+import asyncio
+import time
+
+from app.services.context_cache import ContextCacheManager, LocalCacheBackend
+
+INSTRUCTION = "You are the AskHR assistant. " * 40
+
+
+def _manager(backend=None, **overrides):
+    options = dict(enabled=True, ttl_seconds=3600, refresh_margin_seconds=300, min_tokens=100, retry_seconds=300)
+    options.update(overrides)
+    return ContextCacheManager(backend=backend or LocalCacheBackend(), **options)
+
+
+def test_first_request_creates_and_later_ones_reuse():
+    manager = _manager()
+
+    async def scenario():
+        return [await manager.get("gemini", INSTRUCTION, ["profile"]) for _ in range(3)]
+
+    names = asyncio.run(scenario())
+    assert names[0] is not None and names == [names[0]] * 3
+    assert manager.backend.calls == [("create", names[0])]
+    assert manager.backend.caches[names[0]]["contents"] == ["profile"]
+
+
+def test_distinct_prefixes_get_distinct_caches():
+    manager = _manager()
+
+    async def scenario():
+        return await manager.get("gemini", INSTRUCTION), await manager.get("gemini", INSTRUCTION, ["other user"])
+
+    first, second = asyncio.run(scenario())
+    assert first != second and len(manager.backend.caches) == 2
+
+
+def test_small_prefixes_are_not_cached():
+    manager = _manager(min_tokens=10_000)
+    assert asyncio.run(manager.get("gemini", INSTRUCTION)) is None
+    assert manager.backend.calls == []
+
+
+def test_cache_near_expiry_is_refreshed():
+    manager = _manager()
+
+    async def scenario():
+        name = await manager.get("gemini", INSTRUCTION)
+        entry = next(iter(manager._entries.values()))
+        entry.expire_at = time.time() + 60
+        return name, await manager.get("gemini", INSTRUCTION), entry
+
+    name, refreshed, entry = asyncio.run(scenario())
+    assert refreshed == name
+    assert manager.backend.calls == [("create", name), ("refresh", name)]
+    assert entry.expire_at > time.time() + 3000
+
+
+def test_failed_refresh_keeps_serving_the_cache():
+    manager = _manager()
+
+    async def scenario():
+        name = await manager.get("gemini", INSTRUCTION)
+        next(iter(manager._entries.values())).expire_at = time.time() + 60
+        manager.backend.fail = True
+        return name, await manager.get("gemini", INSTRUCTION)
+
+    name, served = asyncio.run(scenario())
+    assert served == name
+
+
+def test_expired_cache_is_recreated():
+    manager = _manager()
+
+    async def scenario():
+        first = await manager.get("gemini", INSTRUCTION)
+        next(iter(manager._entries.values())).expire_at = time.time() - 1
+        return first, await manager.get("gemini", INSTRUCTION)
+
+    first, second = asyncio.run(scenario())
+    assert first != second
+    assert [op for op, _ in manager.backend.calls] == ["create", "create"]
+
+
+def test_backend_failure_falls_back_uncached_and_backs_off():
+    backend = LocalCacheBackend(fail=True)
+    manager = _manager(backend)
+
+    async def scenario():
+        failed = await manager.get("gemini", INSTRUCTION)
+        backend.fail = False
+        during_backoff = await manager.get("gemini", INSTRUCTION)
+        next(iter(manager._entries.values())).expire_at = time.time() - 1
+        after_backoff = await manager.get("gemini", INSTRUCTION)
+        return failed, during_backoff, after_backoff
+
+    failed, during_backoff, after_backoff = asyncio.run(scenario())
+    assert failed is None and during_backoff is None
+    assert after_backoff is not None
+    assert backend.calls == [("create", after_backoff)]
+
+
+def test_disabled_manager_skips_backend():
+    manager = _manager(enabled=False)
+    assert asyncio.run(manager.get("gemini", INSTRUCTION)) is None
+    assert manager.backend.calls == []
+
+
+def test_close_deletes_live_caches():
+    manager = _manager()
+
+    async def scenario():
+        name = await manager.get("gemini", INSTRUCTION)
+        await manager.close()
+        return name
+
+    name = asyncio.run(scenario())
+    assert manager.backend.calls[-1] == ("delete", name)
+    assert manager.backend.caches == {} and manager.stats()["entries"] == 0
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.services.cascade import Cascade
+from app.services.hedging import Hedger
+
+
+def _hedger(**overrides):
+    options = dict(enabled=True, percentile=95, min_delay_ms=20, min_samples=3, budget_ratio=1.0)
+    options.update(overrides)
+    hedger = Hedger("test", **options)
+    for _ in range(options["min_samples"]):
+        hedger._latencies.add(20)
+    return hedger
+
+
+def _attempts(delays, results=None, errors=()):
+    """``attempt(n)`` sleeps ``delays[n]`` then returns ``results[n]`` (or raises when ``n`` is in ``errors``)."""
+    started, cancelled = [], []
+
+    async def attempt(n):
+        started.append(n)
+        try:
+            await asyncio.sleep(delays[n])
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        if n in errors:
+            raise RuntimeError(f"attempt {n} failed")
+        return (results or ["primary", "hedge"])[n]
+
+    return attempt, started, cancelled
+
+
+def test_no_hedge_until_calibrated():
+    hedger = Hedger("test", enabled=True, min_samples=5, min_delay_ms=0, budget_ratio=1.0)
+    attempt, started, _ = _attempts([0.05, 0])
+    assert hedger.hedge_delay() is None
+    assert asyncio.run(hedger.call(attempt)) == "primary"
+    assert started == [0]
+
+
+def test_disabled_hedger_never_hedges():
+    hedger = _hedger(enabled=False)
+    attempt, started, _ = _attempts([0.1, 0])
+    assert asyncio.run(hedger.call(attempt)) == "primary"
+    assert started == [0]
+
+
+def test_fast_primary_is_not_hedged():
+    hedger = _hedger(min_delay_ms=200)
+    attempt, started, _ = _attempts([0, 0])
+    assert asyncio.run(hedger.call(attempt)) == "primary"
+    assert started == [0]
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    hedger = _hedger()
+    attempt, started, cancelled = _attempts([1.0, 0])
+    assert asyncio.run(hedger.call(attempt)) == "hedge"
+    assert started == [0, 1]
+    assert cancelled == [0]
+
+
+def test_hedge_waits_for_primary_without_budget():
+    hedger = _hedger(budget_ratio=0.0)
+    attempt, started, _ = _attempts([0.1, 0])
+    assert asyncio.run(hedger.call(attempt)) == "primary"
+    assert started == [0]
+
+
+def test_failed_attempt_falls_back_to_the_other():
+    hedger = _hedger()
+    attempt, _, _ = _attempts([0.05, 0.1], errors={0})
+    assert asyncio.run(hedger.call(attempt)) == "hedge"
+
+
+def test_both_attempts_failing_raises():
+    hedger = _hedger()
+    attempt, _, _ = _attempts([0.05, 0.06], errors={0, 1})
+    with pytest.raises(RuntimeError):
+        asyncio.run(hedger.call(attempt))
+
+
+def _cascade_calls(fast_result="fast", fast_error=None):
+    calls = []
+
+    async def fast():
+        calls.append("fast")
+        if fast_error is not None:
+            raise fast_error
+        return fast_result
+
+    async def full():
+        calls.append("full")
+        return "full"
+
+    return fast, full, calls
+
+
+def test_cascade_keeps_accepted_fast_result():
+    fast, full, calls = _cascade_calls()
+    assert asyncio.run(Cascade("test").run(fast, full, accept=lambda result: True)) == ("fast", False)
+    assert calls == ["fast"]
+
+
+def test_cascade_escalates_rejected_fast_result():
+    fast, full, calls = _cascade_calls()
+    assert asyncio.run(Cascade("test").run(fast, full, accept=lambda result: False)) == ("full", True)
+    assert calls == ["fast", "full"]
+
+
+def test_cascade_escalates_when_fast_model_fails():
+    fast, full, calls = _cascade_calls(fast_error=RuntimeError("quota"))
+    assert asyncio.run(Cascade("test").run(fast, full, accept=lambda result: True)) == ("full", True)
+    assert calls == ["fast", "full"]
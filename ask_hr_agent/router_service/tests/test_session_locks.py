@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from app.services.session_locks import SessionLocks
+
+
+def _turn(calls, result="reply", delay=0.05, error=None):
+    async def turn():
+        calls.append(result)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return turn
+
+
+def test_identical_messages_are_coalesced():
+    locks = SessionLocks()
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(
+            locks.run_once("s1", "How much PTO do I have?", _turn(calls)),
+            locks.run_once("s1", "  how much pto do I   have? ", _turn(calls)),
+        )
+
+    first, second = asyncio.run(scenario())
+    assert calls == ["reply"]
+    assert first == ("reply", False)
+    assert second == ("reply", True)
+
+
+def test_different_messages_and_sessions_run_separately():
+    locks = SessionLocks()
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(
+            locks.run_once("s1", "pto", _turn(calls, "a")),
+            locks.run_once("s1", "benefits", _turn(calls, "b")),
+            locks.run_once("s2", "pto", _turn(calls, "c")),
+        )
+
+    results = asyncio.run(scenario())
+    assert sorted(calls) == ["a", "b", "c"]
+    assert all(not coalesced for _, coalesced in results)
+
+
+def test_completed_turn_is_not_reused():
+    locks = SessionLocks()
+    calls = []
+
+    async def scenario():
+        await locks.run_once("s1", "pto", _turn(calls, delay=0))
+        return await locks.run_once("s1", "pto", _turn(calls, delay=0))
+
+    assert asyncio.run(scenario()) == ("reply", False)
+    assert len(calls) == 2
+
+
+def test_failure_is_shared_with_coalesced_callers():
+    locks = SessionLocks()
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(
+            locks.run_once("s1", "pto", _turn(calls, error=RuntimeError("boom"))),
+            locks.run_once("s1", "pto", _turn(calls)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert not locks._inflight
+
+
+def test_hold_serialises_a_session_and_drops_idle_locks():
+    locks = SessionLocks()
+    order = []
+
+    async def holder(name):
+        async with locks.hold("s1"):
+            order.append(f"{name}-in")
+            await asyncio.sleep(0.01)
+            order.append(f"{name}-out")
+
+    async def scenario():
+        await asyncio.gather(holder("a"), holder("b"))
+        return locks.active_sessions()
+
+    assert asyncio.run(scenario()) == 0
+    assert order == ["a-in", "a-out", "b-in", "b-out"]
+
+
+@pytest.mark.parametrize("content", ["", None])
+def test_empty_messages_normalise(content):
+    assert SessionLocks._normalize(content) == ""
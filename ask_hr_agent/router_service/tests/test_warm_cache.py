@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+from app.services.warm_cache import CacheSnapshots, TTLCache
+
+
+def test_get_set_and_expiry():
+    cache = TTLCache("test", max_entries=10, ttl_seconds=60)
+    cache.set("a", {"reply": 1})
+    cache.set("b", "gone", ttl_seconds=-1)
+    assert cache.get("a") == {"reply": 1}
+    assert cache.get("b") is None
+    assert len(cache) == 1
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = TTLCache("test", max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evict(1) == 1 and len(cache) == 1
+
+
+def test_get_first_returns_first_live_key():
+    cache = TTLCache("test", max_entries=10, ttl_seconds=60)
+    cache.set("model-b", "b")
+    cache.set("model-c", "c")
+    assert cache.get_first(["model-a", "model-b", "model-c"]) == "b"
+    assert cache.get_first(["model-a"]) is None
+
+
+def test_clear_rebinds_corpus_version():
+    cache = TTLCache("test", max_entries=10, ttl_seconds=60, corpus_version="v1")
+    cache.set("a", 1)
+    assert cache.clear("v2") == 1
+    assert cache.corpus_version == "v2" and len(cache) == 0
+
+
+def _snapshots(tmp_path):
+    snapshots = CacheSnapshots(path=str(tmp_path / "caches.json.gz"), interval_seconds=60)
+    return snapshots, snapshots.register(TTLCache("answers", 10, 60, corpus_version="v1"))
+
+
+def test_snapshot_round_trip(tmp_path):
+    snapshots, cache = _snapshots(tmp_path)
+    cache.set("old", "x")
+    cache.set("new", "y")
+    cache.set("expired", "z", ttl_seconds=-1)
+    assert asyncio.run(snapshots.save()) > 0
+
+    restored, restored_cache = _snapshots(tmp_path)
+    assert restored.load() == {"answers": 2}
+    assert list(restored_cache._entries) == ["old", "new"]
+    assert restored_cache.get("old") == "x" and restored_cache.get("new") == "y"
+    assert restored_cache.get("expired") is None
+
+
+def test_snapshot_drops_entries_that_expired_on_disk(tmp_path):
+    snapshots, cache = _snapshots(tmp_path)
+    cache.set("short", "x", ttl_seconds=0.05)
+    asyncio.run(snapshots.save())
+    time.sleep(0.1)
+    restored, restored_cache = _snapshots(tmp_path)
+    assert restored.load() == {"answers": 0}
+    assert len(restored_cache) == 0
+
+
+def test_snapshot_for_another_corpus_is_discarded(tmp_path):
+    snapshots, cache = _snapshots(tmp_path)
+    cache.set("a", 1)
+    asyncio.run(snapshots.save())
+
+    other = CacheSnapshots(path=str(tmp_path / "caches.json.gz"))
+    other_cache = other.register(TTLCache("answers", 10, 60, corpus_version="v2"))
+    assert other.load() == {"answers": 0}
+    assert len(other_cache) == 0
+
+
+def test_missing_or_corrupt_snapshot_is_ignored(tmp_path):
+    snapshots, _ = _snapshots(tmp_path)
+    assert snapshots.load() == {}
+    (tmp_path / "caches.json.gz").write_bytes(b"not gzip")
+    assert snapshots.load() == {}
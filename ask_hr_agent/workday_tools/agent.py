@@ -1,6 +1,9 @@
+import asyncio
 import json
+import logging
 import os
 import re
+import threading
 import time
 import uuid
 from urllib.parse import quote
@@ -35,13 +38,12 @@ if os.getenv("ASKHR_DISABLE_SSL_VERIFY", "false").lower() in ("1", "true", "yes"
 
 from google.adk.agents import LlmAgent
 from google.adk.models import Gemini
+from google.adk.planners import BuiltInPlanner
 from google.adk.runners import InMemoryRunner
 from google.genai import types
 
-from .workday_api import complete_oauth_flow, get_valid_time_off_dates, submit_time_off_request
-from .doc_generator import (
-    generate_docx_from_template,
-)
+
+logger = logging.getLogger(__name__)
 
 CONFIG_PATH = str(Path(__file__).parent / "config.json")
 TOKEN_CACHE_PATH = Path(__file__).parent / ".token_cache.json"
@@ -72,6 +74,16 @@ def _load_env_from_file() -> None:
 
 _load_env_from_file()
 
+# Imported after .env is loaded: the cache manager, memory accountant and tracer read their ASKHR_* settings at import.
+from .context_cache import context_cache
+from .memory import memory, register_adk_runners
+from .token_usage import token_usage, usage_from_event
+from .tracing import tracer
+from .workday_api import complete_oauth_flow, get_valid_time_off_dates, submit_time_off_request
+from .doc_generator import (
+    generate_docx_from_template,
+)
+
 
 def _build_download_url(doc_key: str) -> str:
     base_url = os.getenv("WORKDAY_TOOLS_PUBLIC_URL") or os.getenv("WORKDAY_TOOLS_URL") or ""
@@ -108,10 +120,15 @@ def _get_cached_workday_data() -> Dict[str, Any]:
         raise ValueError(f"OAuth flow failed: {e}") from e
 
 
+# Serialises OAuth so a prewarm and a chat request never launch two browser logins.
+_workday_data_lock = threading.Lock()
+
+
 def _get_workday_data() -> Dict[str, Any]:
     """Get cached workday data."""
     try:
-        return _get_cached_workday_data()
+        with _workday_data_lock:
+            return _get_cached_workday_data()
     except ValueError:
         raise
     except Exception as e:
@@ -132,22 +149,22 @@ def reset_auth_cache() -> bool:
         _reset_session()
         if TOKEN_CACHE_PATH.exists():
             TOKEN_CACHE_PATH.unlink()
-            print('[OK] Token cache cleared (.token_cache.json deleted)')
+            logger.info("Token cache cleared (.token_cache.json deleted)")
         elif LEGACY_TOKEN_CACHE_PATH.exists():
             LEGACY_TOKEN_CACHE_PATH.unlink()
-            print('[OK] Legacy token cache cleared (.token_cache.pkl deleted)')
+            logger.info("Legacy token cache cleared (.token_cache.pkl deleted)")
         else:
-            print('[OK] No token cache found (already clear)')
+            logger.info("No token cache found (already clear)")
         if EVL_SENT_FLAG_PATH.exists():
             try:
                 EVL_SENT_FLAG_PATH.unlink()
-                print('[OK] EVL sent flag cleared')
+                logger.info("EVL sent flag cleared")
             except Exception:
                 pass
-        print('[OK] Session state reset (context + session cleared)')
+        logger.info("Session state reset (context + session cleared)")
         return True
     except Exception as e:
-        print(f'[ERROR] Failed to reset auth cache: {e}')
+        logger.error("Failed to reset auth cache: %s", e)
         return False
 
 
@@ -221,6 +238,7 @@ def _resolve_time_off_type_id(identifier: str) -> str:
         raise
 
 
+@tracer.traced("workday.tool", tool="get_workday_id")
 def get_workday_id() -> str:
     """Get user's Workday ID, name, job details, and leave information."""
     try:
@@ -271,6 +289,7 @@ def get_workday_id() -> str:
         return json.dumps({"success": False, "error": str(e)})
 
 
+@tracer.traced("workday.tool", tool="check_valid_dates")
 def check_valid_dates(time_off_type_id: str, dates: list) -> str:
     """Check if dates are valid for a time off request."""
     try:
@@ -301,6 +320,7 @@ def check_valid_dates(time_off_type_id: str, dates: list) -> str:
         return json.dumps({"success": False, "error": str(e)})
 
 
+@tracer.traced("workday.tool", tool="submit_time_off")
 def submit_time_off(time_off_type_id: str, start_date: str, end_date: str, 
                      hours_per_day: float, comment: Optional[str] = None) -> str:
     """Submit a time off request."""
@@ -379,6 +399,7 @@ def _calculate_tenure(hire_date_str: str, as_of: Optional[date] = None) -> Dict[
     }
 
 
+@tracer.traced("workday.tool", tool="get_tenure")
 def get_tenure() -> str:
     """Return computed tenure from hire date to today."""
     data_json = get_workday_id()
@@ -602,14 +623,66 @@ _submission_complete = False
 _evl_sent_to_hr = EVL_SENT_FLAG_PATH.exists()
 
 
+def _cached_workday_data_root() -> Any:
+    # Only read through the lru_cache when it is populated; a miss would start an OAuth flow.
+    if _get_cached_workday_data.cache_info().currsize:
+        return _get_cached_workday_data()
+    return None
+
+
+def _evict_workday_data(_n: int) -> int:
+    # Drops the in-memory copy only; the next call reloads it from the token cache file.
+    _get_cached_workday_data.cache_clear()
+    return 1
+
+
+memory.register(
+    "workday_data",
+    count=lambda: _get_cached_workday_data.cache_info().currsize,
+    root=_cached_workday_data_root,
+    evict=_evict_workday_data,
+)
+memory.register("user_context", count=lambda: 1 if _user_context else 0, root=lambda: _user_context)
+register_adk_runners("adk_sessions.workday", lambda: [_runner] if _runner is not None else [])
+
+
+def _optional_int_env(name: str) -> Optional[int]:
+    value = os.getenv(name, "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _model_name() -> str:
+    return os.getenv("ASKHR_WORKDAY_MODEL", "gemini-2.5-pro")
+
+
 def _build_agent() -> LlmAgent:
-    model_name = os.getenv("ASKHR_WORKDAY_MODEL", "gemini-2.5-pro")
+    """Build the Workday agent from the ASKHR_WORKDAY_* generation profile."""
+    model_name = _model_name()
+    config_kwargs: Dict[str, Any] = {
+        "temperature": float(os.getenv("ASKHR_WORKDAY_TEMPERATURE", "0.7")),
+    }
+    max_output_tokens = _optional_int_env("ASKHR_WORKDAY_MAX_OUTPUT_TOKENS")
+    if max_output_tokens:
+        config_kwargs["max_output_tokens"] = max_output_tokens
+    thinking_budget = _optional_int_env("ASKHR_WORKDAY_THINKING_BUDGET")
+    planner = None
+    if thinking_budget is not None:
+        # ADK only accepts thinking config through a planner.
+        planner = BuiltInPlanner(thinking_config=types.ThinkingConfig(thinking_budget=thinking_budget))
     return LlmAgent(
         name="workday_tools",
         model=Gemini(model=model_name),
         instruction=SYSTEM_INSTRUCTION,
         tools=tools,
-        generate_content_config=types.GenerateContentConfig(temperature=0.7),
+        planner=planner,
+        generate_content_config=types.GenerateContentConfig(**config_kwargs),
+        # The profile block joins the cached prefix (or is inlined ahead of the history).
+        before_model_callback=context_cache.before_model_callback(prefix=lambda: _user_context),
     )
 
 
@@ -681,6 +754,19 @@ AVAILABLE TIME-OFF TYPES:
         return f"[Error fetching context: {str(e)}]"
 
 
+async def prewarm() -> Dict[str, Any]:
+    """Warm the OAuth token, profile context and agent session ahead of the first question."""
+    started = time.time()
+    # Token/profile hydration is blocking I/O (and possibly a browser login); keep it off the loop.
+    await asyncio.to_thread(get_user_context)
+    runner = _get_runner()
+    await _ensure_session(runner, "workday_user", _session_id)
+    return {
+        "success": _user_context is not None,
+        "seconds": round(time.time() - started, 3),
+    }
+
+
 async def chat_with_workday(user_message: str) -> str:
     """Send a message to the agent with user context."""
     global _submission_complete, _evl_sent_to_hr
@@ -735,7 +821,9 @@ async def chat_with_workday(user_message: str) -> str:
             except Exception as e:
                 return f"Unable to generate the employment verification letter: {e}"
 
-        evl_response = _maybe_handle_evl(user_message)
+        # Both paths below may wait on _workday_data_lock (held by a prewarm through OAuth or a browser
+        # login) and then do blocking Workday I/O, so they run off the event loop.
+        evl_response = await asyncio.to_thread(_maybe_handle_evl, user_message)
         if evl_response:
             return evl_response
 
@@ -744,9 +832,13 @@ async def chat_with_workday(user_message: str) -> str:
             _reset_session()
             _submission_complete = False
 
-        context = get_user_context()
+        context = await asyncio.to_thread(get_user_context)
         today_str = date.today().isoformat()
-        full_message = f"{context}\n\nTODAY: {today_str}\n\nUSER MESSAGE: {user_message}"
+        if _user_context:
+            # The profile block travels with the model prefix, not with every turn.
+            full_message = f"TODAY: {today_str}\n\nUSER MESSAGE: {user_message}"
+        else:
+            full_message = f"{context}\n\nTODAY: {today_str}\n\nUSER MESSAGE: {user_message}"
 
         runner = _get_runner()
         await _ensure_session(runner, "workday_user", _session_id)
@@ -756,15 +848,19 @@ async def chat_with_workday(user_message: str) -> str:
         )
 
         reply_text = ""
-        async for event in runner.run_async(
-            user_id="workday_user",
-            session_id=_session_id,
-            new_message=content,
-        ):
-            if event.is_final_response():
-                reply_text = _extract_text(event.content) or reply_text
-                if event.error_message:
-                    reply_text = event.error_message
+        # Tool, Workday REST, OAuth and document-render spans nest under the agent span.
+        with tracer.span("agent.workday", model=_model_name()):
+            async for event in runner.run_async(
+                user_id="workday_user",
+                session_id=_session_id,
+                new_message=content,
+            ):
+                # Each model call (tool round-trips included) is its own event and is recorded separately.
+                token_usage.record("workday", _model_name(), "workday_user", usage_from_event(event))
+                if event.is_final_response():
+                    reply_text = _extract_text(event.content) or reply_text
+                    if event.error_message:
+                        reply_text = event.error_message
 
         if not reply_text:
             return "I apologize, but I couldn't process that request. Please try again."
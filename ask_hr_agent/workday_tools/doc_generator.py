@@ -1,3 +1,4 @@
+import logging
 from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, Any
@@ -27,6 +28,11 @@ except Exception:
     Mm = None  # type: ignore
     _HAS_INLINE_IMAGE = False
 
+from .memory import memory
+from .tracing import tracer
+
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).parent
 TEMPLATES_DIR = BASE_DIR / "templates"
@@ -36,6 +42,22 @@ TEMPLATES_DIR.mkdir(exist_ok=True)
 _document_cache: Dict[str, Dict[str, Any]] = {}
 
 
+def _evict_documents(n: int) -> int:
+    """Drop the ``n`` oldest generated documents (keys are insertion-ordered)."""
+    oldest = list(_document_cache)[:n]
+    for doc_key in oldest:
+        _document_cache.pop(doc_key, None)
+    return len(oldest)
+
+
+memory.register(
+    "documents",
+    count=lambda: len(_document_cache),
+    root=lambda: _document_cache,
+    evict=_evict_documents,
+)
+
+
 def _sanitize_filename(name: str, preserve_spaces: bool = False) -> str:
     """Sanitize filename by removing only invalid filesystem characters.
     
@@ -55,6 +77,7 @@ def _sanitize_filename(name: str, preserve_spaces: bool = False) -> str:
     return safe or f"document_{int(datetime.now().timestamp())}"
 
 
+@tracer.traced("document.render")
 def generate_docx_from_template(template_name: str, context: Dict[str, Any], filename: Optional[str] = None) -> Dict[str, Any]:
     """Render a DOCX from a .docx template and store in memory.
 
@@ -106,7 +129,7 @@ def generate_docx_from_template(template_name: str, context: Dict[str, Any], fil
                 for key in spec["filenames"]:
                     context[key] = inline_img
             except Exception as e:
-                print(f"[DocGen] Inline image error for {filename_val}: {e}")
+                logger.warning("Inline image error for %s: %s", filename_val, e)
 
     tpl.render(context or {}, jinja_env=env)
     
@@ -0,0 +1,280 @@
+import asyncio
+import itertools
+import json
+import logging
+import math
+import os
+import sys
+import tracemalloc
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def approx_size(root: Any, max_objects: int = 200_000) -> int:
+    """Approximate deep size in bytes of ``root`` and everything it references.
+
+    Walks containers and instance ``__dict__``/``__slots__``, counting each
+    object once. Stops after ``max_objects`` objects, so very large stores
+    are under-reported rather than stalling the caller.
+    """
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack and len(seen) < max_objects:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, type):
+            continue
+        seen.add(id(obj))
+        try:
+            total += sys.getsizeof(obj)
+        except TypeError:
+            continue
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        else:
+            attrs = getattr(obj, "__dict__", None)
+            if attrs is not None:
+                stack.append(attrs)
+            for slot in getattr(type(obj), "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return total
+
+
+def sample_items(root: Any, k: int) -> List[Any]:
+    """Up to ``k`` items spread evenly over a dict (as key/value pairs) or sequence; ``[]`` for anything else."""
+    if isinstance(root, dict):
+        items: Any = root.items()
+    elif isinstance(root, (list, tuple, set, frozenset, deque)):
+        items = root
+    else:
+        return []
+    step = max(1, len(items) // k)
+    return list(itertools.islice(items, 0, step * k, step))
+
+
+class _Store:
+    def __init__(
+        self,
+        name: str,
+        count: Callable[[], int],
+        root: Callable[[], Any],
+        evict: Optional[Callable[[int], int]],
+        sample: Optional[Callable[[int], List[Any]]],
+    ):
+        self.name = name
+        self.count = count
+        self.root = root
+        self.evict = evict
+        self.sample = sample or (lambda k: sample_items(root(), k))
+
+
+class MemoryAccountant:
+    """Named in-process stores with approximate sizes, byte budgets and tracemalloc diffs.
+
+    Components register a store with a ``count`` and a ``root`` to measure,
+    plus an optional ``evict(n)`` that drops the ``n`` least valuable items
+    and an optional ``sample(k)`` returning ``k`` representative items (by
+    default spread over ``root`` when it is a dict or sequence).
+    ``check_budgets`` (run periodically and on every report) warns when a
+    store exceeds its budget in ``MEMORY_BUDGETS`` and evicts the estimated
+    number of items needed to get back under it. The periodic check only
+    looks at budgeted stores and sizes them from a sample; reports walk
+    every store in full.
+    """
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, int]] = None,
+        check_interval: float = 60.0,
+        sample_size: int = 32,
+    ):
+        self.budgets = dict(budgets or {})
+        self.check_interval = check_interval
+        self.sample_size = sample_size
+        self._stores: Dict[str, _Store] = {}
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def register(
+        self,
+        name: str,
+        count: Callable[[], int],
+        root: Callable[[], Any],
+        evict: Optional[Callable[[int], int]] = None,
+        sample: Optional[Callable[[int], List[Any]]] = None,
+    ) -> None:
+        self._stores[name] = _Store(name, count, root, evict, sample)
+
+    def measure(self, names: Optional[Iterable[str]] = None, estimate: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Count and size every store, or just ``names``; ``estimate`` sizes large stores from a sample."""
+        stores = self._stores.values() if names is None else [self._stores[n] for n in names if n in self._stores]
+        report: Dict[str, Dict[str, Any]] = {}
+        for store in stores:
+            try:
+                count = store.count()
+                size = self._estimate_size(store, count) if estimate else approx_size(store.root())
+            except Exception as exc:
+                report[store.name] = {"error": str(exc)}
+                continue
+            report[store.name] = {"count": count, "approx_bytes": size, "budget_bytes": self.budgets.get(store.name)}
+            metrics.set_gauge("memory_store_items", count, store=store.name)
+            metrics.set_gauge("memory_store_bytes", size, store=store.name)
+        return report
+
+    def _estimate_size(self, store: _Store, count: int) -> int:
+        # count x mean sampled item size; small or unsampleable stores are cheap enough to walk.
+        if count > self.sample_size:
+            items = store.sample(self.sample_size)
+            if items:
+                return int(count * sum(approx_size(item) for item in items) / len(items))
+        return approx_size(store.root())
+
+    def check_budgets(self, report: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, int]:
+        report = report if report is not None else self.measure(self.budgets, estimate=True)
+        evicted: Dict[str, int] = {}
+        for name, budget in self.budgets.items():
+            usage = report.get(name) or {}
+            size, count = usage.get("approx_bytes", 0), usage.get("count", 0)
+            if not budget or size <= budget:
+                continue
+            metrics.incr("memory_budget_exceeded_total", store=name)
+            store = self._stores.get(name)
+            if store is None or store.evict is None or not count:
+                logger.warning("Memory store %s is over budget (%d > %d bytes)", name, size, budget)
+                continue
+            per_item = size / count
+            wanted = min(count, math.ceil((size - budget) / per_item))
+            evicted[name] = store.evict(wanted)
+            metrics.incr("memory_evicted_total", evicted[name], store=name)
+            logger.warning(
+                "Memory store %s is over budget (%d > %d bytes); evicted %d of %d items",
+                name, size, budget, evicted[name], count,
+            )
+        return evicted
+
+    def report(self, trace: Optional[str] = None, top: int = 20) -> Dict[str, Any]:
+        """Store sizes, plus tracemalloc control: ``start``, ``diff`` (vs. previous call) or ``stop``."""
+        stores = self.measure()
+        result: Dict[str, Any] = {
+            "stores": stores,
+            "evicted": self.check_budgets(stores),
+            "tracemalloc": tracemalloc.is_tracing(),
+        }
+        if trace == "start":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(int(os.getenv("ASKHR_MEMORY_TRACEMALLOC_FRAMES", "10")))
+            self._snapshot = tracemalloc.take_snapshot()
+            result["tracemalloc"] = True
+        elif trace == "diff" and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            if self._snapshot is not None:
+                stats = snapshot.compare_to(self._snapshot, "lineno")[:top]
+                result["top_growth"] = [
+                    {"location": str(stat.traceback), "size_diff": stat.size_diff, "count_diff": stat.count_diff}
+                    for stat in stats
+                ]
+            self._snapshot = snapshot
+        elif trace == "stop":
+            tracemalloc.stop()
+            self._snapshot = None
+            result["tracemalloc"] = False
+        return result
+
+    async def start(self) -> None:
+        if self.budgets and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                self.check_budgets()
+            except Exception as exc:
+                logger.error("Memory budget check failed: %s", exc)
+
+
+def _adk_sessions(runners: Iterable[Any]) -> Iterable[Dict[str, Any]]:
+    for runner in runners:
+        sessions = getattr(getattr(runner, "session_service", None), "sessions", None)
+        if sessions:
+            yield sessions
+
+
+def adk_session_count(runners: Iterable[Any]) -> int:
+    return sum(
+        len(by_session)
+        for sessions in _adk_sessions(runners)
+        for by_user in sessions.values()
+        for by_session in by_user.values()
+    )
+
+
+def evict_adk_sessions(runners: Iterable[Any], n: int) -> int:
+    """Drop the ``n`` least recently updated sessions across ADK in-memory session services."""
+    ranked = sorted(
+        (getattr(session, "last_update_time", 0.0), id(by_session), session_id, by_session)
+        for sessions in _adk_sessions(runners)
+        for by_user in sessions.values()
+        for by_session in by_user.values()
+        for session_id, session in by_session.items()
+    )
+    for _, _, session_id, by_session in ranked[:n]:
+        by_session.pop(session_id, None)
+    return min(n, len(ranked))
+
+
+def _sample_adk_sessions(runners: Iterable[Any], k: int) -> List[Any]:
+    runners = list(runners)
+    step = max(1, adk_session_count(runners) // k)
+    sessions = (
+        session
+        for sessions in _adk_sessions(runners)
+        for by_user in sessions.values()
+        for by_session in by_user.values()
+        for session in by_session.values()
+    )
+    return list(itertools.islice(sessions, 0, step * k, step))
+
+
+def register_adk_runners(name: str, runners: Callable[[], Iterable[Any]]) -> None:
+    memory.register(
+        name,
+        count=lambda: adk_session_count(runners()),
+        root=lambda: list(_adk_sessions(runners())),
+        evict=lambda n: evict_adk_sessions(runners(), n),
+        sample=lambda k: _sample_adk_sessions(runners(), k),
+    )
+
+
+def _budgets_from_env() -> Dict[str, int]:
+    raw = os.getenv("ASKHR_MEMORY_BUDGETS", "").strip()
+    if not raw:
+        return {}
+    try:
+        return {str(name): int(limit) for name, limit in json.loads(raw).items()}
+    except (ValueError, AttributeError) as exc:
+        logger.error("Ignoring invalid ASKHR_MEMORY_BUDGETS: %s", exc)
+        return {}
+
+
+memory = MemoryAccountant(_budgets_from_env(), float(os.getenv("ASKHR_MEMORY_CHECK_INTERVAL_SECONDS", "60")))
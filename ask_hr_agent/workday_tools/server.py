@@ -1,12 +1,15 @@
+import asyncio
+import hmac
 import logging
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import FastAPI, HTTPException, Request, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse, StreamingResponse, Response
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse, Response
 from fastapi.templating import Jinja2Templates
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
@@ -20,17 +23,42 @@ class _GenaiNonTextWarningFilter(logging.Filter):
 configure_tls()
 logging.getLogger("google.genai.types").addFilter(_GenaiNonTextWarningFilter())
 
-from .agent import chat_with_workday, get_workday_id, reset_auth_cache
+from .agent import chat_with_workday, get_workday_id, prewarm, reset_auth_cache
+from .logging_config import RequestContextMiddleware, configure_logging, stop_logging
+from .loop_monitor import loop_monitor
+from .memory import memory
+from .metrics import metrics
+from .profiler import ProfilingMiddleware, profiler
+from .token_usage import token_usage
+from .tracing import TracingMiddleware, tracer
 from .doc_generator import (
     get_document_filename_from_cache,
     get_document_from_cache,
     get_document_mimetype_from_cache,
 )
 
+# After the agent import, which loads .env and with it the ASKHR_LOG_* settings.
+configure_logging()
+
+logger = logging.getLogger(__name__)
+
 BASE_DIR = Path(__file__).parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await loop_monitor.start()
+    await memory.start()
+    try:
+        yield
+    finally:
+        await loop_monitor.stop()
+        await memory.stop()
+        stop_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow cross-origin calls from the frontend (dev: allow all; lock down in prod)
 app.add_middleware(
@@ -40,10 +68,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware, profiler=profiler)
+# Added last so they wrap every other middleware: the request id outermost, then the request span.
+app.add_middleware(TracingMiddleware, tracer=tracer)
+app.add_middleware(RequestContextMiddleware)
 
 if str(os.getenv("ASKHR_RESET_AUTH_ON_STARTUP", "true")).lower() in ("1", "true", "yes"):
     reset_auth_cache()
 
+_prewarm_task: Optional["asyncio.Task[Dict[str, Any]]"] = None
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    """Guard debug endpoints with the shared ASKHR_ADMIN_TOKEN (disabled when unset)."""
+    expected = os.getenv("ASKHR_ADMIN_TOKEN", "")
+    if not expected or not x_admin_token or not hmac.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
 
 @app.get("/")
 async def index(request: Request):
@@ -82,8 +123,10 @@ async def chat(request: Request) -> Dict[str, Any]:
         )
 
     try:
+        token_usage.begin_turn()
         response = await chat_with_workday(message)
-        return {"response": response}
+        # Per-stage token counts let the router attribute this turn's usage to its user.
+        return {"response": response, "usage": token_usage.turn_usage()}
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -101,6 +144,90 @@ async def chat(request: Request) -> Dict[str, Any]:
         )
 
 
+@app.post("/prewarm", status_code=status.HTTP_202_ACCEPTED)
+async def prewarm_session() -> Dict[str, Any]:
+    """Start warming token, profile and agent session in the background."""
+    global _prewarm_task
+    if _prewarm_task is not None and not _prewarm_task.done():
+        return {"status": "in_progress"}
+    _prewarm_task = asyncio.create_task(prewarm())
+    _prewarm_task.add_done_callback(_log_prewarm_result)
+    return {"status": "started"}
+
+
+def _log_prewarm_result(task: "asyncio.Task[Dict[str, Any]]") -> None:
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.warning("Workday prewarm failed: %s", error)
+    else:
+        logger.info("Workday prewarm finished: %s", task.result())
+
+
+@app.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    return metrics.snapshot()
+
+
+@app.get("/debug/loop", dependencies=[Depends(require_admin_token)])
+async def loop_stalls() -> Dict[str, Any]:
+    return {"enabled": loop_monitor.enabled, "stalls": loop_monitor.recent_stalls()}
+
+
+@app.get("/debug/memory", dependencies=[Depends(require_admin_token)])
+async def memory_report(trace: Optional[str] = None, top: int = 20) -> Dict[str, Any]:
+    """Approximate size of each in-process store; ``trace`` (start/diff/stop) drives a tracemalloc diff."""
+    if trace not in (None, "start", "diff", "stop"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="trace must be start, diff or stop")
+    return memory.report(trace, max(1, min(top, 200)))
+
+
+@app.get("/debug/traces", dependencies=[Depends(require_admin_token)])
+async def list_traces(limit: int = 50) -> Dict[str, Any]:
+    return {"enabled": tracer.enabled, "traces": tracer.traces(max(1, min(limit, 500)))}
+
+
+@app.get("/debug/traces/{trace_id}", dependencies=[Depends(require_admin_token)])
+async def get_trace(trace_id: str, format: str = "json"):
+    """Spans this service recorded for a trace; ``format=text`` renders a waterfall."""
+    spans = tracer.trace(trace_id)
+    if not spans:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found")
+    if format == "text":
+        return PlainTextResponse(tracer.render(trace_id))
+    return {"trace_id": trace_id, "spans": spans}
+
+
+@app.get("/debug/profile", dependencies=[Depends(require_admin_token)])
+async def profile_status() -> Dict[str, Any]:
+    return profiler.status()
+
+
+@app.post("/debug/profile/sampling", dependencies=[Depends(require_admin_token)])
+async def configure_profile_sampling(every_n: int = 0, max_profiles: int = 20) -> Dict[str, Any]:
+    """Profile one in ``every_n`` requests (0 disables) until ``max_profiles`` are stored."""
+    profiler.configure_sampling(every_n, max_profiles)
+    return profiler.status()
+
+
+@app.post("/debug/profile/capture", dependencies=[Depends(require_admin_token)])
+async def capture_profile(seconds: float = 10.0) -> Dict[str, Any]:
+    try:
+        files = await profiler.capture(seconds)
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return {"files": files}
+
+
+@app.get("/debug/profile/files/{name}", dependencies=[Depends(require_admin_token)])
+async def download_profile(name: str):
+    path = profiler.resolve(name)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return FileResponse(path, filename=name, media_type="application/octet-stream")
+
+
 @app.get("/diagnostics")
 async def diagnostics() -> Dict[str, Any]:
     """Return diagnostic info about Workday auth and user data."""
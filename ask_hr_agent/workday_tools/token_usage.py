@@ -0,0 +1,116 @@
+import contextvars
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from .memory import memory
+from .metrics import metrics
+from .tracing import tracer
+
+# Cached tokens are a subset of the prompt count, so totals leave them out.
+BILLED_KINDS = ("prompt", "thinking", "output")
+
+_turn: contextvars.ContextVar[Optional[Dict[str, Dict[str, Any]]]] = contextvars.ContextVar(
+    "token_usage_turn", default=None
+)
+
+
+def usage_from_event(event: Any) -> Dict[str, int]:
+    """Token counts reported on an ADK event, keyed by short names."""
+    usage = getattr(event, "usage_metadata", None)
+    if usage is None:
+        return {}
+    fields = {
+        "prompt": "prompt_token_count",
+        "cached": "cached_content_token_count",
+        "thinking": "thoughts_token_count",
+        "output": "candidates_token_count",
+    }
+    return {key: getattr(usage, attr, None) or 0 for key, attr in fields.items()}
+
+
+def add_usage(total: Dict[str, Any], usage: Dict[str, Any]) -> Dict[str, Any]:
+    for kind, count in usage.items():
+        if isinstance(count, (int, float)):
+            total[kind] = total.get(kind, 0) + count
+    return total
+
+
+def stage_for_profile(profile_name: str) -> str:
+    # Cascade tiers share a stage; the model label tells them apart.
+    return profile_name[: -len("_fast")] if profile_name.endswith("_fast") else profile_name
+
+
+class TokenUsage:
+    """Token accounting for every LLM call, by stage, model and user.
+
+    ``record`` is called once per model call (hedged and cascaded attempts
+    included, since they are billed too). It feeds the ``llm_tokens_total``
+    counters (stage/model/kind), a per-user ledger bounded to
+    ``max_users`` recently active users, and the breakdown of the current
+    chat turn opened with ``begin_turn``.
+    """
+
+    def __init__(self, max_users: int):
+        self.max_users = max_users
+        self._users: "OrderedDict[str, Dict[str, Dict[str, int]]]" = OrderedDict()
+
+    def begin_turn(self) -> None:
+        _turn.set({})
+
+    def turn_usage(self) -> Dict[str, Dict[str, Any]]:
+        return _turn.get() or {}
+
+    def record(self, stage: str, model: str, user_id: str, usage: Dict[str, int]) -> None:
+        if not usage:
+            return
+        metrics.incr("llm_calls_total", stage=stage, model=model)
+        for kind, count in usage.items():
+            if count:
+                metrics.incr("llm_tokens_total", count, stage=stage, model=model, kind=kind)
+        current = tracer.current()
+        if current is not None:
+            current.set(**{f"tokens.{kind}": count for kind, count in usage.items()})
+        self._add(stage, [model], user_id, {"calls": 1, **usage})
+
+    def merge_remote(self, user_id: str, turn: Dict[str, Dict[str, Any]]) -> None:
+        """Fold a downstream service's turn breakdown into this turn and the user ledger.
+
+        The downstream service exports its own ``llm_tokens_total``, so this
+        does not touch the counters.
+        """
+        for stage, entry in (turn or {}).items():
+            if isinstance(entry, dict):
+                self._add(stage, list(entry.get("models") or []), user_id, entry)
+
+    def user(self, user_id: str) -> Optional[Dict[str, Dict[str, int]]]:
+        return self._users.get(user_id)
+
+    def top_users(self, limit: int = 20) -> List[Dict[str, Any]]:
+        totals = [
+            {"user_id": user_id, "tokens": sum(_tokens(entry) for entry in stages.values()), "stages": stages}
+            for user_id, stages in self._users.items()
+        ]
+        totals.sort(key=lambda item: item["tokens"], reverse=True)
+        return totals[:limit]
+
+    def _add(self, stage: str, models: List[str], user_id: str, usage: Dict[str, Any]) -> None:
+        stages = self._users.pop(user_id, None) or {}
+        self._users[user_id] = stages
+        add_usage(stages.setdefault(stage, {}), usage)
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+
+        turn = _turn.get()
+        if turn is not None:
+            entry = turn.setdefault(stage, {"models": []})
+            entry["models"].extend(model for model in models if model not in entry["models"])
+            add_usage(entry, usage)
+
+
+def _tokens(entry: Dict[str, int]) -> int:
+    return sum(entry.get(kind, 0) for kind in BILLED_KINDS)
+
+
+token_usage = TokenUsage(int(os.getenv("ASKHR_USAGE_LEDGER_MAX_USERS", "10000")))
+memory.register("usage_ledger", count=lambda: len(token_usage._users), root=lambda: token_usage._users)
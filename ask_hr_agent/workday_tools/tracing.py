@@ -0,0 +1,310 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, MutableMapping, Optional
+
+from .memory import memory
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("trace_span", default=None)
+
+
+class Span:
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "sampled", "start", "perf_start", "duration_ms", "attributes", "status",
+    )
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool, attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.start = time.time()
+        self.perf_start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled, so callers need no ``None`` checks."""
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    match = _TRACEPARENT.match((value or "").strip().lower())
+    if match is None or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    return {"trace_id": match.group(1), "parent_id": match.group(2), "sampled": bool(int(match.group(3), 16) & 1)}
+
+
+class Tracer:
+    """Minimal W3C trace-context tracer with a local exporter.
+
+    Spans nest through a context variable, so they follow the request across
+    ``await``, ``asyncio.gather`` and ``asyncio.to_thread``. ``inject`` adds a
+    ``traceparent`` header to outgoing calls and ``TracingMiddleware`` picks
+    it up on the other side, so one trace id covers every service a turn
+    touches. Finished spans go to an in-memory ring buffer (served at
+    ``/debug/traces``) and, when ``export_path`` is set, to a JSONL file
+    written by a background thread. Unsampled traces still propagate ids but
+    record nothing.
+    """
+
+    def __init__(
+        self,
+        service: str,
+        enabled: bool = True,
+        sample_rate: float = 1.0,
+        buffer_spans: int = 5000,
+        export_path: str = "",
+    ):
+        self.service = service
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.export_path = Path(export_path) if export_path else None
+        self._spans: Deque[Dict[str, Any]] = deque(maxlen=buffer_spans)
+        self._export_queue: "queue.SimpleQueue[Dict[str, Any]]" = queue.SimpleQueue()
+        self._exporter: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def current() -> Optional[Span]:
+        return _current.get()
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Dict[str, Any]] = None, **attributes: Any) -> Iterator[Any]:
+        """Open a child of the current span, or of ``parent`` (a parsed traceparent), or a new trace."""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        current = _current.get()
+        if parent is not None:
+            trace_id, parent_id, sampled = parent["trace_id"], parent["parent_id"], parent["sampled"]
+        elif current is not None:
+            trace_id, parent_id, sampled = current.trace_id, current.span_id, current.sampled
+        else:
+            trace_id, parent_id, sampled = os.urandom(16).hex(), None, random.random() < self.sample_rate
+        span = Span(name, trace_id, parent_id, sampled, {"service": self.service, **attributes})
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.status = "error"
+            span.attributes.setdefault("error", f"{type(exc).__name__}: {exc}")
+            raise
+        finally:
+            _current.reset(token)
+            self.end(span)
+
+    def end(self, span: Any) -> None:
+        """Finish ``span`` now rather than when its ``span()`` block exits; later changes are not recorded."""
+        if not isinstance(span, Span) or span.duration_ms is not None:
+            return
+        span.duration_ms = round((time.perf_counter() - span.perf_start) * 1000, 3)
+        if span.sampled:
+            self._finish(span)
+
+    def traced(self, name: str, **attributes: Any) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decorator form of ``span`` for plain (synchronous) functions."""
+
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(name, **attributes):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def inject(self, headers: Optional[MutableMapping[str, str]] = None) -> MutableMapping[str, str]:
+        headers = headers if headers is not None else {}
+        current = _current.get()
+        if current is not None:
+            headers["traceparent"] = current.traceparent
+        return headers
+
+    def traces(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most recent traces first, summarised by their root (or earliest) span here."""
+        with self._lock:
+            spans = list(self._spans)
+        by_trace: Dict[str, List[Dict[str, Any]]] = {}
+        for span in spans:
+            by_trace.setdefault(span["trace_id"], []).append(span)
+        summaries = []
+        for trace_id, members in by_trace.items():
+            root = min(members, key=lambda span: span["start"])
+            summaries.append({
+                "trace_id": trace_id,
+                "root": root["name"],
+                "start": root["start"],
+                "duration_ms": root["duration_ms"],
+                "spans": len(members),
+                "errors": sum(1 for span in members if span["status"] == "error"),
+            })
+        summaries.sort(key=lambda item: item["start"], reverse=True)
+        return summaries[:limit]
+
+    def trace(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Spans of one trace in start order, each with its ``depth`` in the local tree."""
+        with self._lock:
+            spans = sorted((span for span in self._spans if span["trace_id"] == trace_id), key=lambda s: s["start"])
+        depth: Dict[str, int] = {}
+        ordered = []
+        for span in spans:
+            depth[span["span_id"]] = depth.get(span["parent_id"], -1) + 1
+            ordered.append({**span, "depth": depth[span["span_id"]]})
+        return ordered
+
+    def render(self, trace_id: str, width: int = 40) -> str:
+        """Text waterfall of one trace: offset, duration and a bar per span."""
+        spans = self.trace(trace_id)
+        if not spans:
+            return ""
+        origin = spans[0]["start"]
+        total_ms = max((span["start"] - origin) * 1000 + (span["duration_ms"] or 0) for span in spans) or 1.0
+        lines = [f"trace {trace_id} ({total_ms:.1f} ms, {len(spans)} spans)"]
+        for span in spans:
+            offset_ms = (span["start"] - origin) * 1000
+            begin = int(offset_ms / total_ms * width)
+            length = max(1, int((span["duration_ms"] or 0) / total_ms * width))
+            bar = " " * begin + "#" * min(length, width - begin)
+            flag = " !" if span["status"] == "error" else ""
+            lines.append(
+                f"{offset_ms:9.1f} {span['duration_ms'] or 0:9.1f} ms |{bar:<{width}}| "
+                f"{'  ' * span['depth']}{span['name']}{flag}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def _finish(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            self._spans.append(record)
+        metrics.observe("span_ms", span.duration_ms, span=span.name)
+        if self.export_path is not None:
+            self._ensure_exporter()
+            self._export_queue.put(record)
+
+    def _ensure_exporter(self) -> None:
+        if self._exporter is None:
+            with self._lock:
+                if self._exporter is None:
+                    self._exporter = threading.Thread(target=self._export, name="trace-exporter", daemon=True)
+                    self._exporter.start()
+
+    def _export(self) -> None:
+        self.export_path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            batch = [self._export_queue.get()]
+            while len(batch) < 512:
+                try:
+                    batch.append(self._export_queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.export_path, "a", encoding="utf-8") as handle:
+                    handle.writelines(json.dumps(record, default=str) + "\n" for record in batch)
+            except Exception as exc:
+                metrics.incr("trace_export_errors_total")
+                logger.warning("Trace export to %s failed: %s", self.export_path, exc)
+
+
+class TracingMiddleware:
+    """ASGI middleware that opens a server span per HTTP request, continuing an incoming ``traceparent``.
+
+    The server span ends with the last response body chunk. Work the app
+    does after that (``BackgroundTasks`` such as shadow calls) is recorded
+    as a separate ``<name> background`` span so it does not inflate latency.
+    """
+
+    def __init__(self, app: Any, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not self.tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope.get("headers") or [])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        name = f"{scope.get('method', '')} {scope.get('path', '')}"
+        background: List[Span] = []
+        with self.tracer.span(name, parent=parent, kind="server") as span:
+
+            async def _send(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    span.set(status_code=message["status"])
+                    if message["status"] >= 500:
+                        span.status = "error"
+                    message.setdefault("headers", [])
+                    message["headers"] = [*message["headers"], (b"x-trace-id", span.trace_id.encode("ascii"))]
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body", False) and not background:
+                    self.tracer.end(span)
+                    if isinstance(span, Span):
+                        background.append(
+                            Span(f"{name} background", span.trace_id, span.span_id, span.sampled,
+                                 {"service": self.tracer.service, "kind": "background"})
+                        )
+
+            try:
+                await self.app(scope, receive, _send)
+            except BaseException as exc:
+                if background:
+                    background[0].status = "error"
+                    background[0].attributes["error"] = f"{type(exc).__name__}: {exc}"
+                raise
+            finally:
+                # Most requests have no background work; skip the span unless there was some.
+                if background and (background[0].status == "error" or time.perf_counter() - background[0].perf_start >= 0.001):
+                    self.tracer.end(background[0])
+
+
+tracer = Tracer(
+    "workday_tools",
+    enabled=os.getenv("ASKHR_TRACING_ENABLED", "true").lower() in ("1", "true", "yes"),
+    sample_rate=float(os.getenv("ASKHR_TRACE_SAMPLE_RATE", "1.0")),
+    buffer_spans=int(os.getenv("ASKHR_TRACE_BUFFER_SPANS", "5000")),
+    export_path=os.getenv("ASKHR_TRACE_EXPORT_PATH", ""),
+)
+memory.register("trace_spans", count=lambda: len(tracer._spans), root=lambda: tracer._spans)
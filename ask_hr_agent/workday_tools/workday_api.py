@@ -1,4 +1,5 @@
 import json
+import logging
 import os
 import time
 import urllib.parse
@@ -15,6 +16,10 @@ from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.edge.service import Service as EdgeService
 from selenium.common.exceptions import WebDriverException
 
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
 
 def load_config(config_path: str) -> Dict[str, str]:
     """Load Workday config, allowing env vars to override file values."""
@@ -50,6 +55,7 @@ def load_config(config_path: str) -> Dict[str, str]:
     return config
 
 
+@tracer.traced("oauth.authorize")
 def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str = None, 
                   redirect_uri: str = None, scope: str = None, response_type: str = "code") -> Optional[str]:
     """Get OAuth authorization code using automated browser (Chrome/Edge).
@@ -137,7 +143,7 @@ def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str
                     edge_opts = _apply_common_opts(EdgeOptions())
                     if driver_path:
                         if verbose:
-                            print(f"[Workday][Selenium] Using EdgeDriver: {driver_path}")
+                            logger.info("Selenium using EdgeDriver: %s", driver_path)
                         driver = webdriver.Edge(service=EdgeService(executable_path=driver_path), options=edge_opts)
                     else:
                         driver = webdriver.Edge(options=edge_opts)
@@ -145,7 +151,7 @@ def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str
                     chrome_opts = _apply_common_opts(ChromeOptions())
                     if driver_path:
                         if verbose:
-                            print(f"[Workday][Selenium] Using ChromeDriver: {driver_path}")
+                            logger.info("Selenium using ChromeDriver: %s", driver_path)
                         driver = webdriver.Chrome(service=ChromeService(executable_path=driver_path), options=chrome_opts)
                     else:
                         driver = webdriver.Chrome(options=chrome_opts)
@@ -159,7 +165,7 @@ def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str
             raise RuntimeError(f"Failed to start browser. Errors: {launch_errors}")
 
         if verbose:
-            print(f"[Workday][Selenium] Launching auth URL: {full_auth_url}")
+            logger.info("Selenium launching auth URL: %s", full_auth_url)
         driver.get(full_auth_url)
 
         max_wait_time = wait_seconds
@@ -175,7 +181,7 @@ def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str
                 last_url = current_url
             except Exception as e:
                 if verbose:
-                    print(f"[Workday][Selenium] current_url error: {e}")
+                    logger.warning("Selenium current_url error: %s", e)
                 time.sleep(0.5)
                 continue
 
@@ -192,7 +198,7 @@ def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str
                 if 'code' in query_params:
                     auth_code = query_params['code'][0]
                     if verbose:
-                        print(f"[Workday][Selenium] Auth code captured")
+                        logger.info("Selenium auth code captured")
                     return auth_code
                 elif 'error' in query_params:
                     error = query_params['error'][0]
@@ -201,7 +207,7 @@ def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str
             time.sleep(0.5)
 
             if verbose and time.time() >= next_log:
-                print(f"[Workday][Selenium] Still waiting; current_url={current_url}")
+                logger.info("Selenium still waiting; current_url=%s", current_url)
                 next_log = time.time() + log_every
 
         raise TimeoutError(f"Authorization not completed within {max_wait_time} seconds. Last URL: {last_url}")
@@ -220,6 +226,7 @@ def get_auth_code(config_path: str = None, auth_url: str = None, client_id: str
 
 
 
+@tracer.traced("oauth.token")
 def get_access_token(config_path: str = None, code: str = None, token_url: str = None, 
                      grant_type: str = None, client_id: str = None, client_secret: str = None, 
                      redirect_uri: str = None, scope: str = None) -> Dict[str, Any]:
@@ -276,6 +283,7 @@ def extract_workday_id(user_data: Dict[str, Any]) -> Optional[str]:
     return None
 
 
+@tracer.traced("workday.rest", method="GET")
 def get_workday_data_merged(access_token: str, endpoints: List[str]) -> Dict[str, Any]:
     """Fetch data from multiple endpoints and merge."""
     headers = {
@@ -306,14 +314,15 @@ def get_workday_data_merged(access_token: str, endpoints: List[str]) -> Dict[str
 
 
 
+@tracer.traced("oauth.flow")
 def complete_oauth_flow(config_path: str) -> Dict[str, Any]:
     """Complete OAuth flow."""
     config = load_config(config_path)
-    print("[Workday] Starting OAuth flow...")
+    logger.info("Starting OAuth flow")
     auth_code = get_auth_code(config_path=config_path)
-    print("[Workday] Auth code obtained")
+    logger.info("Auth code obtained")
     token_data = get_access_token(config_path=config_path, code=auth_code)
-    print("[Workday] Access token retrieved")
+    logger.info("Access token retrieved")
     access_token = token_data['access_token']
     
     base_url = config.get('base_url')
@@ -335,7 +344,7 @@ def complete_oauth_flow(config_path: str) -> Dict[str, Any]:
         f"{base_url}/api/person/v4/{tenant}/people/me/legalName",
     ]
 
-    print("[Workday] Fetching primary user endpoints...")
+    logger.info("Fetching primary user endpoints")
     user_data = None
     for attempt in range(2):
         try:
@@ -343,7 +352,7 @@ def complete_oauth_flow(config_path: str) -> Dict[str, Any]:
             break
         except ValueError as e:
             if attempt == 0:
-                print(f"[Workday] Primary endpoints failed, retrying once: {e}")
+                logger.warning("Primary endpoints failed, retrying once: %s", e)
                 time.sleep(2)
                 continue
             raise
@@ -368,7 +377,7 @@ def complete_oauth_flow(config_path: str) -> Dict[str, Any]:
         pass
     
     workday_id = extract_workday_id(user_data)
-    print(f"[Workday] Workday ID: {workday_id}")
+    logger.info("Workday ID: %s", workday_id)
     
     if workday_id:
         absence_endpoints = [
@@ -417,6 +426,7 @@ def get_valid_time_off_dates(base_url: str, tenant: str, access_token: str, work
     return get_workday_data_merged(access_token, [endpoint])
 
 
+@tracer.traced("workday.rest", method="POST", operation="request_time_off")
 def submit_time_off_request(base_url: str, tenant: str, access_token: str, workday_id: str, 
                            time_off_type_id: str, start_date: str, end_date: str, 
                            quantity_per_day: float, comment: Optional[str] = None) -> Dict[str, Any]: